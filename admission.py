@@ -0,0 +1,100 @@
+"""Memory-budgeted admission control for KDF work.
+
+Each request reserves the memory its hashes can occupy at once
+(``memory_cost x concurrent hashes``) before any work starts. Requests that do
+not fit wait in a bounded queue; when the queue is full, or the wait runs past
+``max_wait`` seconds, the caller gets `AdmissionRejected` and should answer 429.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a reservation cannot be admitted; carries a Retry-After hint."""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class MemoryBudget:
+    def __init__(self, budget_kib: int, max_queue: int = 32, max_wait: float = 10.0):
+        self.budget_kib = max(1, int(budget_kib))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self.in_use_kib = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        # moving average of how long a reservation is held, used for Retry-After
+        self._hold_avg = 1.0
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._hold_avg * (self.waiting + 1) / max(1, self.in_flight)))
+
+    def acquire(self, kib: int) -> int:
+        """Block until `kib` fits in the budget; returns the amount actually reserved.
+
+        A single reservation larger than the whole budget is clamped to it so it
+        can still run, alone.
+        """
+        kib = min(max(0, int(kib)), self.budget_kib)
+        with self._cond:
+            if self.in_use_kib + kib > self.budget_kib:
+                if self.waiting >= self.max_queue:
+                    self.rejected += 1
+                    raise AdmissionRejected(self._retry_after(), 'admission queue is full')
+                self.waiting += 1
+                t0 = time.monotonic()
+                try:
+                    ok = self._cond.wait_for(lambda: self.in_use_kib + kib <= self.budget_kib, timeout=self.max_wait)
+                finally:
+                    self.waiting -= 1
+                    waited = time.monotonic() - t0
+                    self.wait_seconds_total += waited
+                    self.wait_seconds_max = max(self.wait_seconds_max, waited)
+                if not ok:
+                    self.rejected += 1
+                    raise AdmissionRejected(self._retry_after(), 'timed out waiting for KDF memory')
+            self.in_use_kib += kib
+            self.in_flight += 1
+            self.admitted += 1
+        return kib
+
+    def release(self, kib: int, held_seconds: float = None):
+        with self._cond:
+            self.in_use_kib -= kib
+            self.in_flight -= 1
+            if held_seconds is not None:
+                self._hold_avg = 0.8 * self._hold_avg + 0.2 * held_seconds
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, kib: int):
+        reserved = self.acquire(kib)
+        t0 = time.monotonic()
+        try:
+            yield reserved
+        finally:
+            self.release(reserved, time.monotonic() - t0)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'budget_kib': self.budget_kib,
+                'in_use_kib': self.in_use_kib,
+                'in_flight': self.in_flight,
+                'queue_depth': self.waiting,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+            }
@@ -1,50 +1,475 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template, send_file, send_from_directory, stream_with_context
+import gzip
+import json
 import os
-import hashlib
-import binascii
-from argon2 import PasswordHasher
+import time
+
+from admission import AdmissionRejected, MemoryBudget
+from digest_table import DigestTable
+import hash_codec
+import kdf_config
+from hash_engine import HashEngine, sha256_hex, verify_memory_kib  # noqa: F401 (sha256_hex re-exported)
+from jobs import JobRunner, JobStore
+import metrics
+from metrics import ServerMetrics
+from profiling import RequestTimer, SlowRequestProfiler
+from rainbow_index import RainbowIndex
+from strength import StrengthIndex, compile_trie
+import upload
+from upload import UploadLimits, UploadRejected
+
+NDJSON = 'application/x-ndjson'
+# JSON bodies smaller than this are not worth gzipping; level 1 is ~2x faster than 5 for ~6% more bytes
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 1
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
-ph = PasswordHasher()
+# KDF parameters tuned for this host (see scripts/autotune_kdfs.py); library defaults if absent
+KDF_CONFIG = os.environ.get('KDF_CONFIG', os.path.join(app.root_path, 'data', 'kdf_config.json'))
+kdf_settings = kdf_config.load(KDF_CONFIG)
+ph = kdf_config.password_hasher(kdf_settings)
+# Request, batch-size and per-algorithm hash metrics, scraped at /metrics
+server_metrics = ServerMetrics()
+# Worker pool for batch hashing; HASH_WORKERS overrides the CPU-count default.
+# SHA-256-only batches time 1 in HASH_TIMING_SAMPLE passwords (see HashEngine._observers)
+engine = HashEngine(ph, workers=int(os.environ.get('HASH_WORKERS', '0')) or None,
+                    observe=server_metrics.hash_seconds.observe,
+                    sample_every=int(os.environ.get('HASH_TIMING_SAMPLE', '16')),
+                    plan_defaults=kdf_config.plan_defaults(kdf_settings))
+# Cap on KDF memory held by in-flight requests (default 1 GiB) and the queue in front of it
+admission = MemoryBudget(
+    budget_kib=int(os.environ.get('KDF_MEMORY_BUDGET_KIB', str(1024 * 1024))),
+    max_queue=int(os.environ.get('ADMISSION_MAX_QUEUE', '32')),
+    max_wait=float(os.environ.get('ADMISSION_MAX_WAIT', '10')),
+)
+# Prebuilt index for /api/rainbow/lookup (see scripts/build_rainbow_index.py); mapped on first use
+RAINBOW_INDEX = os.environ.get('RAINBOW_INDEX', os.path.join(app.root_path, 'data', 'common_passwords.idx'))
+MAX_RAINBOW_LOOKUPS = 10000
+_rainbow_index = None
+# Common-password list and the binary digest table built from it for the front end
+COMMON_PASSWORDS = os.environ.get('COMMON_PASSWORDS', os.path.join(app.root_path, 'data', 'common_passwords.txt'))
+digest_table = DigestTable(COMMON_PASSWORDS, os.environ.get(
+    'DIGEST_TABLE', os.path.join(app.root_path, 'data', 'common_passwords.digests')))
+# Trie for /api/strength (see scripts/build_strength_trie.py); compiled from COMMON_PASSWORDS if missing
+STRENGTH_TRIE = os.environ.get('STRENGTH_TRIE', os.path.join(app.root_path, 'data', 'common_passwords.trie'))
+MAX_STRENGTH_PASSWORDS = 10000
+_strength_index = None
+# Caps on /api/hash bodies (JSON, NDJSON or text; see upload.py)
+upload_limits = UploadLimits(
+    max_body_bytes=int(os.environ.get('MAX_HASH_BODY_BYTES', str(16 * 1024 * 1024))),
+    max_items=int(os.environ.get('MAX_HASH_PASSWORDS', '100000')),
+    max_password_length=int(os.environ.get('MAX_PASSWORD_LENGTH', '1024')),
+)
+# Opt-in cProfile of sampled requests, served at /debug/profiles: off, header (X-Profile: 1) or all
+profiler = SlowRequestProfiler(
+    mode=os.environ.get('PROFILE_REQUESTS', 'off'),
+    capacity=int(os.environ.get('PROFILE_KEEP', '20')),
+    per_minute=float(os.environ.get('PROFILE_PER_MINUTE', '6')),
+)
+UNPROFILED_ENDPOINTS = ('static', 'metrics_endpoint', 'debug_profiles')
+# Cap on /api/verify items; an Argon2 verify costs as much as a hash
+MAX_VERIFY_ITEMS = int(os.environ.get('MAX_VERIFY_ITEMS', '10000'))
+# In-process store and background workers for /api/jobs
+MAX_JOB_PASSWORDS = int(os.environ.get('MAX_JOB_PASSWORDS', '100000'))
+job_store = JobStore(ttl=float(os.environ.get('JOB_TTL_SECONDS', '3600')),
+                     max_jobs=int(os.environ.get('MAX_JOBS', '100')))
+job_runner = JobRunner(engine, job_store, admission,
+                       workers=int(os.environ.get('JOB_WORKERS', '1')),
+                       chunk_size=int(os.environ.get('JOB_CHUNK_SIZE', '100')))
+
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.endpoint or 'unmatched'
+    g.metrics_started = server_metrics.request_started(g.metrics_endpoint)
+
+
+@app.after_request
+def finish_request_metrics(resp: Response) -> Response:
+    # recorded on close, so a streamed response counts until its last line is sent
+    endpoint, started, status = g.metrics_endpoint, g.metrics_started, resp.status_code
+    g.metrics_started = None
+    resp.call_on_close(lambda: server_metrics.request_finished(endpoint, status, started))
+    return resp
+
+
+@app.teardown_request
+def abort_request_metrics(exc):
+    # an unhandled exception skips after_request
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        server_metrics.request_finished(g.metrics_endpoint, 500, started)
+    prof = g.pop('profile', None)
+    if prof is not None:
+        finish_profile(prof, 500, None)
+
+
+@app.before_request
+def start_profile():
+    if profiler.enabled and request.endpoint not in UNPROFILED_ENDPOINTS:
+        g.profile = profiler.start(request.headers)
+        g.profile_started = time.perf_counter()
+
+
+@app.after_request
+def finish_request_timing(resp: Response) -> Response:
+    timer = g.get('timer')
+    if timer is not None:
+        resp.headers['Server-Timing'] = timer.header()
+    prof = g.pop('profile', None)
+    if prof is not None:
+        finish_profile(prof, resp.status_code, resp.headers.get('Server-Timing'))
+    return resp
+
+
+def finish_profile(prof, status: int, server_timing):
+    profiler.finish(prof, time.perf_counter() - g.profile_started, {
+        'method': request.method, 'path': request.full_path.rstrip('?'), 'endpoint': request.endpoint,
+        'status': status, 'server_timing': server_timing,
+    })
+
+
+def hash_observer(timer: RequestTimer):
+    """Engine `observe` hook feeding both the metrics histogram and this request's Server-Timing."""
+    metric = server_metrics.hash_seconds.observe
+
+    def observe(seconds, algorithm):
+        metric(seconds, algorithm)
+        timer.observe(seconds, algorithm)
+    return observe
+
+
+def counted(rows, endpoint: str):
+    """Pass rows through, recording how many there were as the batch size once they run out."""
+    n = 0
+    try:
+        for row in rows:
+            n += 1
+            yield row
+    finally:
+        server_metrics.batch_passwords.observe(n, endpoint)
+
+
+def hash_response_format() -> str:
+    """Media type for an `/api/hash` response: JSON unless the client asks for another format we can produce."""
+    return request.accept_mimetypes.best_match(hash_codec.formats()) or 'application/json'
+
+
+def maybe_gzip(resp: Response) -> Response:
+    """Gzip a buffered response body when the client accepts it and it is big enough to matter."""
+    resp.vary.add('Accept-Encoding')
+    if 'gzip' in request.accept_encodings and resp.content_length and resp.content_length >= GZIP_MIN_BYTES:
+        resp.set_data(gzip.compress(resp.get_data(), compresslevel=GZIP_LEVEL))
+        resp.headers['Content-Encoding'] = 'gzip'
+    return resp
+
+
+def ndjson_response(rows) -> Response:
+    """Stream an iterable of dicts as one JSON document per line (chunked)."""
+    def generate():
+        for row in rows:
+            yield json.dumps(row) + '\n'
+    return Response(stream_with_context(generate()), mimetype=NDJSON)
+
+
+def too_busy(e: AdmissionRejected):
+    resp = jsonify({'error': 'server busy: ' + e.reason, 'retry_after': e.retry_after})
+    resp.status_code = 429
+    resp.headers['Retry-After'] = str(e.retry_after)
+    return resp
+
+
+def json_body():
+    """The request's JSON body if it is an object, else None (the caller answers 400)."""
+    data = request.get_json(force=True, silent=True)
+    return data if isinstance(data, dict) else None
+
+
+def upload_rejected(e: UploadRejected):
+    return jsonify({'error': e.message}), e.status
 
 
-def sha256_hex(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()
+def stream_options() -> dict:
+    """`algorithms`/`params` for NDJSON and text uploads, which carry them in the query string.
+
+    ``?algorithms=sha256,argon2&params={"argon2": {"time_cost": 2}}``
+    """
+    algorithms = request.args.get('algorithms')
+    params = request.args.get('params')
+    try:
+        params = json.loads(params) if params else None
+    except ValueError:
+        raise ValueError('params must be a JSON object')
+    return {'algorithms': algorithms.split(',') if algorithms else None, 'params': params}
+
+
+def until_rejected(rows):
+    """Pass rows through; an upload error part-way through becomes a final error row."""
+    try:
+        yield from rows
+    except UploadRejected as e:
+        yield {'error': e.message, 'status': e.status}
+
+
+def digest_table_url():
+    """Versioned URL of the digest table, or None when the password list is missing."""
+    try:
+        table = digest_table.ensure()
+    except OSError:
+        return None
+    return f'/data/common_passwords.digests?v={table.version}'
 
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', digest_table_url=digest_table_url())
+
+
+@app.route('/data/common_passwords.txt')
+def common_passwords_txt():
+    return send_from_directory(os.path.dirname(COMMON_PASSWORDS), os.path.basename(COMMON_PASSWORDS),
+                               mimetype='text/plain')
+
+
+@app.route('/data/common_passwords.digests')
+def common_passwords_table():
+    """Prebuilt digest table, precompressed and cacheable (see digest_table.py)."""
+    try:
+        table = digest_table.ensure()
+    except OSError:
+        return jsonify({'error': 'common password list not found'}), 404
+    encoding, path, etag = table.variant_for(request.accept_encodings)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = send_file(path, mimetype='application/octet-stream', etag=False, conditional=False)
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+    resp.set_etag(etag)
+    resp.vary.add('Accept-Encoding')
+    if request.args.get('v') == table.version:
+        # the URL names this exact content, so it never needs revalidating
+        resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        resp.headers['Cache-Control'] = 'no-cache'
+    return resp
 
 
 @app.route('/api/hash', methods=['POST'])
 def api_hash():
-    data = request.get_json(force=True)
-    passwords = data.get('passwords') or []
-    result = []
-    for pwd in passwords:
-        if not isinstance(pwd, str):
-            pwd = str(pwd)
-        raw = pwd.encode('utf-8')
-        # Unsalted (insecure) — SHA-256 of the password
-        unsalted = sha256_hex(raw)
-        # Salted with a per-password 128-bit (16 byte) salt using CSPRNG
-        salt = os.urandom(16)  # 128 bits
-        salted_sha256 = sha256_hex(salt + raw)
-        salt_hex = binascii.hexlify(salt).decode()
-        # Argon2 hash (uses its own internal salt)
-        argon2_hash = ph.hash(pwd)
-        result.append({
-            'password': pwd,
-            'unsalted_sha256': unsalted,
-            'salted': {
-                'salt_hex': salt_hex,
-                'salted_sha256': salted_sha256
-            },
-            'argon2_hash': argon2_hash
-        })
+    # phase timings for the Server-Timing header (added in finish_request_timing)
+    timer = g.timer = RequestTimer()
+    # NDJSON and text bodies are parsed as they arrive and hashed on the fly
+    streamed = request.mimetype in (upload.NDJSON, upload.TEXT)
+    try:
+        with timer.phase('parse'):
+            upload_limits.check_content_length(request.content_length)
+            if streamed:
+                data = stream_options()
+                passwords = upload.iter_passwords(request.stream, request.mimetype, upload_limits)
+            else:
+                data = upload.read_json(request.stream, upload_limits)
+                if not isinstance(data, dict):
+                    raise UploadRejected(400, 'request body must be a JSON object')
+                passwords = data.get('passwords') or []
+                upload_limits.check_batch(passwords)
+        with timer.phase('plan'):
+            plan = engine.plan(data.get('algorithms'), data.get('params'))
+    except UploadRejected as e:
+        return upload_rejected(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        # an upload's length is unknown up front: reserve for a full pool
+        count = engine.workers if streamed else len(passwords)
+        with timer.phase('admission'):
+            reserved = admission.acquire(engine.batch_memory_kib(plan, count))
+    except AdmissionRejected as e:
+        return too_busy(e)
+    t0 = time.monotonic()
+    fmt = hash_response_format()
+    observe = hash_observer(timer)
+    if fmt == NDJSON:
+        # the reservation is held until the last line has been streamed; the
+        # headers go out first, so Server-Timing stops at admission here
+        rows = engine.iter_hash(passwords, plan, observe=observe)
+        resp = ndjson_response(until_rejected(counted(rows, 'api_hash')))
+        resp.call_on_close(lambda: admission.release(reserved, time.monotonic() - t0))
+        return resp
+    binary = fmt in (hash_codec.FRAMES, hash_codec.MSGPACK)
+    try:
+        # for streamed uploads this includes reading and parsing the body
+        with timer.phase('hash'):
+            if streamed:
+                result = list(engine.iter_hash(passwords, plan, binary=binary, observe=observe))
+            else:
+                result = engine.hash_batch(passwords, plan, binary=binary, observe=observe)
+    except UploadRejected as e:
+        return upload_rejected(e)
+    finally:
+        admission.release(reserved, time.monotonic() - t0)
+    timer.rows = len(result)
+    server_metrics.batch_passwords.observe(len(result), 'api_hash')
+    with timer.phase('serialize'):
+        if fmt == hash_codec.FRAMES:
+            resp = Response(hash_codec.encode_frames(result, plan.algorithms), mimetype=fmt)
+        elif fmt == hash_codec.MSGPACK:
+            resp = Response(hash_codec.encode_msgpack(result), mimetype=fmt)
+        else:
+            resp = jsonify(result)
+    if fmt == 'application/json':
+        with timer.phase('gzip'):
+            resp = maybe_gzip(resp)
+    resp.vary.add('Accept')
+    return resp
+
+
+@app.route('/api/verify', methods=['POST'])
+def api_verify():
+    data = json_body()
+    if data is None:
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    items = data.get('items') or []
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        return jsonify({'error': 'items must be a list of objects'}), 400
+    if len(items) > MAX_VERIFY_ITEMS:
+        return jsonify({'error': f'at most {MAX_VERIFY_ITEMS} items per request'}), 413
+    try:
+        for i, item in enumerate(items):
+            pwd = item.get('password', '')
+            upload_limits.check_password(pwd if isinstance(pwd, str) else str(pwd), f'items[{i}].password')
+    except UploadRejected as e:
+        return upload_rejected(e)
+    slow = sum(1 for i in items if isinstance(i.get('hash'), str))
+    try:
+        reserved = admission.acquire(verify_memory_kib(items) * min(engine.workers, slow))
+    except AdmissionRejected as e:
+        return too_busy(e)
+    t0 = time.monotonic()
+    try:
+        result = engine.verify_batch(items)
+    finally:
+        admission.release(reserved, time.monotonic() - t0)
+    server_metrics.batch_passwords.observe(len(items), 'api_verify')
     return jsonify(result)
 
 
+@app.route('/api/jobs', methods=['POST'])
+def api_create_job():
+    try:
+        upload_limits.check_content_length(request.content_length)
+        data = upload.read_json(request.stream, upload_limits)
+        if not isinstance(data, dict):
+            raise UploadRejected(400, 'request body must be a JSON object')
+        passwords = data.get('passwords') or []
+        if isinstance(passwords, list) and len(passwords) > MAX_JOB_PASSWORDS:
+            raise UploadRejected(413, f'a job may contain at most {MAX_JOB_PASSWORDS} passwords')
+        upload_limits.check_batch(passwords)
+    except UploadRejected as e:
+        return upload_rejected(e)
+    try:
+        plan = engine.plan(data.get('algorithms'), data.get('params'))
+        job = job_runner.submit(passwords, plan)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except AdmissionRejected as e:
+        return too_busy(e)
+    server_metrics.batch_passwords.observe(len(passwords), 'api_create_job')
+    resp = jsonify({'job_id': job.id, 'status': job.status, 'total': job.total})
+    resp.status_code = 202
+    resp.headers['Location'] = f'/api/jobs/{job.id}'
+    return resp
+
+
+@app.route('/api/jobs/<job_id>')
+def api_get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown or expired job'}), 404
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(1000, max(1, request.args.get('limit', 100, type=int)))
+    return jsonify(job.snapshot(offset, limit))
+
+
+def rainbow_index():
+    global _rainbow_index
+    if _rainbow_index is None and os.path.exists(RAINBOW_INDEX):
+        _rainbow_index = RainbowIndex(RAINBOW_INDEX)
+    return _rainbow_index
+
+
+@app.route('/api/rainbow/lookup', methods=['POST'])
+def api_rainbow_lookup():
+    """Batch lookup of unsalted SHA-256 hex digests in the prebuilt rainbow index."""
+    data = json_body()
+    if data is None:
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    hashes = data.get('hashes') or []
+    if not isinstance(hashes, list):
+        return jsonify({'error': 'hashes must be a list of hex digests'}), 400
+    if len(hashes) > MAX_RAINBOW_LOOKUPS:
+        return jsonify({'error': f'at most {MAX_RAINBOW_LOOKUPS} hashes per request'}), 413
+    index = rainbow_index()
+    if index is None:
+        return jsonify({'error': 'rainbow index not built; run scripts/build_rainbow_index.py'}), 503
+    return jsonify([{'sha256': h, 'password': index.lookup_hex(h)} for h in hashes])
+
+
+def strength_index():
+    global _strength_index
+    if _strength_index is None:
+        if not os.path.exists(STRENGTH_TRIE) and os.path.exists(COMMON_PASSWORDS):
+            with open(COMMON_PASSWORDS, encoding='utf-8') as fh:
+                compile_trie(fh, STRENGTH_TRIE)
+        if os.path.exists(STRENGTH_TRIE):
+            _strength_index = StrengthIndex(STRENGTH_TRIE)
+    return _strength_index
+
+
+@app.route('/api/strength', methods=['POST'])
+def api_strength():
+    """Dictionary- and pattern-aware strength for a batch of passwords."""
+    data = json_body()
+    if data is None:
+        return jsonify({'error': 'request body must be a JSON object'}), 400
+    passwords = data.get('passwords') or []
+    if not isinstance(passwords, list) or not all(isinstance(p, str) for p in passwords):
+        return jsonify({'error': 'passwords must be a list of strings'}), 400
+    if len(passwords) > MAX_STRENGTH_PASSWORDS:
+        return jsonify({'error': f'at most {MAX_STRENGTH_PASSWORDS} passwords per request'}), 413
+    try:
+        for i, pwd in enumerate(passwords):
+            upload_limits.check_password(pwd, f'passwords[{i}]')
+    except UploadRejected as e:
+        return upload_rejected(e)
+    index = strength_index()
+    if index is None:
+        return jsonify({'error': 'strength trie not built; run scripts/build_strength_trie.py'}), 503
+    return jsonify(index.score_batch(passwords))
+
+
+@app.route('/api/admission')
+def api_admission():
+    """Admission-control counters, for sizing KDF_MEMORY_BUDGET_KIB."""
+    return jsonify(admission.stats())
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of `server_metrics`."""
+    return Response(server_metrics.exposition(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/debug/profiles', methods=['GET', 'DELETE'])
+def debug_profiles():
+    """The slowest profiled requests, slowest first (DELETE empties the buffer)."""
+    if not profiler.enabled:
+        return jsonify({'error': 'profiling is off; set PROFILE_REQUESTS=header or all'}), 404
+    if request.method == 'DELETE':
+        profiler.clear()
+        return '', 204
+    return jsonify(profiler.snapshot())
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='127.0.0.1', port=5000)
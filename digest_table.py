@@ -0,0 +1,92 @@
+"""Precomputed digest table for the front end's rainbow-table simulator.
+
+Instead of every browser hashing `common_passwords.txt` with WebCrypto, the
+server builds the table once, in the `rainbow_index` file format (sorted raw
+SHA-256 digests + password offsets + UTF-8 blob), which the browser reads in
+place with ``DataView``s and binary-searches without building a map.
+
+Next to the table it writes precompressed ``.gz`` and (when the optional
+`brotli` package is installed) ``.br`` variants, and derives a strong ETag
+from the table's bytes. The table is rebuilt whenever the source list is
+newer than it.
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+from rainbow_index import build_index
+
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+
+def _iter_lines(path):
+    with open(path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def _write_atomic(path, data: bytes):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class DigestTable:
+    """Built table for `source`, stored at `path`, plus its compressed variants."""
+
+    def __init__(self, source: str, path: str):
+        self.source = source
+        self.path = path
+        self.etag = None
+        self.variants = {}
+        self._built_for = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """Short content hash, used to give the table an immutable URL."""
+        return self.etag[:16]
+
+    def _stale(self) -> bool:
+        if not os.path.exists(self.path):
+            return True
+        return os.path.getmtime(self.source) > os.path.getmtime(self.path)
+
+    def ensure(self) -> 'DigestTable':
+        """(Re)build the table and its variants if the source changed; returns self.
+
+        Raises OSError when the source list is missing.
+        """
+        with self._lock:
+            if self._stale():
+                build_index(_iter_lines(self.source), self.path)
+            mtime = os.path.getmtime(self.path)
+            if self._built_for == mtime:
+                return self
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            variants = {None: self.path}
+            _write_atomic(self.path + '.gz', gzip.compress(raw, compresslevel=9, mtime=0))
+            variants['gzip'] = self.path + '.gz'
+            if brotli is not None:
+                _write_atomic(self.path + '.br', brotli.compress(raw, quality=11))
+                variants['br'] = self.path + '.br'
+            self.etag = hashlib.sha256(raw).hexdigest()
+            self.variants = variants
+            self._built_for = mtime
+        return self
+
+    def variant_for(self, accept_encodings):
+        """(content-coding or None, file path, etag) for a request's Accept-Encoding."""
+        encoding = accept_encodings.best_match([e for e in ('br', 'gzip') if e in self.variants])
+        if encoding is None:
+            return None, self.variants[None], self.etag
+        # representations differ per coding, so their strong ETags must too
+        return encoding, self.variants[encoding], f'{self.etag}-{encoding}'
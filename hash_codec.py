@@ -0,0 +1,127 @@
+"""Compact encodings of `/api/hash` results.
+
+JSON repeats every key name per row and doubles salts and digests by sending
+them as hex. Clients that ask for it get one of:
+
+- ``application/x-hash-frames``: length-prefixed binary frames (below);
+- ``application/msgpack``: the rows as MessagePack, salts and digests as bin
+  (only offered when the optional `msgpack` package is installed).
+
+Both encode rows built with ``hash_password(..., binary=True)``, whose
+digests were never hex-encoded. Frame layout (little-endian)::
+
+    header   '<8sIB'  magic b'SALTHF01', row count, algorithm flags (bit i = FLAG_ORDER[i])
+    per row  '<I'     length of the rest of the frame, then in FLAG_ORDER:
+             password      '<I' byte length + UTF-8
+             sha256        32-byte digest
+             salted_sha256 16-byte salt + 32-byte digest
+             argon2        '<H' length + encoded hash (ASCII)
+             bcrypt        '<H' length + encoded hash (ASCII)
+             scrypt        16-byte salt + 32-byte key + '<IBB' n, r, p
+
+Only the sections whose flag is set are present.
+"""
+import struct
+
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
+FRAMES = 'application/x-hash-frames'
+MSGPACK = 'application/msgpack'
+MAGIC = b'SALTHF01'
+HEADER = struct.Struct('<8sIB')
+FLAG_ORDER = ('sha256', 'salted_sha256', 'argon2', 'bcrypt', 'scrypt')
+_U32 = struct.Struct('<I')
+_U16 = struct.Struct('<H')
+_SCRYPT_PARAMS = struct.Struct('<IBB')
+
+
+def encode_frames(rows, algorithms) -> bytes:
+    """Frames for `rows` from ``hash_password(..., binary=True)`` computed with `algorithms`."""
+    algorithms = set(algorithms)
+    flags = sum(1 << i for i, a in enumerate(FLAG_ORDER) if a in algorithms)
+    u32, u16 = _U32.pack, _U16.pack
+    has = [a in algorithms for a in FLAG_ORDER]
+    parts = [HEADER.pack(MAGIC, len(rows), flags)]
+    append = parts.append
+    for row in rows:
+        pw = row['password'].encode('utf-8')
+        frame = [u32(len(pw)), pw]
+        if has[0]:
+            frame.append(row['unsalted_sha256'])
+        if has[1]:
+            frame += (row['salted']['salt'], row['salted']['salted_sha256'])
+        if has[2]:
+            enc = row['argon2_hash'].encode('ascii')
+            frame += (u16(len(enc)), enc)
+        if has[3]:
+            enc = row['bcrypt_hash'].encode('ascii')
+            frame += (u16(len(enc)), enc)
+        if has[4]:
+            s = row['scrypt']
+            frame += (s['salt'], s['dk'], _SCRYPT_PARAMS.pack(s['n'], s['r'], s['p']))
+        body = b''.join(frame)
+        append(u32(len(body)))
+        append(body)
+    return b''.join(parts)
+
+
+def decode_frames(data: bytes) -> list:
+    """Rows (binary digests) back from `encode_frames` output; raises ValueError on bad input."""
+    data = bytes(data)
+    if len(data) < HEADER.size:
+        raise ValueError('truncated header')
+    magic, count, flags = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('not a hash frame stream')
+    sha, salted, argon, bc, scr = (bool(flags & (1 << i)) for i in range(len(FLAG_ORDER)))
+    u32, u16 = _U32.unpack_from, _U16.unpack_from
+    pos = HEADER.size
+    rows = []
+    append = rows.append
+    try:
+        for _ in range(count):
+            end = pos + 4 + u32(data, pos)[0]
+            n = u32(data, pos + 4)[0]
+            pos += 8
+            row = {'password': data[pos:pos + n].decode('utf-8')}
+            pos += n
+            if sha:
+                row['unsalted_sha256'] = data[pos:pos + 32]
+                pos += 32
+            if salted:
+                row['salted'] = {'salt': data[pos:pos + 16], 'salted_sha256': data[pos + 16:pos + 48]}
+                pos += 48
+            if argon:
+                n = u16(data, pos)[0]
+                row['argon2_hash'] = data[pos + 2:pos + 2 + n].decode('ascii')
+                pos += 2 + n
+            if bc:
+                n = u16(data, pos)[0]
+                row['bcrypt_hash'] = data[pos + 2:pos + 2 + n].decode('ascii')
+                pos += 2 + n
+            if scr:
+                n_, r, p = _SCRYPT_PARAMS.unpack_from(data, pos + 48)
+                row['scrypt'] = {'salt': data[pos:pos + 16], 'dk': data[pos + 16:pos + 48], 'n': n_, 'r': r, 'p': p}
+                pos += 48 + _SCRYPT_PARAMS.size
+            if pos != end or pos > len(data):
+                raise ValueError('frame length does not match its contents')
+            append(row)
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f'truncated or corrupt frame: {e}') from e
+    return rows
+
+
+def encode_msgpack(rows) -> bytes:
+    return msgpack.packb(rows, use_bin_type=True)
+
+
+def decode_msgpack(data: bytes) -> list:
+    return msgpack.unpackb(data, raw=False)
+
+
+def formats() -> list:
+    """Response media types this server can produce for `/api/hash`, JSON first (the default)."""
+    return ['application/json', 'application/x-ndjson', FRAMES] + ([MSGPACK] if msgpack is not None else [])
@@ -0,0 +1,422 @@
+"""Batch hashing engine used by the `/api/hash` endpoint.
+
+Argon2 dominates the per-password cost and argon2-cffi releases the GIL while it
+hashes, so a bounded thread pool is enough to spread one batch over every core
+without the pickling/start-up overhead of a process pool.
+"""
+import binascii
+import hashlib
+import hmac
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import cycle, repeat
+
+from argon2 import PasswordHasher, extract_parameters
+from argon2.exceptions import InvalidHashError, VerificationError
+
+from hashing_core import SALT_BYTES, iter_salts, random_salts, salted_sha256, sha256_hex
+
+try:
+    import bcrypt
+except Exception:
+    bcrypt = None
+
+ALGORITHMS = ('sha256', 'salted_sha256', 'argon2', 'bcrypt', 'scrypt')
+# What `/api/hash` computes when the request does not list any algorithms
+DEFAULT_ALGORITHMS = ('sha256', 'salted_sha256', 'argon2')
+
+# Server-side ceilings for client-supplied KDF parameters
+ARGON2_LIMITS = {'time_cost': (1, 10), 'memory_cost': (8, 262144), 'parallelism': (1, 8)}
+BCRYPT_LIMITS = {'rounds': (4, 15)}
+SCRYPT_LIMITS = {'n': (2, 1 << 20), 'r': (1, 16), 'p': (1, 4)}
+SCRYPT_MAX_MEM = 256 * 1024 * 1024
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _algo_params(params: dict, algo: str) -> dict:
+    p = params.get(algo) or {}
+    if not isinstance(p, dict):
+        raise ValueError(f'params.{algo} must be an object')
+    return p
+
+
+def _int_param(params: dict, name: str, default: int, limits: dict, algo: str) -> int:
+    value = params.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f'{algo}.{name} must be an integer')
+    lo, hi = limits[name]
+    if not lo <= value <= hi:
+        raise ValueError(f'{algo}.{name} must be between {lo} and {hi}')
+    return value
+
+
+class HashPlan:
+    """The validated set of algorithms (and their parameters) to run per password."""
+
+    def __init__(self, algorithms=DEFAULT_ALGORITHMS, ph: PasswordHasher = None,
+                 bcrypt_rounds: int = 10, scrypt_n: int = 16384, scrypt_r: int = 8, scrypt_p: int = 1):
+        self.algorithms = tuple(algorithms)
+        self.ph = ph or PasswordHasher()
+        self.bcrypt_rounds = bcrypt_rounds
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+
+    @property
+    def memory_kib(self) -> int:
+        """Peak KDF memory of hashing one password (algorithms run one after another)."""
+        peaks = [0]
+        if 'argon2' in self.algorithms:
+            peaks.append(self.ph.memory_cost)
+        if 'bcrypt' in self.algorithms:
+            peaks.append(4)  # ~4 KiB of Blowfish state
+        if 'scrypt' in self.algorithms:
+            peaks.append(128 * self.scrypt_n * self.scrypt_r // 1024)
+        return max(peaks)
+
+    @classmethod
+    def from_request(cls, algorithms=None, params=None, ph: PasswordHasher = None, defaults: dict = None) -> 'HashPlan':
+        """Build a plan from the `algorithms`/`params` fields of a request body.
+
+        `defaults` are `HashPlan` keywords (e.g. ``bcrypt_rounds``) for the
+        parameters a request leaves out. Raises ValueError with a client-facing
+        message on bad input.
+        """
+        if algorithms is None:
+            algorithms = DEFAULT_ALGORITHMS
+        if not isinstance(algorithms, (list, tuple)) or not algorithms:
+            raise ValueError('algorithms must be a non-empty list')
+        unknown = [a for a in algorithms if a not in ALGORITHMS]
+        if unknown:
+            raise ValueError(f'unknown algorithm(s): {", ".join(map(str, unknown))}')
+        # keep the canonical order and drop duplicates
+        algorithms = tuple(a for a in ALGORITHMS if a in algorithms)
+
+        params = params or {}
+        if not isinstance(params, dict):
+            raise ValueError('params must be an object keyed by algorithm')
+
+        plan = cls(algorithms, ph=ph, **(defaults or {}))
+        if 'argon2' in algorithms and params.get('argon2'):
+            p = _algo_params(params, 'argon2')
+            base = plan.ph
+            time_cost = _int_param(p, 'time_cost', base.time_cost, ARGON2_LIMITS, 'argon2')
+            memory_cost = _int_param(p, 'memory_cost', base.memory_cost, ARGON2_LIMITS, 'argon2')
+            parallelism = _int_param(p, 'parallelism', base.parallelism, ARGON2_LIMITS, 'argon2')
+            if memory_cost < 8 * parallelism:
+                raise ValueError('argon2.memory_cost must be at least 8 * argon2.parallelism')
+            plan.ph = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+        if 'bcrypt' in algorithms:
+            if bcrypt is None:
+                raise ValueError('bcrypt is not available on this server (install `bcrypt` to enable)')
+            p = _algo_params(params, 'bcrypt')
+            plan.bcrypt_rounds = _int_param(p, 'rounds', plan.bcrypt_rounds, BCRYPT_LIMITS, 'bcrypt')
+        if 'scrypt' in algorithms:
+            p = _algo_params(params, 'scrypt')
+            plan.scrypt_n = _int_param(p, 'n', plan.scrypt_n, SCRYPT_LIMITS, 'scrypt')
+            plan.scrypt_r = _int_param(p, 'r', plan.scrypt_r, SCRYPT_LIMITS, 'scrypt')
+            plan.scrypt_p = _int_param(p, 'p', plan.scrypt_p, SCRYPT_LIMITS, 'scrypt')
+            if plan.scrypt_n & (plan.scrypt_n - 1):
+                raise ValueError('scrypt.n must be a power of two')
+            if 128 * plan.scrypt_n * plan.scrypt_r > SCRYPT_MAX_MEM:
+                raise ValueError('scrypt.n * scrypt.r exceeds the server memory limit')
+        return plan
+
+
+def hash_password(pwd, plan: HashPlan, salt=None, binary: bool = False, observe=None) -> dict:
+    """Compute the hashes listed in `plan` for a single password.
+
+    `salt` is the salted SHA-256 salt, normally a slice of a batch drawn by
+    `random_salts`; a fresh one is drawn when it is not given. With `binary`,
+    salts and digests stay raw bytes (keys ``salt``/``dk`` instead of the
+    ``*_hex`` ones) for the compact encodings in `hash_codec`. `observe`, if
+    given, is called as ``observe(seconds, algorithm)`` after each algorithm.
+    """
+    if not isinstance(pwd, str):
+        pwd = str(pwd)
+    raw = pwd.encode('utf-8')
+    algos = plan.algorithms
+    row = {'password': pwd}
+    clock = time.perf_counter
+    t = clock() if observe else 0.0
+    if 'sha256' in algos:
+        # Unsalted (insecure) — SHA-256 of the password
+        row['unsalted_sha256'] = hashlib.sha256(raw).digest() if binary else sha256_hex(raw)
+        if observe:
+            t, t0 = clock(), t
+            observe(t - t0, 'sha256')
+    if 'salted_sha256' in algos:
+        # Salted with a per-password 128-bit (16 byte) salt using CSPRNG
+        if salt is None:
+            salt = os.urandom(SALT_BYTES)
+        if binary:
+            row['salted'] = {'salt': bytes(salt), 'salted_sha256': salted_sha256(salt, raw)}
+        else:
+            row['salted'] = {
+                'salt_hex': salt.hex(),
+                'salted_sha256': salted_sha256(salt, raw).hex()
+            }
+        if observe:
+            t, t0 = clock(), t
+            observe(t - t0, 'salted_sha256')
+    if 'argon2' in algos:
+        # Argon2 hash (uses its own internal salt)
+        row['argon2_hash'] = plan.ph.hash(pwd)
+        if observe:
+            t, t0 = clock(), t
+            observe(t - t0, 'argon2')
+    if 'bcrypt' in algos:
+        # bcrypt only looks at the first 72 bytes; newer releases refuse longer input
+        row['bcrypt_hash'] = bcrypt.hashpw(raw[:72], bcrypt.gensalt(plan.bcrypt_rounds)).decode()
+        if observe:
+            t, t0 = clock(), t
+            observe(t - t0, 'bcrypt')
+    if 'scrypt' in algos:
+        salt = os.urandom(16)
+        dk = hashlib.scrypt(raw, salt=salt, n=plan.scrypt_n, r=plan.scrypt_r, p=plan.scrypt_p,
+                            maxmem=SCRYPT_MAX_MEM + 1024 * 1024, dklen=32)
+        if binary:
+            row['scrypt'] = {'salt': salt, 'dk': dk, 'n': plan.scrypt_n, 'r': plan.scrypt_r, 'p': plan.scrypt_p}
+        else:
+            row['scrypt'] = {
+                'salt_hex': binascii.hexlify(salt).decode(),
+                'scrypt_hex': dk.hex(),
+                'n': plan.scrypt_n, 'r': plan.scrypt_r, 'p': plan.scrypt_p
+            }
+        if observe:
+            observe(clock() - t, 'scrypt')
+    return row
+
+
+def verify_format(item: dict) -> str:
+    """Which stored-hash format a `/api/verify` item carries (None when unrecognised)."""
+    encoded = item.get('hash')
+    if isinstance(encoded, str):
+        if encoded.startswith('$argon2'):
+            return 'argon2'
+        if encoded.startswith(('$2a$', '$2b$', '$2y$')):
+            return 'bcrypt'
+        return None
+    if isinstance(item.get('salted'), dict):
+        return 'salted_sha256'
+    if isinstance(item.get('unsalted_sha256'), str):
+        return 'sha256'
+    return None
+
+
+def check_argon2_hash(encoded: str):
+    """Raise ValueError if an encoded Argon2 hash asks for more than `ARGON2_LIMITS` allow.
+
+    Verifying runs the hash with its own m/t/p, so a client-supplied hash must
+    not be able to claim more memory or time than `/api/hash` would grant.
+    """
+    params = extract_parameters(encoded)
+    for name, value in (('time_cost', params.time_cost), ('memory_cost', params.memory_cost),
+                        ('parallelism', params.parallelism)):
+        lo, hi = ARGON2_LIMITS[name]
+        if not lo <= value <= hi:
+            raise ValueError(f'argon2 {name} {value} is outside the server limits ({lo}..{hi})')
+
+
+def check_bcrypt_hash(encoded: str):
+    """Raise ValueError if a bcrypt hash is malformed or its cost is outside `BCRYPT_LIMITS`.
+
+    The cost is part of the hash (``$2b$NN$...``) and a checkpw at cost 31
+    runs for days, so it is bounded like the rounds `/api/hash` accepts.
+    """
+    cost = encoded[4:6]
+    if len(encoded) < 7 or encoded[6] != '$' or not cost.isdigit():
+        raise ValueError('bcrypt hash has no $NN$ cost field')
+    lo, hi = BCRYPT_LIMITS['rounds']
+    if not lo <= int(cost) <= hi:
+        raise ValueError(f'bcrypt rounds {int(cost)} is outside the server limits ({lo}..{hi})')
+
+
+def _hex_equal(hex_value, digest: bytes) -> bool:
+    try:
+        expected = bytes.fromhex(hex_value)
+    except (TypeError, ValueError):
+        raise ValueError('digest is not valid hex')
+    return hmac.compare_digest(expected, digest)
+
+
+def verify_password(item: dict, ph: PasswordHasher) -> dict:
+    """Check one (password, stored hash) pair.
+
+    `needs_rehash` follows argon2-cffi's `check_needs_rehash` against `ph`; the
+    SHA-256 formats always need a rehash since they are not password hashes.
+    """
+    fmt = verify_format(item)
+    pwd = item.get('password', '')
+    if not isinstance(pwd, str):
+        pwd = str(pwd)
+    raw = pwd.encode('utf-8')
+    out = {'format': fmt, 'valid': False, 'needs_rehash': True}
+    try:
+        if fmt == 'argon2':
+            check_argon2_hash(item['hash'])
+            try:
+                out['valid'] = ph.verify(item['hash'], pwd)
+            except VerificationError:
+                out['valid'] = False
+            out['needs_rehash'] = ph.check_needs_rehash(item['hash'])
+        elif fmt == 'bcrypt':
+            check_bcrypt_hash(item['hash'])
+            if bcrypt is None:
+                raise ValueError('bcrypt is not available on this server')
+            out['valid'] = bcrypt.checkpw(raw[:72], item['hash'].encode())
+        elif fmt == 'salted_sha256':
+            salted = item['salted']
+            try:
+                salt = bytes.fromhex(salted.get('salt_hex', ''))
+            except (TypeError, ValueError):
+                raise ValueError('salt_hex is not valid hex')
+            out['valid'] = _hex_equal(salted.get('salted_sha256'), salted_sha256(salt, raw))
+        elif fmt == 'sha256':
+            out['valid'] = _hex_equal(item['unsalted_sha256'], hashlib.sha256(raw).digest())
+        else:
+            raise ValueError('unrecognised hash format')
+    except (InvalidHashError, ValueError) as e:
+        out['error'] = str(e)
+    return out
+
+
+def verify_memory_kib(items) -> int:
+    """Largest Argon2 memory cost among the encoded hashes in `items` that will actually be verified."""
+    peak = 0
+    for item in items:
+        if verify_format(item) == 'argon2':
+            try:
+                check_argon2_hash(item['hash'])
+                peak = max(peak, extract_parameters(item['hash']).memory_cost)
+            except (InvalidHashError, ValueError):
+                pass
+    return peak
+
+
+class HashEngine:
+    """Fan a batch of passwords out over a bounded worker pool.
+
+    Results are always returned in input order. The pool is created lazily and
+    shared by every request, so the number of concurrent hashes on the host is
+    capped at `workers` no matter how many requests arrive at once.
+    """
+
+    def __init__(self, ph: PasswordHasher = None, workers: int = None, observe=None, sample_every: int = 16,
+                 plan_defaults: dict = None):
+        self.ph = ph or PasswordHasher()
+        # bcrypt/scrypt parameters for requests that leave them out (see `kdf_config.plan_defaults`)
+        self.plan_defaults = dict(plan_defaults or {})
+        self.workers = max(1, workers or default_workers())
+        # per-algorithm timing hook passed to `hash_password` (e.g. a metrics histogram)
+        self.observe = observe
+        self.sample_every = max(1, int(sample_every))
+        self.default_plan = HashPlan(ph=self.ph, **self.plan_defaults)
+        self._pool = None
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hash-engine')
+        return self._pool
+
+    def plan(self, algorithms=None, params=None) -> HashPlan:
+        """Validate request options into a plan that reuses this engine's Argon2 hasher and KDF defaults."""
+        if algorithms is None and not params:
+            return self.default_plan
+        return HashPlan.from_request(algorithms, params, ph=self.ph, defaults=self.plan_defaults)
+
+    def batch_memory_kib(self, plan: HashPlan, count: int) -> int:
+        """KDF memory a batch of `count` passwords can hold at once on this pool."""
+        return (plan or self.default_plan).memory_kib * min(self.workers, count)
+
+    def _observers(self, plan: HashPlan, observe=None):
+        """`observe` argument for each successive password of a batch.
+
+        `observe` replaces the engine's hook for this batch. Plans with a KDF
+        time every password, since the timing is noise next to the hash.
+        SHA-256-only rows take a few microseconds, about what timing them costs,
+        so only 1 in `sample_every` of those is timed.
+        """
+        observe = observe or self.observe
+        if observe is None:
+            return repeat(None)
+        every = 1 if plan.memory_kib else self.sample_every
+        return cycle([observe] + [None] * (every - 1))
+
+    def hash_one(self, pwd, plan: HashPlan = None, salt=None) -> dict:
+        return hash_password(pwd, plan or self.default_plan, salt, observe=self.observe)
+
+    def hash_batch(self, passwords, plan: HashPlan = None, binary: bool = False, observe=None) -> list:
+        passwords = list(passwords)
+        plan = plan or self.default_plan
+        fn = partial(hash_password, plan=plan, binary=binary)
+        # one CSPRNG call for the whole batch's salts
+        salts = random_salts(len(passwords))
+        observers = self._observers(plan, observe)
+        # Not worth a round-trip through the pool for a single item
+        if self.workers == 1 or len(passwords) <= 1:
+            return [fn(p, salt=s, observe=o) for p, s, o in zip(passwords, salts, observers)]
+        return list(self.pool.map(lambda p, s, o: fn(p, salt=s, observe=o), passwords, salts, observers))
+
+    def iter_hash(self, passwords, plan: HashPlan = None, binary: bool = False, observe=None):
+        """Yield one result per password, in input order, as soon as it is ready.
+
+        At most ``2 * workers`` hashes are in flight at a time, so memory stays
+        bounded by the window rather than by the size of the batch.
+        """
+        plan = plan or self.default_plan
+        fn = partial(hash_password, plan=plan, binary=binary)
+        salts = iter_salts()
+        observers = self._observers(plan, observe)
+        if self.workers == 1:
+            for p, salt, o in zip(passwords, salts, observers):
+                yield fn(p, salt=salt, observe=o)
+            return
+        window = deque()
+        limit = self.workers * 2
+        try:
+            for p, salt, o in zip(passwords, salts, observers):
+                window.append(self.pool.submit(fn, p, salt=salt, observe=o))
+                if len(window) >= limit:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+        finally:
+            # client went away mid-stream: drop whatever has not started yet
+            for fut in window:
+                fut.cancel()
+
+    def verify_batch(self, items) -> list:
+        """Verify (password, stored hash) pairs, returning results in input order.
+
+        SHA-256 formats take microseconds and are checked inline; only the
+        Argon2/bcrypt verifies are spread across the worker pool.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        slow = []
+        for i, item in enumerate(items):
+            if verify_format(item) in ('argon2', 'bcrypt'):
+                slow.append(i)
+            else:
+                results[i] = verify_password(item, self.ph)
+        if self.workers == 1 or len(slow) <= 1:
+            for i in slow:
+                results[i] = verify_password(items[i], self.ph)
+        else:
+            futures = [(i, self.pool.submit(verify_password, items[i], self.ph)) for i in slow]
+            for i, fut in futures:
+                results[i] = fut.result()
+        return results
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
@@ -0,0 +1,68 @@
+"""SHA-256 helpers shared by the server (`hash_engine`) and `scripts/simulate.py`.
+
+Per item, the fixed costs dominate a 16-byte-salt SHA-256: a CSPRNG call,
+building ``salt + raw`` as a new bytes object, constructing a hash object and
+hex-encoding the digest. The batch helpers avoid all four:
+
+- salts for a whole batch come from one ``os.urandom`` call and are handed
+  out as ``memoryview`` slices (no copies);
+- each hash starts from ``copy()`` of a blank hash object and is fed the salt
+  and the password with two ``update`` calls instead of a concatenation;
+- digests stay raw ``bytes``; callers hex-encode only what they serialize.
+
+`scripts/benchmark_hashing_core.py` compares this with the per-item code.
+"""
+import hashlib
+import os
+
+SALT_BYTES = 16  # 128-bit salts
+# Blank hash object to copy() from; never updated, so sharing it between threads is safe
+_SHA256 = hashlib.sha256()
+
+
+def sha256_hex(b: bytes) -> str:
+    return hashlib.sha256(b).hexdigest()
+
+
+def random_salts(count: int, size: int = SALT_BYTES):
+    """Iterator over `count` independent CSPRNG salts: memoryview slices of one ``os.urandom`` buffer.
+
+    Slices are made as they are consumed; a list of them would keep as many
+    GC-tracked memoryview objects alive as the batch is long.
+    """
+    buf = memoryview(os.urandom(count * size))
+    return (buf[i:i + size] for i in range(0, count * size, size))
+
+
+def iter_salts(size: int = SALT_BYTES, chunk: int = 1024):
+    """Endless salts for streams of unknown length, drawn `chunk` at a time."""
+    while True:
+        yield from random_salts(chunk, size)
+
+
+def salted_sha256(salt, raw: bytes) -> bytes:
+    """Raw SHA-256 of ``salt + raw`` without building the concatenation."""
+    h = _SHA256.copy()
+    h.update(salt)
+    h.update(raw)
+    return h.digest()
+
+
+def salted_sha256_many(raw: bytes, salts):
+    """Iterator over raw SHA-256 of ``salt + raw`` for each salt (one password, many users).
+
+    Digests are yielded as they are made, so a caller that only counts or
+    dedupes them never holds the whole list.
+    """
+    base = _SHA256.copy
+    for salt in salts:
+        h = base()
+        h.update(salt)
+        h.update(raw)
+        yield h.digest()
+
+
+def sha256_many(raws) -> list:
+    """Raw unsalted SHA-256 digests of an iterable of bytes."""
+    sha256 = hashlib.sha256
+    return [sha256(raw).digest() for raw in raws]
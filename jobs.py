@@ -0,0 +1,135 @@
+"""Asynchronous hashing jobs for batches too large for one `/api/hash` call.
+
+Jobs live in a purely in-process `JobStore` (no Redis needed). A small pool
+of background workers runs them chunk by chunk through the shared
+`HashEngine`, so progress becomes visible as soon as the first chunk finishes.
+Finished jobs are dropped once they outlive the TTL, or oldest-first when the
+store grows past its size cap.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import AdmissionRejected
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class Job:
+    def __init__(self, passwords, plan):
+        self.id = uuid.uuid4().hex
+        self.passwords = list(passwords)
+        self.total = len(self.passwords)
+        self.plan = plan
+        self.status = QUEUED
+        self.results = []
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def snapshot(self, offset: int = 0, limit: int = 100) -> dict:
+        """Progress plus one page of the results computed so far."""
+        completed = len(self.results)
+        page = self.results[offset:offset + limit]
+        next_offset = offset + len(page)
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'completed': completed,
+            'progress': completed / self.total if self.total else 1.0,
+            'error': self.error,
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset if next_offset < self.total else None,
+            'results': page,
+        }
+
+
+class JobStore:
+    def __init__(self, ttl: float = 3600.0, max_jobs: int = 100):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.is_finished and now - job.finished >= self.ttl:
+                del self._jobs[job_id]
+        # over the cap: drop the oldest finished jobs first
+        for job_id, job in list(self._jobs.items()):
+            if len(self._jobs) < self.max_jobs:
+                break
+            if job.is_finished:
+                del self._jobs[job_id]
+
+    def add(self, job: Job):
+        with self._lock:
+            self._evict()
+            if len(self._jobs) >= self.max_jobs:
+                raise AdmissionRejected(5, 'too many unfinished jobs')
+            self._jobs[job.id] = job
+
+    def get(self, job_id: str):
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+class JobRunner:
+    """Run queued jobs in the background, `chunk_size` passwords at a time."""
+
+    def __init__(self, engine, store: JobStore, admission=None, workers: int = 1, chunk_size: int = 100):
+        self.engine = engine
+        self.store = store
+        self.admission = admission
+        self.chunk_size = max(1, chunk_size)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='hash-job')
+
+    def submit(self, passwords, plan) -> Job:
+        job = Job(passwords, plan)
+        self.store.add(job)
+        self._pool.submit(self._run, job)
+        return job
+
+    def _hash_chunk(self, chunk, plan):
+        if self.admission is None:
+            return self.engine.hash_batch(chunk, plan)
+        while True:
+            try:
+                with self.admission.reserve(self.engine.batch_memory_kib(plan, len(chunk))):
+                    return self.engine.hash_batch(chunk, plan)
+            except AdmissionRejected as e:
+                # background work is never rejected, it just waits its turn
+                time.sleep(e.retry_after)
+
+    def _run(self, job: Job):
+        job.status = RUNNING
+        status = DONE
+        try:
+            for start in range(0, job.total, self.chunk_size):
+                job.results.extend(self._hash_chunk(job.passwords[start:start + self.chunk_size], job.plan))
+        except Exception as e:
+            job.error = str(e)
+            status = FAILED
+        finally:
+            # the plaintext is not needed once hashed; results carry what clients asked for
+            job.passwords = None
+            # set `finished` before the status so eviction never sees a finished job without it
+            job.finished = time.time()
+            job.status = status
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,63 @@
+"""Tuned KDF parameters for this host, as written by `scripts/autotune_kdfs.py`.
+
+The file is JSON with one object per algorithm plus the target it was tuned
+for, e.g.::
+
+    {"target": {"p99_ms": 250, "concurrency": 4, "memory_ceiling_mib": 1024},
+     "argon2": {"time_cost": 3, "memory_cost": 65536, "parallelism": 1, "p99_ms": 212.4},
+     "bcrypt": {"rounds": 12, ...}, "scrypt": {"n": 32768, "r": 8, "p": 1, ...}}
+
+A missing file means "use argon2-cffi's defaults" (and `HashPlan`'s for
+bcrypt/scrypt).
+"""
+import json
+import os
+
+from argon2 import PasswordHasher
+
+ARGON2_KEYS = ('time_cost', 'memory_cost', 'parallelism')
+# config key per algorithm -> `HashPlan` keyword
+PLAN_KEYS = {'bcrypt': {'rounds': 'bcrypt_rounds'},
+             'scrypt': {'n': 'scrypt_n', 'r': 'scrypt_r', 'p': 'scrypt_p'}}
+
+
+def load(path: str) -> dict:
+    """The config at `path`, or {} if there is none.
+
+    A file that exists but is not valid JSON raises ValueError: a server
+    silently falling back to weaker defaults is worse than one that fails to
+    start.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'{path} is not valid JSON: {e}') from e
+    if not isinstance(config, dict):
+        raise ValueError(f'{path} must contain a JSON object')
+    return config
+
+
+def save(path: str, config: dict) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+        f.write('\n')
+    os.replace(tmp, path)
+
+
+def password_hasher(config: dict) -> PasswordHasher:
+    """A PasswordHasher with the tuned Argon2 parameters (library defaults for any not given)."""
+    argon = config.get('argon2') or {}
+    return PasswordHasher(**{k: int(argon[k]) for k in ARGON2_KEYS if k in argon})
+
+
+def plan_defaults(config: dict) -> dict:
+    """`HashPlan` keyword arguments for the tuned bcrypt/scrypt parameters in `config`."""
+    out = {}
+    for algo, keys in PLAN_KEYS.items():
+        tuned = config.get(algo) or {}
+        out.update({kw: int(tuned[k]) for k, kw in keys.items() if k in tuned})
+    return out
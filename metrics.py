@@ -0,0 +1,260 @@
+"""In-process metrics, exported at `/metrics` in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms are sharded per thread: each
+thread updates its own dict without taking a lock, and only a scrape walks
+every shard and adds them up. When a thread exits, its shard is folded into a
+retained total, so the threaded dev server (a thread per request) does not
+grow one shard per request ever served. A scrape that races an update may
+see a histogram's bucket and sum from slightly different moments, which is
+fine for monitoring and keeps the hash loop free of contention.
+"""
+import itertools
+import math
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Per-password hash time: SHA-256 takes about a microsecond, Argon2/scrypt tens to hundreds of ms
+LATENCY_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_str(names, values, extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _ShardOwner:
+    """Lives in a thread's local storage; collected when the thread exits."""
+    __slots__ = ('__weakref__',)
+
+
+class _Metric(ABC):
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            token = next(self._tokens)
+            # the only locks: once per thread when it first touches this metric, and once when it exits
+            with self._lock:
+                self._shards[token] = shard
+            weakref.finalize(owner, self._retire, token)
+            return shard
+
+    def _retire(self, token: int):
+        """Fold a dead thread's shard into the retained totals."""
+        with self._lock:
+            shard = self._shards.pop(token, None)
+            for labels, value in list((shard or {}).items()):
+                base = self._retired.get(labels)
+                # a new object each time, so a scrape holding the old one is unaffected
+                self._retired[labels] = self._combine(base, value) if base is not None else self._copy(value)
+
+    @staticmethod
+    @abstractmethod
+    def _combine(a, b):
+        """Sum of two per-label shard values."""
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def _check(self, labels: tuple):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {labels}')
+
+    def _merged(self) -> dict:
+        with self._lock:
+            shards = list(self._shards.values())
+            retired = dict(self._retired)
+        merged = {labels: [value] for labels, value in retired.items()}
+        for shard in shards:
+            for labels, value in list(shard.items()):
+                merged.setdefault(labels, []).append(value)
+        return merged
+
+    @abstractmethod
+    def samples(self):
+        """``(name, labels, value)`` for each exposition line."""
+
+    def exposition(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines += [f'{name}{labels} {_format_value(value)}' for name, labels, value in self.samples()]
+        return '\n'.join(lines) + '\n'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    @staticmethod
+    def _combine(a, b):
+        return a + b
+
+    def inc(self, amount: float = 1, *labels):
+        try:
+            self._local.shard[labels] += amount
+        except (AttributeError, KeyError):
+            self._check(labels)
+            shard = self._shard()
+            shard[labels] = shard.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return sum(self._merged().get(labels, ()))
+
+    def samples(self):
+        for labels, values in sorted(self._merged().items()):
+            yield self.name, _label_str(self.labelnames, labels), sum(values)
+
+
+class Gauge(Counter):
+    """A counter that can also go down (e.g. requests in flight).
+
+    `inc` and `dec` may run on different threads; the shards still add up.
+    """
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, *labels):
+        self.inc(-amount, *labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._width = len(self.buckets) + 1
+
+    @staticmethod
+    def _combine(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+    def _cells(self, labels: tuple) -> list:
+        self._check(labels)
+        # one slot per bucket, one for +Inf, then the running sum
+        cells = self._shard()[labels] = [0] * self._width + [0.0]
+        return cells
+
+    def observe(self, value: float, *labels):
+        try:
+            cells = self._local.shard[labels]
+        except (AttributeError, KeyError):
+            cells = self._cells(labels)
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def snapshot(self, *labels) -> dict:
+        """Merged, cumulative bucket counts plus count and sum for one label set."""
+        shards = self._merged().get(labels, ())
+        counts = [sum(c[i] for c in shards) for i in range(self._width)]
+        cumulative, total = [], 0
+        for n in counts:
+            total += n
+            cumulative.append(total)
+        return {'buckets': dict(zip(self.buckets + (math.inf,), cumulative)), 'count': total,
+                'sum': sum(c[-1] for c in shards)}
+
+    def samples(self):
+        for labels in sorted(self._merged()):
+            snap = self.snapshot(*labels)
+            for bound, n in snap['buckets'].items():
+                yield f'{self.name}_bucket', _label_str(self.labelnames, labels, f'le="{_format_value(bound)}"'), n
+            yield f'{self.name}_sum', _label_str(self.labelnames, labels), snap['sum']
+            yield f'{self.name}_count', _label_str(self.labelnames, labels), snap['count']
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'metric {metric.name} is already registered')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def exposition(self) -> str:
+        return ''.join(m.exposition() for m in self._metrics.values())
+
+
+class ServerMetrics:
+    """The instruments the Flask app records, on a registry of their own."""
+
+    def __init__(self, registry: Registry = None):
+        self.registry = registry or Registry()
+        r = self.registry
+        self.hash_seconds = r.histogram(
+            'salt_hash_seconds', 'Time to hash one password, by algorithm', ('algorithm',), LATENCY_BUCKETS)
+        self.batch_passwords = r.histogram(
+            'salt_batch_passwords', 'Passwords per request', ('endpoint',), BATCH_BUCKETS)
+        self.request_seconds = r.histogram(
+            'salt_request_duration_seconds', 'Request duration, until the last byte of the response',
+            ('endpoint',), REQUEST_BUCKETS)
+        self.requests = r.counter('salt_requests_total', 'Requests handled', ('endpoint', 'status'))
+        self.errors = r.counter('salt_request_errors_total', 'Requests answered with a 4xx/5xx status',
+                                ('endpoint', 'status'))
+        self.in_flight = r.gauge('salt_requests_in_flight', 'Requests being handled or streamed', ('endpoint',))
+
+    def request_started(self, endpoint: str) -> float:
+        self.in_flight.inc(1, endpoint)
+        return time.perf_counter()
+
+    def request_finished(self, endpoint: str, status: int, started: float):
+        self.in_flight.dec(1, endpoint)
+        self.request_seconds.observe(time.perf_counter() - started, endpoint)
+        self.requests.inc(1, endpoint, str(status))
+        if status >= 400:
+            self.errors.inc(1, endpoint, str(status))
+
+    def exposition(self) -> str:
+        return self.registry.exposition()
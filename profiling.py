@@ -0,0 +1,150 @@
+"""Per-request phase timings (the `Server-Timing` header) and an opt-in profiler.
+
+`RequestTimer` collects how long each phase of a request took, plus the hash
+time per algorithm as reported by `hash_password`'s ``observe`` hook, and
+renders them as a ``Server-Timing`` header that browser dev tools display.
+
+`SlowRequestProfiler` runs cProfile on sampled requests. Profiling is off
+unless configured, at most one request is profiled at a time (cProfile cannot
+nest), starts are rate-limited, and only the slowest `capacity` captures are
+kept, so a burst of profiling requests cannot slow the server or grow memory.
+cProfile follows the request thread only: time spent in the hash pool shows
+up as the wait on its results.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+import uuid
+
+PROFILE_MODES = ('off', 'header', 'all')
+PROFILE_HEADER = 'X-Profile'
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.rows = None
+        self._hash = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def phase(self, name: str):
+        """Context manager that adds the time spent inside it to phase `name`."""
+        return _Phase(self, name)
+
+    def observe(self, seconds: float, algorithm: str):
+        """``observe`` hook for `hash_password`; called from the hash pool's threads."""
+        with self._lock:
+            total, n = self._hash.get(algorithm, (0.0, 0))
+            self._hash[algorithm] = (total + seconds, n + 1)
+
+    def hash_seconds(self) -> dict:
+        """``{algorithm: (seconds, estimated)}``: hash time summed over the request's rows.
+
+        SHA-256-only batches time a sample of rows (see `HashEngine._observers`);
+        once `rows` is known their sum is scaled up to the whole batch.
+        """
+        out = {}
+        with self._lock:
+            items = list(self._hash.items())
+        for algorithm, (total, n) in items:
+            estimated = bool(self.rows) and n < self.rows
+            out[algorithm] = (total * self.rows / n if estimated else total, estimated)
+        return out
+
+    def header(self) -> str:
+        """``Server-Timing`` value: phases in the order they ran, per-algorithm hash time, then the total."""
+        entries = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.phases.items()]
+        for algorithm, (seconds, estimated) in self.hash_seconds().items():
+            desc = 'estimated from sampled rows' if estimated else 'summed over rows'
+            entries.append(f'hash-{algorithm};dur={seconds * 1000:.3f};desc="{desc}"')
+        entries.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.3f}')
+        return ', '.join(entries)
+
+
+class _Phase:
+    def __init__(self, timer: RequestTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class SlowRequestProfiler:
+    """Profile sampled requests and keep the `capacity` slowest captures.
+
+    `mode` is ``off``, ``header`` (only requests sending ``X-Profile: 1``) or
+    ``all``; either way a new profile starts at most `per_minute` times a
+    minute (0 for no limit) and never while another one is running.
+    """
+
+    def __init__(self, mode: str = 'off', capacity: int = 20, per_minute: float = 6.0, top: int = 40):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'profile mode must be one of {", ".join(PROFILE_MODES)}')
+        self.mode = mode
+        self.capacity = max(1, int(capacity))
+        self.min_interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.top = top
+        self.captures = []
+        self.skipped = 0
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._last_start = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+
+    def start(self, headers) -> cProfile.Profile:
+        """A running profiler if this request should be profiled, else None."""
+        if self.mode == 'off' or (self.mode == 'header' and headers.get(PROFILE_HEADER) != '1'):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if self._last_start is not None and now - self._last_start < self.min_interval:
+                self.skipped += 1
+                return None
+            if not self._busy.acquire(blocking=False):
+                self.skipped += 1
+                return None
+            self._last_start = now
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # another profiling tool already owns the interpreter's hooks
+            self._busy.release()
+            return None
+        return prof
+
+    def finish(self, prof: cProfile.Profile, seconds: float, info: dict):
+        """Stop `prof` and keep it if it is among the slowest seen."""
+        prof.disable()
+        self._busy.release()
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats('cumulative').print_stats(self.top)
+        capture = dict(info, id=uuid.uuid4().hex[:12], seconds=seconds, created=time.time(), stats=out.getvalue())
+        with self._lock:
+            self.captures.append(capture)
+            self.captures.sort(key=lambda c: c['seconds'], reverse=True)
+            del self.captures[self.capacity:]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            captures = list(self.captures)
+        return {'mode': self.mode, 'capacity': self.capacity, 'skipped': self.skipped, 'profiles': captures}
+
+    def clear(self):
+        with self._lock:
+            self.captures.clear()
@@ -0,0 +1,237 @@
+"""Real rainbow tables (Oechslin chains) for unsalted SHA-256 over a small keyspace.
+
+Unlike the full hash -> password lookup in `rainbow_index`, a rainbow table
+only stores the first and last point of each chain::
+
+    pw_0 --sha256--> h_0 --R_0--> pw_1 --sha256--> h_1 --R_1--> ... --> pw_t
+
+so a table of ``m`` chains of length ``t`` covers up to ``m * t`` passwords
+while storing ``m`` (start, end) pairs. Lookups pay for that with up to
+``t^2 / 2`` hash + reduce steps and false alarms. Every table uses its own
+family of reduction functions, so several tables cover more of the keyspace
+with fewer merged chains.
+
+The keyspace is every password of exactly ``length`` characters drawn from
+``charset``; passwords are addressed by their index in that space.
+
+Table file layout (little-endian)::
+
+    header   '<8sIIIQH' magic, length, chain_len, table_id, count, charset byte length
+    charset  UTF-8
+    pairs    count * (end: uint64, start: uint64), sorted by end, unique ends
+
+Tables are opened with mmap and searched in place, like the rainbow index.
+"""
+import hashlib
+import mmap
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+MAGIC = b'SALTRCH1'
+HEADER = struct.Struct('<8sIIIQH')
+PAIR = struct.Struct('<QQ')
+_END = struct.Struct('<Q')
+# Spreads the reduction families of different tables apart
+_TABLE_STRIDE = 0x9E3779B97F4A7C15
+# Chain points are stored as uint64 and reduced from 8 digest bytes
+MAX_KEYSPACE = 2 ** 64
+
+
+class Keyspace:
+    """All passwords of `length` characters over `charset`, addressed by index."""
+
+    def __init__(self, charset: str = 'abcdefghijklmnopqrstuvwxyz', length: int = 4):
+        if not charset or length < 1:
+            raise ValueError('charset must be non-empty and length >= 1')
+        size = len(charset) ** length
+        if size > MAX_KEYSPACE:
+            raise ValueError(f'keyspace of {len(charset)}^{length} passwords is larger than 2^64, '
+                             'the most a table can address; use a shorter length or charset')
+        self.charset = charset
+        self.length = length
+        self.size = size
+
+    def password(self, index: int) -> str:
+        base, chars = len(self.charset), []
+        for _ in range(self.length):
+            index, r = divmod(index, base)
+            chars.append(self.charset[r])
+        return ''.join(chars)
+
+    def index(self, password: str) -> int:
+        base, value = len(self.charset), 0
+        for c in reversed(password):
+            value = value * base + self.charset.index(c)
+        return value
+
+    def reduce(self, digest: bytes, position: int, table_id: int) -> int:
+        """R_position for table `table_id`: map a digest back into the keyspace."""
+        return (int.from_bytes(digest[:8], 'little') + position + table_id * _TABLE_STRIDE) % self.size
+
+
+def chain_end(space: Keyspace, start: int, chain_len: int, table_id: int) -> int:
+    index = start
+    sha256, password, reduce = hashlib.sha256, space.password, space.reduce
+    for pos in range(chain_len):
+        index = reduce(sha256(password(index).encode('utf-8')).digest(), pos, table_id)
+    return index
+
+
+def _chain_ends(args):
+    charset, length, chain_len, table_id, starts = args
+    space = Keyspace(charset, length)
+    return [(chain_end(space, s, chain_len, table_id), s) for s in starts]
+
+
+def generate_table(out_path: str, space: Keyspace, chains: int, chain_len: int, table_id: int = 0,
+                   workers: int = None, seed: int = 0) -> dict:
+    """Compute `chains` chains on a process pool and write the sorted table.
+
+    Chains that merge into the same end point are dropped (keeping one), so
+    the stored count can be lower than `chains`. Returns generation stats.
+    """
+    # named seeds keep start points independent of the coverage samples below
+    rng = random.Random(f'starts:{seed}:{table_id}')
+    starts = [rng.randrange(space.size) for _ in range(chains)]
+    workers = workers or os.cpu_count() or 1
+    size = max(1, -(-len(starts) // (workers * 4)))
+    jobs = [(space.charset, space.length, chain_len, table_id, starts[i:i + size]) for i in range(0, len(starts), size)]
+
+    t0 = time.perf_counter()
+    pairs = []
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_chain_ends, jobs):
+                pairs.extend(part)
+    else:
+        for job in jobs:
+            pairs.extend(_chain_ends(job))
+    elapsed = time.perf_counter() - t0
+
+    pairs.sort()
+    unique = []
+    for end, start in pairs:
+        if not unique or unique[-1][0] != end:
+            unique.append((end, start))
+
+    charset = space.charset.encode('utf-8')
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, space.length, chain_len, table_id, len(unique), len(charset)))
+        f.write(charset)
+        for end, start in unique:
+            f.write(PAIR.pack(end, start))
+    os.replace(tmp, out_path)
+    return {
+        'path': out_path,
+        'table_id': table_id,
+        'chains_requested': chains,
+        'chains_stored': len(unique),
+        'chain_len': chain_len,
+        'seconds': elapsed,
+        'hashes_per_sec': chains * chain_len / elapsed if elapsed else 0.0,
+        'bytes': os.path.getsize(out_path),
+    }
+
+
+class RainbowTable:
+    """One mmap-ed chain table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, length, self.chain_len, self.table_id, self.count, cs_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f'{path} is not a rainbow chain table')
+        charset = self._mm[HEADER.size:HEADER.size + cs_len].decode('utf-8')
+        self.space = Keyspace(charset, length)
+        self._pairs = HEADER.size + cs_len
+
+    def __len__(self):
+        return self.count
+
+    def start_for_end(self, end: int):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = _END.unpack_from(self._mm, self._pairs + mid * PAIR.size)[0]
+            if probe < end:
+                lo = mid + 1
+            elif probe > end:
+                hi = mid
+            else:
+                return PAIR.unpack_from(self._mm, self._pairs + mid * PAIR.size)[1]
+        return None
+
+    def lookup(self, digest: bytes, stats: dict = None):
+        """Password whose SHA-256 is `digest` if it lies on one of this table's chains."""
+        space, t, tid = self.space, self.chain_len, self.table_id
+        sha256 = hashlib.sha256
+        # guess that `digest` sits at column `pos`, walk to the end, look the end up
+        for pos in range(t - 1, -1, -1):
+            index = space.reduce(digest, pos, tid)
+            for i in range(pos + 1, t):
+                index = space.reduce(sha256(space.password(index).encode('utf-8')).digest(), i, tid)
+            start = self.start_for_end(index)
+            if start is None:
+                continue
+            # rebuild the chain from its start up to column `pos`
+            index = start
+            for i in range(pos):
+                index = space.reduce(sha256(space.password(index).encode('utf-8')).digest(), i, tid)
+            candidate = space.password(index)
+            if sha256(candidate.encode('utf-8')).digest() == digest:
+                return candidate
+            if stats is not None:
+                stats['false_alarms'] = stats.get('false_alarms', 0) + 1
+        return None
+
+    def close(self):
+        self._mm.close()
+
+
+class RainbowTableSet:
+    """Several tables over the same keyspace, searched one after another."""
+
+    def __init__(self, paths):
+        self.tables = [RainbowTable(p) for p in paths]
+
+    def lookup(self, digest: bytes, stats: dict = None):
+        for table in self.tables:
+            found = table.lookup(digest, stats)
+            if found is not None:
+                return found
+        return None
+
+    @property
+    def bytes(self) -> int:
+        return sum(os.path.getsize(t.path) for t in self.tables)
+
+    def measure_coverage(self, samples: int = 200, seed: int = 1) -> dict:
+        """Crack `samples` random keyspace passwords and report hit rate and lookup time."""
+        space = self.tables[0].space
+        rng = random.Random(f'coverage:{seed}')
+        hits, stats = 0, {}
+        t0 = time.perf_counter()
+        for _ in range(samples):
+            pw = space.password(rng.randrange(space.size))
+            if self.lookup(hashlib.sha256(pw.encode('utf-8')).digest(), stats) == pw:
+                hits += 1
+        elapsed = time.perf_counter() - t0
+        return {
+            'samples': samples,
+            'coverage': hits / samples if samples else 0.0,
+            'avg_lookup_ms': elapsed / samples * 1000 if samples else 0.0,
+            'false_alarms': stats.get('false_alarms', 0),
+            'table_bytes': self.bytes,
+            'keyspace': space.size,
+        }
+
+    def close(self):
+        for t in self.tables:
+            t.close()
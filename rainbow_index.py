@@ -0,0 +1,167 @@
+"""On-disk, memory-mapped rainbow index: unsalted SHA-256 digest -> password.
+
+File layout (all integers little-endian)::
+
+    magic    8 bytes   b'SALTRIX1'
+    count    uint64
+    digests  count * 32 bytes, sorted ascending, unique
+    offsets  (count + 1) * uint64, byte offsets into `blob`
+    blob     UTF-8 passwords, concatenated in digest order
+
+Opening an index only maps the file, so startup is O(1) whatever the size and
+the pages are shared between every process that maps the same file. Lookups
+are a binary search over the digest array (O(log n)).
+
+Building sorts in bounded runs spilled to temporary files and merges them, so
+wordlists larger than RAM can be indexed.
+"""
+import hashlib
+import heapq
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+MAGIC = b'SALTRIX1'
+HEADER = struct.Struct('<8sQ')
+DIGEST_SIZE = 32
+_OFFSET = struct.Struct('<Q')
+_RUN_RECORD = struct.Struct('<32sI')
+
+
+def _write_run(entries, tmpdir):
+    entries.sort()
+    fd, path = tempfile.mkstemp(dir=tmpdir, suffix='.run')
+    with os.fdopen(fd, 'wb') as f:
+        for digest, raw in entries:
+            f.write(_RUN_RECORD.pack(digest, len(raw)))
+            f.write(raw)
+    return path
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            head = f.read(_RUN_RECORD.size)
+            if not head:
+                return
+            digest, n = _RUN_RECORD.unpack(head)
+            yield digest, f.read(n)
+
+
+def build_index(passwords, out_path: str, run_size: int = 1_000_000) -> int:
+    """Write an index for an iterable of passwords; returns the number of unique entries.
+
+    At most `run_size` entries are held in memory at a time.
+    """
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmpdir:
+        runs, entries = [], []
+        for pw in passwords:
+            raw = pw.encode('utf-8')
+            entries.append((hashlib.sha256(raw).digest(), raw))
+            if len(entries) >= run_size:
+                runs.append(_write_run(entries, tmpdir))
+                entries = []
+        if entries or not runs:
+            runs.append(_write_run(entries, tmpdir))
+
+        # merge the sorted runs into three section files, dropping duplicate digests
+        digests_path = os.path.join(tmpdir, 'digests')
+        offsets_path = os.path.join(tmpdir, 'offsets')
+        blob_path = os.path.join(tmpdir, 'blob')
+        count = offset = 0
+        last = None
+        with open(digests_path, 'wb') as df, open(offsets_path, 'wb') as of, open(blob_path, 'wb') as bf:
+            of.write(_OFFSET.pack(0))
+            for digest, raw in heapq.merge(*(_read_run(p) for p in runs)):
+                if digest == last:
+                    continue
+                last = digest
+                df.write(digest)
+                bf.write(raw)
+                offset += len(raw)
+                of.write(_OFFSET.pack(offset))
+                count += 1
+
+        tmp_out = os.path.join(tmpdir, 'index')
+        with open(tmp_out, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, count))
+            for section in (digests_path, offsets_path, blob_path):
+                with open(section, 'rb') as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_out, out_path)
+    return count
+
+
+class RainbowIndex:
+    """Read-only view of an index file; supports `digest in index` and lookups."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f'{path} is not a rainbow index')
+        self._digests = HEADER.size
+        self._offsets = self._digests + self.count * DIGEST_SIZE
+        self._blob = self._offsets + (self.count + 1) * _OFFSET.size
+
+    def __len__(self):
+        return self.count
+
+    # Pickle by path: a worker process re-maps the file and shares its pages
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _find(self, digest: bytes) -> int:
+        """Position of `digest` in the sorted array, or -1."""
+        mm, base = self._mm, self._digests
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + mid * DIGEST_SIZE
+            probe = mm[start:start + DIGEST_SIZE]
+            if probe < digest:
+                lo = mid + 1
+            elif probe > digest:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return self._find(digest) >= 0
+
+    def password_at(self, i: int) -> str:
+        start, end = struct.unpack_from('<QQ', self._mm, self._offsets + i * _OFFSET.size)
+        return self._mm[self._blob + start:self._blob + end].decode('utf-8')
+
+    def lookup(self, digest: bytes):
+        """Password whose unsalted SHA-256 is `digest`, or None."""
+        i = self._find(digest)
+        return self.password_at(i) if i >= 0 else None
+
+    def lookup_hex(self, hex_digest: str):
+        try:
+            digest = bytes.fromhex(hex_digest)
+        except (TypeError, ValueError):
+            return None
+        if len(digest) != DIGEST_SIZE:
+            return None
+        return self.lookup(digest)
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Pick the strongest KDF parameters that meet a p99 latency target on this host.
+
+Usage examples:
+  python scripts/autotune_kdfs.py --target-p99-ms 250 --concurrency 4 --memory-ceiling-mib 1024
+  python scripts/autotune_kdfs.py --algorithms argon2 --out data/kdf_config.json --json
+
+Latency is measured with `concurrency` hashes in flight at once (the expected
+number of simultaneous logins), since that is what a user waits for at peak.
+Cost only ever grows with each parameter, so each search walks upwards and
+stops at the first setting that misses the target:
+
+- Argon2: memory first (doubling, while `memory_cost x concurrency` fits under
+  the ceiling), then time_cost at that memory, as RFC 9106 recommends;
+- bcrypt: rounds;
+- scrypt: N (doubling, while `128 * N * r x concurrency` fits).
+
+The result is written as JSON (see `kdf_config.py`); the server builds its
+PasswordHasher from the file named by KDF_CONFIG (default data/kdf_config.json).
+Limits match the server's ceilings for client-supplied parameters.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+# Make the top-level modules (e.g. `kdf_config`) importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import kdf_config  # noqa: E402
+from hash_engine import ARGON2_LIMITS, BCRYPT_LIMITS, SCRYPT_LIMITS, SCRYPT_MAX_MEM  # noqa: E402
+from scripts.benchmark_kdfs import bench_argon, bench_bcrypt, bench_scrypt, bcrypt, host_info  # noqa: E402
+
+
+def climb(candidates, probe, target_s):
+    """Walk `candidates` (weakest first) until one misses `target_s` at p99.
+
+    Returns (best, stats, trials). If even the first candidate misses, it is
+    returned anyway so the caller still gets a setting; `meets_target` in its
+    stats says so.
+    """
+    best = best_stats = None
+    trials = []
+    for cand in candidates:
+        stats = probe(cand)
+        ok = stats['p99'] <= target_s
+        trials.append({'params': cand, 'p99_ms': stats['p99'] * 1000, 'meets_target': ok})
+        print(f"  {', '.join(f'{k}={v}' for k, v in cand.items())}: p99 {stats['p99'] * 1000:.1f} ms"
+              f"{'' if ok else '  (over target)'}")
+        if not ok:
+            if best is None:
+                best, best_stats = cand, stats
+            break
+        best, best_stats = cand, stats
+    if best is not None:
+        best_stats = dict(best_stats, meets_target=best_stats['p99'] <= target_s)
+    return best, best_stats, trials
+
+
+def powers_of_two(lo, hi):
+    v = 1
+    while v < lo:
+        v *= 2
+    while v <= hi:
+        yield v
+        v *= 2
+
+
+def tune_argon(args, target_s):
+    par = args.argon_par
+    ceiling_kib = args.memory_ceiling_mib * 1024 // args.concurrency
+    top = min(ARGON2_LIMITS['memory_cost'][1], ceiling_kib)
+    mems = [m for m in powers_of_two(max(1024, 8 * par), top)]
+    if not mems:
+        raise ValueError(f'memory ceiling leaves {ceiling_kib} KiB per login, below Argon2\'s minimum')
+
+    def probe(c):
+        return bench_argon(args.password, c['time_cost'], c['memory_cost'], c['parallelism'],
+                           repeats=args.repeats, warmup=1, concurrency=args.concurrency)
+
+    best, stats, trials = climb([{'time_cost': 1, 'memory_cost': m, 'parallelism': par} for m in mems],
+                                probe, target_s)
+    if stats['meets_target']:
+        lo, hi = ARGON2_LIMITS['time_cost']
+        more, more_stats, more_trials = climb(
+            [dict(best, time_cost=t) for t in range(lo + 1, hi + 1)], probe, target_s)
+        trials += more_trials
+        if more_stats and more_stats['meets_target']:
+            best, stats = more, more_stats
+    return best, stats, trials
+
+
+def tune_bcrypt(args, target_s):
+    lo, hi = BCRYPT_LIMITS['rounds']
+
+    def probe(c):
+        return bench_bcrypt(args.password, c['rounds'], repeats=args.repeats, warmup=1, concurrency=args.concurrency)
+
+    return climb([{'rounds': r} for r in range(lo, hi + 1)], probe, target_s)
+
+
+def tune_scrypt(args, target_s):
+    r = args.scrypt_r
+    per_login = args.memory_ceiling_mib * 1024 * 1024 // args.concurrency
+    top = min(SCRYPT_LIMITS['n'][1], min(per_login, SCRYPT_MAX_MEM) // (128 * r))
+    ns = list(powers_of_two(1024, top))
+    if not ns:
+        raise ValueError(f'memory ceiling leaves {per_login} bytes per login, too little for scrypt with r={r}')
+
+    def probe(c):
+        return bench_scrypt(args.password, c['n'], c['r'], c['p'], repeats=args.repeats, warmup=1,
+                            concurrency=args.concurrency)
+
+    return climb([{'n': n, 'r': r, 'p': 1} for n in ns], probe, target_s)
+
+
+TUNERS = {'argon2': tune_argon, 'bcrypt': tune_bcrypt, 'scrypt': tune_scrypt}
+
+
+def autotune(args):
+    target_s = args.target_p99_ms / 1000
+    config = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': host_info(),
+        'target': {'p99_ms': args.target_p99_ms, 'concurrency': args.concurrency,
+                   'memory_ceiling_mib': args.memory_ceiling_mib},
+    }
+    for algo in args.algorithms:
+        if algo == 'bcrypt' and bcrypt is None:
+            print('bcrypt not available; skipping bcrypt (install `bcrypt` to enable)')
+            continue
+        print(f'Tuning {algo} for p99 <= {args.target_p99_ms:g} ms at {args.concurrency} concurrent logins...')
+        best, stats, trials = TUNERS[algo](args, target_s)
+        config[algo] = dict(best, p99_ms=stats['p99'] * 1000, median_ms=stats['median'] * 1000,
+                            hashes_per_sec=args.concurrency / stats['avg'] if stats['avg'] else 0.0,
+                            meets_target=stats['meets_target'], trials=trials)
+        note = '' if stats['meets_target'] else ' (weakest setting tried; still over target)'
+        print(f"  -> {', '.join(f'{k}={v}' for k, v in best.items())}{note}")
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--password', '-p', default='demoPass123!')
+    parser.add_argument('--algorithms', '-a', nargs='+', choices=sorted(TUNERS), default=['argon2', 'bcrypt', 'scrypt'])
+    parser.add_argument('--target-p99-ms', type=float, default=250.0, help='p99 latency budget per hash')
+    parser.add_argument('--concurrency', '-c', type=int, default=4, help='Expected concurrent logins')
+    parser.add_argument('--memory-ceiling-mib', type=int, default=1024,
+                        help='KDF memory available to all concurrent logins together')
+    parser.add_argument('--argon-par', type=int, default=1, help='Argon2 lanes (kept fixed)')
+    parser.add_argument('--scrypt-r', type=int, default=8, help='scrypt block size (kept fixed)')
+    parser.add_argument('--repeats', '-r', type=int, default=10, help='Timed samples per thread per setting')
+    parser.add_argument('--out', '-o', default='data/kdf_config.json')
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.memory_ceiling_mib < 1:
+        parser.error('--concurrency and --memory-ceiling-mib must be positive')
+
+    try:
+        config = autotune(args)
+    except ValueError as e:
+        parser.error(str(e))
+    kdf_config.save(args.out, config)
+    print('Wrote', args.out)
+    if args.json:
+        print(json.dumps(config, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""On-disk cache of KDF benchmark results, plus cached parameter sweeps.
+
+A per-hash time only depends on the algorithm, its parameters and the machine,
+so `plot_kdf_cracktime.py` can re-plot for another entropy (just a multiplier)
+without measuring again. Entries are keyed by (algorithm, params, host
+fingerprint); the fingerprint covers the CPU, interpreter and hashing library
+versions, so upgrading any of them misses the cache instead of reusing stale
+numbers. Entries also expire after `max_age` seconds, and the least recently
+used ones are evicted once there are more than `max_entries`.
+
+The cache is a single JSON file written atomically; it is not meant to be
+shared by processes running at the same time (the last writer wins).
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts import benchmark_kdfs
+from scripts.benchmark_kdfs import bench_argon, bench_bcrypt, bench_scrypt, host_info, run_isolated
+
+BENCH = {'argon2': bench_argon, 'bcrypt': bench_bcrypt, 'scrypt': bench_scrypt}
+# Bound by memory bandwidth: points measured side by side slow each other down whatever the core count
+MEMORY_HARD = ('argon2', 'scrypt')
+# host_info() fields that affect timings; hostname and kernel build do not
+FINGERPRINT_KEYS = ('machine', 'processor', 'cpu_count', 'python', 'openssl', 'argon2-cffi', 'bcrypt')
+DEFAULT_PATH = os.path.join('bench_results', 'cache.json')
+
+
+def host_fingerprint(info: dict = None) -> str:
+    info = info or host_info()
+    raw = json.dumps({k: info.get(k) for k in FINGERPRINT_KEYS}, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class BenchCache:
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = 1000, max_age: float = 7 * 86400,
+                 fingerprint: str = None):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.max_age = max_age
+        self.fingerprint = fingerprint or host_fingerprint()
+        self.hits = self.misses = 0
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.entries = json.load(f).get('entries', {})
+            except (ValueError, AttributeError):
+                # a corrupt cache is only a cache: start over
+                self.entries = {}
+
+    def key(self, algorithm: str, params: dict, repeats: int) -> str:
+        raw = json.dumps([algorithm, params, repeats, self.fingerprint], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, algorithm: str, params: dict, repeats: int):
+        k = self.key(algorithm, params, repeats)
+        entry = self.entries.get(k)
+        if entry is None or time.time() - entry['created'] > self.max_age:
+            self.entries.pop(k, None)
+            self.misses += 1
+            return None
+        entry['used'] = time.time()
+        self.hits += 1
+        return entry['stats']
+
+    def put(self, algorithm: str, params: dict, repeats: int, stats: dict) -> None:
+        now = time.time()
+        self.entries[self.key(algorithm, params, repeats)] = {
+            'algorithm': algorithm, 'params': params, 'repeats': repeats, 'host': self.fingerprint,
+            'stats': stats, 'created': now, 'used': now}
+        if len(self.entries) > self.max_entries:
+            by_use = sorted(self.entries, key=lambda k: self.entries[k]['used'])
+            for k in by_use[:len(self.entries) - self.max_entries]:
+                del self.entries[k]
+
+    def clear(self) -> None:
+        self.entries = {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': self.entries}, f)
+        os.replace(tmp, self.path)
+
+
+def default_jobs(lanes: int = 1) -> int:
+    """Sweep points to measure at once without them competing for cores.
+
+    Each KDF call keeps `lanes` cores busy (Argon2 parallelism, scrypt p), so
+    only cpu_count // lanes points can run side by side without skewing each
+    other's timings; on a single core that means strictly one at a time.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, lanes))
+
+
+def _isolated_bench(algorithm):
+    if (algorithm == 'argon2' and benchmark_kdfs.PasswordHasher is None) or (
+            algorithm == 'bcrypt' and benchmark_kdfs.bcrypt is None):
+        return lambda password, repeats=3, **params: None
+
+    def bench(password, repeats=3, **params):
+        res = run_isolated(algorithm, params, password, repeats, workers=())
+        return dict(res['latency'], resources=res.get('resources'))
+    return bench
+
+
+def sweep(algorithm: str, grid, password: str = 'demo', cache: BenchCache = None, jobs: int = 1, repeats: int = 3,
+          bench=None, isolate: bool = False):
+    """Benchmark stats (or None if unavailable) for every params dict in `grid`, in order.
+
+    Cached points are returned as is; the rest are measured and added to the
+    cache. bcrypt points run up to `jobs` at a time (the KDFs release the GIL,
+    so threads run them on separate cores); memory-hard algorithms always run
+    one point at a time, since concurrent points would share memory bandwidth
+    and inflate each other's timings. With `isolate`, each point runs in its own
+    subprocess and its stats carry peak RSS / CPU `resources`; cached points
+    measured without them count as misses.
+    """
+    bench = bench or (_isolated_bench(algorithm) if isolate else BENCH[algorithm])
+    grid = list(grid)
+    results = [cache.get(algorithm, p, repeats) if cache else None for p in grid]
+    if isolate:
+        results = [res if res and res.get('resources') else None for res in results]
+    todo = [i for i, res in enumerate(results) if res is None]
+    if algorithm in MEMORY_HARD:
+        jobs = 1
+
+    def run(i):
+        return bench(password, repeats=repeats, **grid[i])
+
+    if jobs > 1 and len(todo) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            measured = list(pool.map(run, todo))
+    else:
+        measured = [run(i) for i in todo]
+    for i, res in zip(todo, measured):
+        results[i] = res
+        if cache is not None and res is not None:
+            cache.put(algorithm, grid[i], repeats, res)
+    return results
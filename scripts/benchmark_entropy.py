@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Compare the batch entropy/crack-time estimator with the original per-password loop.
+
+Usage examples:
+  python scripts/benchmark_entropy.py --passwords 1000000
+  python scripts/benchmark_entropy.py -n 200000 --json
+
+Both paths run over the same synthetic list; the script checks that they
+agree before reporting passwords/sec and the speedup.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import string
+import sys
+import time
+
+# Make `scripts.simulate` importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from scripts.simulate import crack_times_batch, estimate_entropy_bits_batch  # noqa: E402
+
+
+def legacy_entropy_bits(password):
+    """The estimator as it was before the batch version: four scans per password."""
+    if not password:
+        return 0
+    charset = 0
+    if any(c.islower() for c in password):
+        charset += 26
+    if any(c.isupper() for c in password):
+        charset += 26
+    if any(c.isdigit() for c in password):
+        charset += 10
+    if any(not c.isalnum() for c in password):
+        charset += 32
+    if charset == 0:
+        charset = 26
+    return int(round(math.log2(charset) * len(password)))
+
+
+def legacy(passwords, speeds):
+    entropies = [legacy_entropy_bits(pw) for pw in passwords]
+    times = [{str(int(s)): (2 ** e if e > 0 else 1) / float(s) for s in speeds} for e in entropies]
+    return entropies, times
+
+
+def batch(passwords, speeds):
+    entropies = estimate_entropy_bits_batch(passwords)
+    return entropies, crack_times_batch(entropies, speeds)
+
+
+def synthetic(n, seed=1):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + '!@#$%'
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(6, 16))) for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--passwords', '-n', type=int, default=1_000_000)
+    parser.add_argument('--speeds', type=float, nargs='+', default=[1e7, 1e9])
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    args = parser.parse_args()
+
+    passwords = synthetic(args.passwords)
+    out = {'passwords': args.passwords, 'speeds': args.speeds, 'runs': []}
+    results = {}
+    for name, fn in (('legacy', legacy), ('batch', batch)):
+        t0 = time.perf_counter()
+        results[name] = fn(passwords, args.speeds)
+        elapsed = time.perf_counter() - t0
+        out['runs'].append({'estimator': name, 'seconds': elapsed,
+                            'passwords_per_sec': args.passwords / elapsed if elapsed else 0.0})
+
+    old_entropy, old_times = results['legacy']
+    new_entropy, new_times = results['batch']
+    assert old_entropy == new_entropy, 'entropy estimates differ'
+    for key, column in new_times.items():
+        assert column == [t[key] for t in old_times], f'crack times differ at speed {key}'
+
+    base = out['runs'][0]['seconds']
+    for run in out['runs']:
+        run['speedup'] = base / run['seconds'] if run['seconds'] else 0.0
+        print(f"{run['estimator']:<7} {run['seconds']:8.3f}s  {run['passwords_per_sec']:12,.0f} passwords/s  "
+              f"speedup x{run['speedup']:.1f}")
+    if args.json:
+        print(json.dumps(out, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Measure `/api/hash` (or `/api/verify`) batch throughput as the worker pool grows from 1 to N.
+
+Usage examples:
+  python scripts/benchmark_hash_engine.py --passwords 200
+  python scripts/benchmark_hash_engine.py --max-workers 8 --argon-mem 65536 --json
+  python scripts/benchmark_hash_engine.py --verify
+
+Each run hashes (or, with --verify, verifies) the same synthetic batch through
+`HashEngine` and reports items/sec and the speedup over a single worker.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Make the top-level modules (e.g. `hash_engine`) importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from argon2 import PasswordHasher  # noqa: E402
+
+from hash_engine import HashEngine, default_workers  # noqa: E402
+
+
+def run_batch(engine, passwords):
+    t0 = time.perf_counter()
+    engine.hash_batch(passwords)
+    return time.perf_counter() - t0
+
+
+def run_verify(engine, items):
+    t0 = time.perf_counter()
+    engine.verify_batch(items)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--passwords', '-n', type=int, default=100, help='Batch size')
+    parser.add_argument('--max-workers', type=int, default=default_workers())
+    parser.add_argument('--argon-time', type=int, default=1)
+    parser.add_argument('--argon-mem', type=int, default=32768, help='Argon2 memory in KB')
+    parser.add_argument('--argon-par', type=int, default=1)
+    parser.add_argument('--verify', action='store_true', help='Benchmark verification of Argon2 hashes instead')
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    args = parser.parse_args()
+
+    passwords = [f'benchPass{i}!' for i in range(args.passwords)]
+    ph = PasswordHasher(time_cost=args.argon_time, memory_cost=args.argon_mem, parallelism=args.argon_par)
+    mode = 'verify' if args.verify else 'hash'
+    unit = 'verifies' if args.verify else 'hashes'
+    if args.verify:
+        encoded = HashEngine(ph).hash_batch(passwords)
+        items = [{'password': r['password'], 'hash': r['argon2_hash']} for r in encoded]
+
+    out = {'mode': mode, 'batch_size': args.passwords, 'cpu_count': os.cpu_count(), 'runs': []}
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        engine = HashEngine(ph, workers=workers)
+        try:
+            # warm the pool so thread start-up is not part of the measurement
+            engine.hash_batch(passwords[:workers])
+            elapsed = run_verify(engine, items) if args.verify else run_batch(engine, passwords)
+        finally:
+            engine.shutdown()
+        rate = len(passwords) / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        run = {'workers': workers, 'seconds': elapsed, f'{unit}_per_sec': rate,
+               'speedup': rate / baseline if baseline else 0.0}
+        out['runs'].append(run)
+        print(f"workers={workers:<3} {elapsed:8.3f}s  {rate:9.1f} {unit}/s  speedup x{run['speedup']:.2f}")
+
+    if args.json:
+        print(json.dumps(out, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Compare `/api/hash` response encodings: size, serialize time and parse time.
+
+Usage examples:
+  python scripts/benchmark_hash_formats.py --passwords 10000
+  python scripts/benchmark_hash_formats.py -n 10000 --algorithms sha256 salted_sha256 --json
+
+The batch is hashed once as the JSON path sees it (hex strings) and once as
+the compact paths see it (raw bytes, `hash_password(..., binary=True)`); only
+encoding and decoding are timed. The baseline is the current `jsonify` path.
+MessagePack is included when `msgpack` is installed.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+# Make the top-level modules (e.g. `hash_codec`) importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from flask import jsonify  # noqa: E402
+
+import hash_codec  # noqa: E402
+from app import GZIP_LEVEL, app  # noqa: E402
+from hash_engine import HashEngine  # noqa: E402
+
+
+def best_of(repeats, fn, *args):
+    best, result = None, None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def jsonify_body(rows):
+    with app.app_context():
+        return jsonify(rows).get_data()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--passwords', '-n', type=int, default=10000, help='Batch size')
+    parser.add_argument('--algorithms', '-a', nargs='+', default=['sha256', 'salted_sha256', 'argon2'])
+    parser.add_argument('--repeats', '-r', type=int, default=5, help='Best of this many runs')
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    args = parser.parse_args()
+
+    # minimal Argon2 cost: the encodings, not the KDF, are being measured
+    params = {'argon2': {'time_cost': 1, 'memory_cost': 8, 'parallelism': 1}, 'scrypt': {'n': 16, 'r': 1, 'p': 1}}
+    engine = HashEngine()
+    try:
+        plan = engine.plan(args.algorithms, params)
+        passwords = [f'benchPass{i}!' for i in range(args.passwords)]
+        hex_rows = engine.hash_batch(passwords, plan)
+        bin_rows = engine.hash_batch(passwords, plan, binary=True)
+    finally:
+        engine.shutdown()
+
+    formats = [
+        ('jsonify', jsonify_body, hex_rows, json.loads),
+        ('json+gzip', lambda rows: gzip.compress(jsonify_body(rows), compresslevel=GZIP_LEVEL), hex_rows,
+         lambda body: json.loads(gzip.decompress(body))),
+        ('frames', lambda rows: hash_codec.encode_frames(rows, plan.algorithms), bin_rows, hash_codec.decode_frames),
+    ]
+    if hash_codec.msgpack is not None:
+        formats.append(('msgpack', hash_codec.encode_msgpack, bin_rows, hash_codec.decode_msgpack))
+    else:
+        print('msgpack not installed; skipping MessagePack')
+
+    out = {'passwords': args.passwords, 'algorithms': list(plan.algorithms), 'runs': []}
+    base = None
+    for name, encode, rows, decode in formats:
+        enc_s, body = best_of(args.repeats, encode, rows)
+        dec_s, _ = best_of(args.repeats, decode, body)
+        base = base or {'bytes': len(body), 'seconds': enc_s + dec_s}
+        run = {'format': name, 'bytes': len(body), 'serialize_sec': enc_s, 'parse_sec': dec_s,
+               'size_ratio': len(body) / base['bytes'],
+               'speedup': base['seconds'] / (enc_s + dec_s) if enc_s + dec_s else 0.0}
+        out['runs'].append(run)
+        print(f"{name:<10} {len(body):>11,} bytes ({run['size_ratio']:5.0%})  serialize {enc_s * 1000:8.2f} ms  "
+              f"parse {dec_s * 1000:8.2f} ms  speedup x{run['speedup']:.2f}")
+
+    if args.json:
+        print(json.dumps(out, indent=2))
+
+
+if __name__ == '__main__':
+    main()
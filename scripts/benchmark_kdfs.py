@@ -1,19 +1,37 @@
 #!/usr/bin/env python3
-"""Benchmark basic KDFs (Argon2, bcrypt, scrypt) with demo-friendly params.
+"""Benchmark basic KDFs (Argon2, bcrypt, scrypt) and SHA-256 with demo-friendly params.
 
 Usage examples:
   python scripts/benchmark_kdfs.py --password demoPass
-  python scripts/benchmark_kdfs.py --argon-time 2 --argon-mem 32768
+  python scripts/benchmark_kdfs.py --argon-time 2 --argon-mem 32768 --repeats 30 --max-workers 8
+  python scripts/benchmark_kdfs.py --algorithms argon2 scrypt --out bench_results/today.json
+  python scripts/benchmark_kdfs.py --compare bench_results/before.json bench_results/after.json
+
+Each algorithm is warmed up, then timed `--repeats` times for latency
+(median, p95, p99 and a confidence interval for the mean), then run at 1..N
+concurrent threads for throughput (hashes/sec). Each configuration runs in its
+own subprocess (unless `--no-isolate`) that also records peak RSS, user/sys
+CPU time and an estimated memory bandwidth. Every run writes a results
+file tagged with host information; `--compare` flags throughput regressions
+between two such files and exits non-zero if there are any.
 
 This script is intended for demos/teaching and uses low-cost defaults so it runs
 quickly in CI; do not use shown parameters for production.
 """
 import argparse
+import hashlib
 import json
-import time
+import math
 import os
+import platform
+import ssl
+import statistics
+import subprocess
 import sys
-import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 try:
     from argon2 import PasswordHasher
@@ -25,48 +43,350 @@ try:
 except Exception:
     bcrypt = None
 
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+ALGORITHMS = ('argon2', 'bcrypt', 'scrypt', 'sha256')
+# Two-sided 95% Student t critical values by degrees of freedom; 1.96 beyond the table
+_T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145,
+        2.131, 2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048,
+        2.045, 2.042]
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated percentile (0 <= q <= 100) of an already sorted list."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
 
-def measure(func, repeats=3):
+
+def mean_ci95(values):
+    """(low, high) 95% confidence interval for the mean of `values` (Student t)."""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, mean
+    t = _T95[n - 2] if n - 2 < len(_T95) else 1.96
+    half = t * statistics.stdev(values) / math.sqrt(n)
+    return mean - half, mean + half
+
+
+def summarize(times):
+    ordered = sorted(times)
+    low, high = mean_ci95(times)
+    return {
+        'min': ordered[0], 'avg': sum(times) / len(times), 'max': ordered[-1],
+        'median': percentile(ordered, 50), 'p95': percentile(ordered, 95), 'p99': percentile(ordered, 99),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'ci95': [low, high], 'samples': len(times),
+    }
+
+
+def _sample(func, repeats, number):
     times = []
     for _ in range(repeats):
         t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - t0) / number)
+    return times
+
+
+def measure(func, repeats=3, warmup=1, number=1, concurrency=1):
+    """Per-call latency stats in seconds over `repeats` timed samples.
+
+    `warmup` untimed calls come first (allocator, caches, lazy imports). Each
+    sample times `number` back-to-back calls, for functions too fast to time
+    one by one. With `concurrency` > 1 that many threads sample at once (each
+    taking `repeats` samples), i.e. latency as seen under concurrent load.
+    """
+    for _ in range(warmup):
         func()
-        t1 = time.perf_counter()
-        times.append(t1 - t0)
-    return {"min": min(times), "avg": sum(times) / len(times), "max": max(times)}
+    if concurrency <= 1:
+        return summarize(_sample(func, repeats, number))
+    start = threading.Barrier(concurrency)
 
+    def run():
+        start.wait()
+        return _sample(func, repeats, number)
 
-def bench_argon(password, time_cost=1, memory_cost=32768, parallelism=1):
-    if PasswordHasher is None:
-        return None
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run) for _ in range(concurrency)]
+        return summarize([t for f in futures for t in f.result()])
+
+
+def throughput(func, workers, calls, number=1):
+    """Hashes/sec with `workers` threads running `calls` calls (of `number` hashes) between them.
+
+    argon2-cffi, bcrypt and hashlib.scrypt release the GIL while hashing, so
+    threads scale with cores; SHA-256 on short inputs mostly holds it.
+    """
+    calls = max(calls, workers)
+    start = threading.Barrier(workers + 1)
+    per_worker = [calls // workers + (1 if i < calls % workers else 0) for i in range(workers)]
+
+    def run(n):
+        start.wait()
+        for _ in range(n):
+            for _ in range(number):
+                func()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, n) for n in per_worker]
+        start.wait()
+        t0 = time.perf_counter()
+        for f in futures:
+            f.result()
+        elapsed = time.perf_counter() - t0
+    return calls * number / elapsed if elapsed else 0.0
+
+
+def argon_fn(password, time_cost=1, memory_cost=32768, parallelism=1):
     ph = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
-    def f():
-        ph.hash(password)
-    return measure(f)
+    return lambda: ph.hash(password)
 
 
-def bench_bcrypt(password, rounds=10):
-    if bcrypt is None:
-        return None
+def bcrypt_fn(password, rounds=10):
     pw = password.encode('utf-8')
-    def f():
-        salt = bcrypt.gensalt(rounds)
-        bcrypt.hashpw(pw, salt)
-    return measure(f)
+    return lambda: bcrypt.hashpw(pw, bcrypt.gensalt(rounds))
 
 
-def bench_scrypt(password, n=16384, r=8, p=1, dklen=32):
+def scrypt_fn(password, n=16384, r=8, p=1, dklen=32):
     pw = password.encode('utf-8')
     salt = os.urandom(16)
-    def f():
-        hashlib.scrypt(pw, salt=salt, n=n, r=r, p=p, dklen=dklen)
-    return measure(f)
+    return lambda: hashlib.scrypt(pw, salt=salt, n=n, r=r, p=p, dklen=dklen, maxmem=256 * n * r * p)
+
+
+def sha256_fn(password):
+    pw = password.encode('utf-8')
+    salt = os.urandom(16)
+    return lambda: hashlib.sha256(salt + pw).digest()
+
+
+def bench_argon(password, time_cost=1, memory_cost=32768, parallelism=1, repeats=3, warmup=1, concurrency=1):
+    if PasswordHasher is None:
+        return None
+    return measure(argon_fn(password, time_cost, memory_cost, parallelism), repeats, warmup, concurrency=concurrency)
+
+
+def bench_bcrypt(password, rounds=10, repeats=3, warmup=1, concurrency=1):
+    if bcrypt is None:
+        return None
+    return measure(bcrypt_fn(password, rounds), repeats, warmup, concurrency=concurrency)
+
+
+def bench_scrypt(password, n=16384, r=8, p=1, dklen=32, repeats=3, warmup=1, concurrency=1):
+    return measure(scrypt_fn(password, n, r, p, dklen), repeats, warmup, concurrency=concurrency)
+
+
+def bench_sha256(password, repeats=3, warmup=1, number=10000):
+    return measure(sha256_fn(password), repeats, warmup, number)
+
+
+def host_info():
+    """What the numbers depend on: machine, interpreter and hashing library versions."""
+    info = {
+        'hostname': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'openssl': ssl.OPENSSL_VERSION,
+    }
+    try:
+        from importlib.metadata import version
+        for dist in ('argon2-cffi', 'bcrypt'):
+            try:
+                info[dist] = version(dist)
+            except Exception:
+                info[dist] = None
+    except ImportError:
+        pass
+    return info
+
+
+FACTORIES = {'argon2': argon_fn, 'bcrypt': bcrypt_fn, 'scrypt': scrypt_fn, 'sha256': sha256_fn}
+
+
+def memory_traffic_bytes(algorithm, params):
+    """Approximate RAM traffic of one hash, for the derived bandwidth figure.
+
+    Argon2 writes every block once per pass and reads two (the previous block
+    and a reference block); scrypt's ROMix writes its 128*N*r-byte table once
+    and reads it back once per lane. bcrypt and SHA-256 stay in cache.
+    """
+    if algorithm == 'argon2':
+        return 3 * params['memory_cost'] * 1024 * params['time_cost']
+    if algorithm == 'scrypt':
+        return 2 * 128 * params['n'] * params['r'] * params['p']
+    return None
+
+
+def _rusage():
+    if resource is None:
+        return None
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss_kib = ru.ru_maxrss // 1024 if sys.platform == 'darwin' else ru.ru_maxrss
+    return ru.ru_utime, ru.ru_stime, rss_kib
+
+
+def run_case(algorithm, params, password, repeats=3, warmup=1, number=1, workers=(1,)):
+    """Latency, resource usage and throughput of one configuration in this process.
+
+    Resources cover the latency phase only (one hash in flight): peak RSS is
+    reported relative to the process before hashing, so it approximates the
+    RAM one hash needs.
+    """
+    fn = FACTORIES[algorithm](password, **params)
+    before = _rusage()
+    latency = measure(fn, repeats, warmup, number)
+    after = _rusage()
+    out = {'latency': latency}
+    if before is not None:
+        hashes = (warmup + repeats) * number
+        user, sys_ = after[0] - before[0], after[1] - before[1]
+        traffic = memory_traffic_bytes(algorithm, params)
+        out['resources'] = {
+            'peak_rss_kib': after[2],
+            'peak_rss_delta_kib': after[2] - before[2],
+            'cpu_user_s': user,
+            'cpu_sys_s': sys_,
+            'cpu_per_hash_s': (user + sys_) / hashes,
+            'memory_bandwidth_mb_s': traffic / latency['avg'] / 1e6 if traffic and latency['avg'] else None,
+        }
+    out['throughput'] = [{'workers': w, 'hashes_per_sec': throughput(fn, w, repeats * w, number)} for w in workers]
+    return out
+
+
+def run_isolated(algorithm, params, password, repeats=3, warmup=1, number=1, workers=(1,), timeout=600):
+    """`run_case` in a fresh interpreter, so peak RSS and allocator state do not carry over between configs."""
+    spec = {'algorithm': algorithm, 'params': params, 'password': password, 'repeats': repeats,
+            'warmup': warmup, 'number': number, 'workers': list(workers)}
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--probe', json.dumps(spec)],
+                          capture_output=True, text=True, timeout=timeout)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'probe failed')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def suite_cases(args):
+    """(algorithm, params, calls per sample) for each selected and available algorithm."""
+    cases = []
+    if 'argon2' in args.algorithms:
+        if PasswordHasher is None:
+            print('Argon2 (argon2-cffi) not available; skipping Argon2')
+        else:
+            cases.append(('argon2', {'time_cost': args.argon_time, 'memory_cost': args.argon_mem,
+                                     'parallelism': args.argon_par}, 1))
+    if 'bcrypt' in args.algorithms:
+        if bcrypt is None:
+            print('bcrypt not available; skipping bcrypt (install `bcrypt` to enable)')
+        else:
+            cases.append(('bcrypt', {'rounds': args.bcrypt_rounds}, 1))
+    if 'scrypt' in args.algorithms:
+        cases.append(('scrypt', {'n': args.scrypt_n, 'r': args.scrypt_r, 'p': args.scrypt_p}, 1))
+    if 'sha256' in args.algorithms:
+        cases.append(('sha256', {}, args.sha256_number))
+    return cases
+
+
+def run_suite(args):
+    results = {}
+    worker_counts = list(range(1, max(1, args.max_workers) + 1))
+    run = run_isolated if args.isolate else run_case
+    for algo, params, number in suite_cases(args):
+        print(f'Benchmarking {algo}: {", ".join(f"{k}={v}" for k, v in params.items()) or "salted"}...')
+        try:
+            res = run(algo, params, args.password, args.repeats, args.warmup, number, worker_counts)
+        except Exception as e:
+            results[algo] = {'params': params, 'error': str(e)}
+            print(f'{algo} failed:', e)
+            continue
+        results[algo] = dict(params=params, **res)
+        latency = res['latency']
+        print(f"  median {latency['median'] * 1000:.3f} ms  p95 {latency['p95'] * 1000:.3f} ms  "
+              f"p99 {latency['p99'] * 1000:.3f} ms  "
+              f"mean 95% CI [{latency['ci95'][0] * 1000:.3f}, {latency['ci95'][1] * 1000:.3f}] ms")
+        if 'resources' in res:
+            r = res['resources']
+            bandwidth = f"  ~{r['memory_bandwidth_mb_s']:,.0f} MB/s" if r['memory_bandwidth_mb_s'] else ''
+            print(f"  peak RSS +{r['peak_rss_delta_kib'] / 1024:.1f} MiB  "
+                  f"cpu {r['cpu_per_hash_s'] * 1000:.3f} ms/hash "
+                  f"(user {r['cpu_user_s']:.3f}s, sys {r['cpu_sys_s']:.3f}s){bandwidth}")
+        for run_ in res['throughput']:
+            print(f"  workers={run_['workers']:<3} {run_['hashes_per_sec']:12,.1f} hashes/s")
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': host_info(),
+        'config': {'repeats': args.repeats, 'warmup': args.warmup, 'max_workers': args.max_workers,
+                   'isolated': args.isolate},
+        'results': results,
+    }
+
+
+def compare(old, new, threshold=0.05):
+    """Throughput changes between two results documents.
+
+    A row is a regression when the new rate is more than `threshold` below
+    the old one; latency CIs that do not overlap are reported alongside.
+    """
+    rows = []
+    for algo, new_res in new['results'].items():
+        old_res = old['results'].get(algo)
+        if not old_res or 'throughput' not in old_res or 'throughput' not in new_res:
+            continue
+        if old_res['params'] != new_res['params']:
+            rows.append({'algorithm': algo, 'skipped': 'parameters differ'})
+            continue
+        old_ci, new_ci = old_res['latency']['ci95'], new_res['latency']['ci95']
+        slower = new_ci[0] > old_ci[1]
+        old_rates = {r['workers']: r['hashes_per_sec'] for r in old_res['throughput']}
+        for run in new_res['throughput']:
+            before = old_rates.get(run['workers'])
+            if not before:
+                continue
+            change = run['hashes_per_sec'] / before - 1
+            rows.append({'algorithm': algo, 'workers': run['workers'], 'old': before, 'new': run['hashes_per_sec'],
+                         'change': change, 'regression': change < -threshold, 'latency_ci_slower': slower})
+    return rows
+
+
+def cmd_compare(args):
+    with open(args.compare[0], encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.compare[1], encoding='utf-8') as f:
+        new = json.load(f)
+    for key in ('machine', 'cpu_count', 'python', 'openssl'):
+        if old['host'].get(key) != new['host'].get(key):
+            print(f"warning: host {key} differs ({old['host'].get(key)} vs {new['host'].get(key)}); "
+                  'numbers may not be comparable')
+    rows = compare(old, new, args.threshold)
+    for row in rows:
+        if 'skipped' in row:
+            print(f"{row['algorithm']:<7} skipped: {row['skipped']}")
+            continue
+        flag = 'REGRESSION' if row['regression'] else 'ok'
+        print(f"{row['algorithm']:<7} workers={row['workers']:<3} {row['old']:12,.1f} -> {row['new']:12,.1f} "
+              f"hashes/s  {row['change']:+7.1%}  {flag}{' (latency CI slower)' if row['latency_ci_slower'] else ''}")
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    return 1 if any(r.get('regression') for r in rows) else 0
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--password', '-p', default='demoPass123!', help='Password to benchmark')
-    parser.add_argument('--repeats', '-r', type=int, default=3)
+    parser.add_argument('--algorithms', '-a', nargs='+', choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument('--repeats', '-r', type=int, default=5, help='Timed samples per algorithm')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed calls before sampling')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help='Measure throughput at 1..N concurrent threads')
     parser.add_argument('--argon-time', type=int, default=1)
     parser.add_argument('--argon-mem', type=int, default=32768, help='Argon2 memory in KB')
     parser.add_argument('--argon-par', type=int, default=1)
@@ -74,41 +394,34 @@ def main():
     parser.add_argument('--scrypt-n', type=int, default=16384)
     parser.add_argument('--scrypt-r', type=int, default=8)
     parser.add_argument('--scrypt-p', type=int, default=1)
+    parser.add_argument('--sha256-number', type=int, default=10000, help='SHA-256 hashes per timed sample')
+    parser.add_argument('--out', '-o', help='Results file (default: bench_results/kdfs-<UTC time>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two results files instead')
+    parser.add_argument('--threshold', type=float, default=0.05,
+                        help='With --compare: relative throughput drop counted as a regression')
+    parser.add_argument('--no-isolate', dest='isolate', action='store_false',
+                        help='Run every configuration in this process instead of a fresh subprocess each')
     parser.add_argument('--json', action='store_true', help='Output JSON')
+    parser.add_argument('--probe', help=argparse.SUPPRESS)
     args = parser.parse_args()
 
-    out = {"password": args.password}
-
-    # Argon2
-    if PasswordHasher is not None:
-        print(f'Benchmarking Argon2: time={args.argon_time}, mem={args.argon_mem}KB, par={args.argon_par}...')
-        res = bench_argon(args.password, time_cost=args.argon_time, memory_cost=args.argon_mem, parallelism=args.argon_par)
-        out['argon2'] = res
-        print('  ', res)
-    else:
-        print('Argon2 (argon2-cffi) not available; skipping Argon2')
-
-    # bcrypt
-    if bcrypt is not None:
-        print(f'Benchmarking bcrypt: rounds={args.bcrypt_rounds}...')
-        res = bench_bcrypt(args.password, rounds=args.bcrypt_rounds)
-        out['bcrypt'] = res
-        print('  ', res)
-    else:
-        print('bcrypt not available; skipping bcrypt (install `bcrypt` to enable)')
-
-    # scrypt
-    print(f'Benchmarking scrypt: N={args.scrypt_n}, r={args.scrypt_r}, p={args.scrypt_p}...')
-    try:
-        res = bench_scrypt(args.password, n=args.scrypt_n, r=args.scrypt_r, p=args.scrypt_p)
-        out['scrypt'] = res
-        print('  ', res)
-    except Exception as e:
-        out['scrypt_error'] = str(e)
-        print('scrypt failed:', e)
+    if args.probe:
+        spec = json.loads(args.probe)
+        print(json.dumps(run_case(spec['algorithm'], spec['params'], spec['password'], spec['repeats'],
+                                  spec['warmup'], spec['number'], spec['workers'])))
+        return
+    if args.compare:
+        sys.exit(cmd_compare(args))
+
+    doc = run_suite(args)
+    out = args.out or os.path.join('bench_results', 'kdfs-%s.json' % time.strftime('%Y%m%dT%H%M%SZ', time.gmtime()))
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, indent=2)
+    print('Wrote results to', out)
 
     if args.json:
-        print(json.dumps(out, indent=2))
+        print(json.dumps(doc, indent=2))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Measure `simulate()` speedup as the process pool grows from 1 to N workers.
+
+Usage examples:
+  python scripts/benchmark_simulate.py --passwords 2000 --users 200
+  python scripts/benchmark_simulate.py --max-workers 8 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Make `scripts.simulate` importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from scripts.simulate import simulate  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--passwords', '-n', type=int, default=2000)
+    parser.add_argument('--users', '-u', type=int, default=200)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    args = parser.parse_args()
+
+    passwords = [f'simPass{i}!' for i in range(args.passwords)]
+    out = {'passwords': args.passwords, 'users_per_password': args.users, 'cpu_count': os.cpu_count(), 'runs': []}
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        t0 = time.perf_counter()
+        simulate(passwords, users_per_password=args.users, workers=workers)
+        elapsed = time.perf_counter() - t0
+        rate = args.passwords * args.users / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        run = {'workers': workers, 'seconds': elapsed, 'salted_hashes_per_sec': rate,
+               'speedup': rate / baseline if baseline else 0.0}
+        out['runs'].append(run)
+        print(f"workers={workers:<3} {elapsed:8.3f}s  {rate:11.0f} salted hashes/s  speedup x{run['speedup']:.2f}")
+
+    if args.json:
+        print(json.dumps(out, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Build a memory-mapped rainbow index (sorted SHA-256 digests -> passwords).
+
+Usage:
+  python scripts/build_rainbow_index.py --input data/common_passwords.txt --out data/common_passwords.idx
+  python scripts/build_rainbow_index.py --input big_list.txt.xz --out big.idx --run-size 5000000
+
+The input is streamed (plain, .gz, .xz, .bz2 or - for stdin). The server serves
+lookups from the index named by RAINBOW_INDEX (default data/common_passwords.idx)
+and `scripts/simulate.py --rainbow` accepts an `.idx` file directly.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Make the top-level modules (e.g. `rainbow_index`) importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from rainbow_index import build_index  # noqa: E402
+from scripts.simulate import iter_passwords  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', '-i', default='data/common_passwords.txt')
+    parser.add_argument('--out', '-o', default='data/common_passwords.idx')
+    parser.add_argument('--run-size', type=int, default=1_000_000,
+                        help='Entries sorted in memory per run before spilling to disk')
+    args = parser.parse_args()
+
+    start = time.time()
+    count = build_index(iter_passwords(args.input), args.out, run_size=args.run_size)
+    print(f'Indexed {count} unique passwords into {args.out} in {time.time() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Compile ranked wordlists into the mmap-able trie used by `strength.py`.
+
+Usage:
+  python scripts/build_strength_trie.py --input data/common_passwords.txt --out data/common_passwords.trie
+  python scripts/build_strength_trie.py --input common.txt words.txt.gz --out data/words.trie
+
+Inputs are streamed (plain, .gz, .xz, .bz2 or - for stdin) and ranked by
+position, most common first; with several inputs, ranks continue across
+files. The server scores /api/strength with the trie named by STRENGTH_TRIE
+and `scripts/simulate.py --strength` accepts the same file.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+# Make the top-level modules (e.g. `strength`) importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from scripts.simulate import iter_passwords  # noqa: E402
+from strength import compile_trie  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', '-i', nargs='+', default=['data/common_passwords.txt'])
+    parser.add_argument('--out', '-o', default='data/common_passwords.trie')
+    parser.add_argument('--min-length', type=int, default=3, help='Shorter words are skipped')
+    args = parser.parse_args()
+
+    start = time.time()
+    words = itertools.chain.from_iterable(iter_passwords(p) for p in args.input)
+    count = compile_trie(words, args.out, min_length=args.min_length)
+    print(f'Compiled {count} words into {args.out} in {time.time() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
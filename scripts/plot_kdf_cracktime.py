@@ -4,12 +4,21 @@
 This script uses the benchmark helpers in `scripts/benchmark_kdfs.py` to measure
 per-hash times for small, demo-friendly parameter values and then multiplies by
 guesses=2^entropy to estimate total crack times. Outputs PNG files in `plots/`.
+
+Measurements are cached per (algorithm, params, host) in
+`bench_results/cache.json` (see `scripts/bench_cache.py`), so re-plotting with
+another `--entropy` does not benchmark again; `--refresh` re-measures and
+`--no-cache` bypasses the cache. bcrypt grid points are measured `--jobs` at
+a time; Argon2 and scrypt points one at a time, so memory bandwidth is not shared.
+`--heatmap` adds a 2-D Argon2 time x memory chart. Each point runs in its
+own subprocess (unless `--no-isolate`) so its peak RSS per hash can be drawn
+on a second axis (and in the heatmap cells).
 """
 import os
 import math
 import argparse
 import matplotlib.pyplot as plt
-from scripts.benchmark_kdfs import bench_bcrypt, bench_scrypt, bench_argon
+from scripts.bench_cache import DEFAULT_PATH, BenchCache, default_jobs, sweep
 
 
 def guesses_from_entropy(bits):
@@ -22,13 +31,21 @@ def safe_time(res):
     return res['avg']
 
 
-def plot_bcrypt(password='demo', rounds_range=range(6, 13), entropy_bits=60, out='plots/bcrypt_cracktime.png'):
+def plot_memory(xs, results):
+    """Peak RSS per hash on a second y axis, for results measured in isolation."""
+    mem = [res['resources']['peak_rss_delta_kib'] / 1024 if res and res.get('resources') else None for res in results]
+    if not any(m is not None for m in mem):
+        return
+    ax = plt.gca().twinx()
+    ax.plot(xs, mem, marker='s', ls='--', color='tab:red', alpha=0.7)
+    ax.set_ylabel('Peak RSS per hash (MiB)', color='tab:red')
+
+
+def plot_bcrypt(password='demo', rounds_range=range(6, 13), entropy_bits=60, out='plots/bcrypt_cracktime.png',
+                cache=None, jobs=1, isolate=False):
     os.makedirs(os.path.dirname(out), exist_ok=True)
-    times = []
-    for r in rounds_range:
-        res = bench_bcrypt(password, rounds=r)
-        t = safe_time(res) or 0
-        times.append(t * guesses_from_entropy(entropy_bits))
+    results = sweep('bcrypt', [{'rounds': r} for r in rounds_range], password, cache, jobs, isolate=isolate)
+    times = [(safe_time(res) or 0) * guesses_from_entropy(entropy_bits) for res in results]
     plt.figure(figsize=(8,4))
     plt.plot(list(rounds_range), times, marker='o')
     plt.yscale('log')
@@ -36,17 +53,17 @@ def plot_bcrypt(password='demo', rounds_range=range(6, 13), entropy_bits=60, out
     plt.ylabel('Estimated crack time (seconds, log scale)')
     plt.title(f'bcrypt crack-time (entropy={entropy_bits} bits)')
     plt.grid(True, which='both', ls='--', alpha=0.6)
+    plot_memory(list(rounds_range), results)
     plt.savefig(out, dpi=150)
     print('Wrote', out)
 
 
-def plot_argon(password='demo', time_vals=[1,2,3,4], mem_kb=16384, entropy_bits=60, out='plots/argon_cracktime.png'):
+def plot_argon(password='demo', time_vals=[1,2,3,4], mem_kb=16384, entropy_bits=60, out='plots/argon_cracktime.png',
+               cache=None, jobs=1, isolate=False):
     os.makedirs(os.path.dirname(out), exist_ok=True)
-    times = []
-    for tcost in time_vals:
-        res = bench_argon(password, time_cost=tcost, memory_cost=mem_kb)
-        t = safe_time(res) or 0
-        times.append(t * guesses_from_entropy(entropy_bits))
+    grid = [{'time_cost': t, 'memory_cost': mem_kb} for t in time_vals]
+    results = sweep('argon2', grid, password, cache, jobs, isolate=isolate)
+    times = [(safe_time(res) or 0) * guesses_from_entropy(entropy_bits) for res in results]
     plt.figure(figsize=(8,4))
     plt.plot(time_vals, times, marker='o')
     plt.yscale('log')
@@ -54,17 +71,17 @@ def plot_argon(password='demo', time_vals=[1,2,3,4], mem_kb=16384, entropy_bits=
     plt.ylabel('Estimated crack time (seconds, log scale)')
     plt.title(f'Argon2 crack-time (mem={mem_kb}KB, entropy={entropy_bits} bits)')
     plt.grid(True, which='both', ls='--', alpha=0.6)
+    plot_memory(time_vals, results)
     plt.savefig(out, dpi=150)
     print('Wrote', out)
 
 
-def plot_scrypt(password='demo', n_vals=[1024,4096,16384], r=1, p=1, entropy_bits=60, out='plots/scrypt_cracktime.png'):
+def plot_scrypt(password='demo', n_vals=[1024,4096,16384], r=1, p=1, entropy_bits=60, out='plots/scrypt_cracktime.png',
+                cache=None, jobs=1, isolate=False):
     os.makedirs(os.path.dirname(out), exist_ok=True)
-    times = []
-    for N in n_vals:
-        res = bench_scrypt(password, n=N, r=r, p=p)
-        t = safe_time(res) or 0
-        times.append(t * guesses_from_entropy(entropy_bits))
+    grid = [{'n': N, 'r': r, 'p': p} for N in n_vals]
+    results = sweep('scrypt', grid, password, cache, jobs, isolate=isolate)
+    times = [(safe_time(res) or 0) * guesses_from_entropy(entropy_bits) for res in results]
     plt.figure(figsize=(8,4))
     plt.plot(n_vals, times, marker='o')
     plt.xscale('log', base=2)
@@ -73,6 +90,37 @@ def plot_scrypt(password='demo', n_vals=[1024,4096,16384], r=1, p=1, entropy_bit
     plt.ylabel('Estimated crack time (seconds, log scale)')
     plt.title(f'scrypt crack-time (r={r}, p={p}, entropy={entropy_bits} bits)')
     plt.grid(True, which='both', ls='--', alpha=0.6)
+    plot_memory(n_vals, results)
+    plt.savefig(out, dpi=150)
+    print('Wrote', out)
+
+
+def plot_argon_heatmap(password='demo', time_vals=range(1, 7), mem_vals=(8192, 16384, 32768, 65536, 131072),
+                       entropy_bits=60, out='plots/argon_heatmap.png', cache=None, jobs=1,
+                       isolate=False):
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    grid = [{'time_cost': t, 'memory_cost': m} for m in mem_vals for t in time_vals]
+    results = sweep('argon2', grid, password, cache, jobs, isolate=isolate)
+    # log10 crack time = log10(per-hash seconds) + entropy * log10(2)
+    cells = [math.log10(safe_time(res)) + entropy_bits * math.log10(2) if safe_time(res) else float('nan')
+             for res in results]
+    rows = [cells[i * len(time_vals):(i + 1) * len(time_vals)] for i in range(len(mem_vals))]
+    plt.figure(figsize=(8,5))
+    plt.imshow(rows, origin='lower', aspect='auto', cmap='viridis')
+    plt.colorbar(label='log10 estimated crack time (seconds)')
+    plt.xticks(range(len(time_vals)), list(time_vals))
+    plt.yticks(range(len(mem_vals)), [f'{m // 1024} MiB' for m in mem_vals])
+    for y, row in enumerate(rows):
+        for x, v in enumerate(row):
+            if not math.isnan(v):
+                res = results[y * len(time_vals) + x]
+                label = f'{v:.1f}'
+                if res.get('resources'):
+                    label += f"\n{res['resources']['peak_rss_delta_kib'] / 1024:.0f} MiB"
+                plt.text(x, y, label, ha='center', va='center', color='white', fontsize=8)
+    plt.xlabel('Argon2 time cost (iterations)')
+    plt.ylabel('Argon2 memory')
+    plt.title(f'Argon2 crack-time (entropy={entropy_bits} bits)')
     plt.savefig(out, dpi=150)
     print('Wrote', out)
 
@@ -80,11 +128,34 @@ def plot_scrypt(password='demo', n_vals=[1024,4096,16384], r=1, p=1, entropy_bit
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--entropy', type=int, default=60)
+    parser.add_argument('--cache', default=DEFAULT_PATH, help='Benchmark cache file')
+    parser.add_argument('--no-cache', action='store_true', help='Measure everything, do not read or write the cache')
+    parser.add_argument('--refresh', action='store_true', help='Drop cached results and measure again')
+    parser.add_argument('--max-entries', type=int, default=1000, help='Cache size before LRU eviction')
+    parser.add_argument('--max-age-days', type=float, default=7, help='Cached results older than this are re-measured')
+    parser.add_argument('--jobs', '-j', type=int, default=default_jobs(),
+                        help='bcrypt grid points measured at once (default: one per core); '
+                             'Argon2 and scrypt always run one at a time')
+    parser.add_argument('--heatmap', action='store_true', help='Also plot an Argon2 time x memory heatmap')
+    parser.add_argument('--no-isolate', dest='isolate', action='store_false',
+                        help='Measure in this process (faster, but no peak RSS / CPU figures)')
     args = parser.parse_args()
 
-    plot_bcrypt(entropy_bits=args.entropy)
-    plot_argon(entropy_bits=args.entropy)
-    plot_scrypt(entropy_bits=args.entropy)
+    cache = None
+    if not args.no_cache:
+        cache = BenchCache(args.cache, max_entries=args.max_entries, max_age=args.max_age_days * 86400)
+        if args.refresh:
+            cache.clear()
+    try:
+        plot_bcrypt(entropy_bits=args.entropy, cache=cache, jobs=args.jobs, isolate=args.isolate)
+        plot_argon(entropy_bits=args.entropy, cache=cache, jobs=args.jobs, isolate=args.isolate)
+        plot_scrypt(entropy_bits=args.entropy, cache=cache, jobs=args.jobs, isolate=args.isolate)
+        if args.heatmap:
+            plot_argon_heatmap(entropy_bits=args.entropy, cache=cache, jobs=args.jobs, isolate=args.isolate)
+    finally:
+        if cache is not None:
+            cache.save()
+            print(f'Benchmark cache: {cache.hits} hits, {cache.misses} misses ({cache.path})')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Generate, query and benchmark real rainbow tables (see `rainbow_chains.py`).
+
+Usage examples:
+  python scripts/rainbow_tables.py generate --length 4 --chains 4000 --chain-len 200 --tables 2 --out-dir data/rt
+  python scripts/rainbow_tables.py lookup data/rt/table0.rt data/rt/table1.rt --password abcd
+  python scripts/rainbow_tables.py bench --length 4 --chains 1000 2000 --chain-len 50 200 --json
+
+`bench` shows the trade-off: for each (chains, chain length) it reports table
+size, generation throughput, measured coverage and lookup time.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Make the top-level modules (e.g. `rainbow_chains`) importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from rainbow_chains import Keyspace, RainbowTableSet, generate_table  # noqa: E402
+
+
+def generate(space, chains, chain_len, tables, out_dir, workers=None):
+    os.makedirs(out_dir, exist_ok=True)
+    results = []
+    for table_id in range(tables):
+        path = os.path.join(out_dir, f'table{table_id}.rt')
+        results.append(generate_table(path, space, chains, chain_len, table_id=table_id, workers=workers))
+    return results
+
+
+def cmd_generate(args):
+    space = Keyspace(args.charset, args.length)
+    for res in generate(space, args.chains, args.chain_len, args.tables, args.out_dir, args.workers):
+        print(f"Wrote {res['path']}: {res['chains_stored']}/{res['chains_requested']} chains, "
+              f"{res['bytes']} bytes, {res['hashes_per_sec']:,.0f} hashes/s")
+
+
+def cmd_lookup(args):
+    tables = RainbowTableSet(args.tables)
+    try:
+        digest = hashlib.sha256(args.password.encode('utf-8')).digest() if args.password else bytes.fromhex(args.hash)
+        t0 = time.perf_counter()
+        found = tables.lookup(digest)
+        print(f'{found!r} ({(time.perf_counter() - t0) * 1000:.1f} ms)')
+        if args.coverage:
+            print(json.dumps(tables.measure_coverage(args.coverage), indent=2))
+    finally:
+        tables.close()
+
+
+def cmd_bench(args):
+    space = Keyspace(args.charset, args.length)
+    out = {'keyspace': space.size, 'tables': args.tables, 'runs': []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for chains in args.chains:
+            for chain_len in args.chain_len:
+                gen = generate(space, chains, chain_len, args.tables, tmp, args.workers)
+                tables = RainbowTableSet([g['path'] for g in gen])
+                try:
+                    cov = tables.measure_coverage(args.samples)
+                finally:
+                    tables.close()
+                gen_seconds = sum(g['seconds'] for g in gen)
+                run = {
+                    'chains': chains,
+                    'chain_len': chain_len,
+                    'table_bytes': cov['table_bytes'],
+                    'generate_seconds': gen_seconds,
+                    'generate_hashes_per_sec': chains * chain_len * args.tables / gen_seconds if gen_seconds else 0.0,
+                    'coverage': cov['coverage'],
+                    'avg_lookup_ms': cov['avg_lookup_ms'],
+                    'false_alarms': cov['false_alarms'],
+                }
+                out['runs'].append(run)
+                print(f"chains={chains:<7} t={chain_len:<5} size={run['table_bytes']:>9}B  "
+                      f"gen={run['generate_hashes_per_sec']:>10,.0f} h/s  coverage={run['coverage']:6.1%}  "
+                      f"lookup={run['avg_lookup_ms']:8.2f} ms")
+    if args.json:
+        print(json.dumps(out, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest='cmd', required=True)
+
+    def keyspace_args(p):
+        p.add_argument('--charset', default='abcdefghijklmnopqrstuvwxyz')
+        p.add_argument('--length', type=int, default=4)
+        p.add_argument('--tables', type=int, default=1, help='Tables, each with its own reduction functions')
+        p.add_argument('--workers', type=int, default=None, help='Generation processes (default: CPU count)')
+
+    g = sub.add_parser('generate')
+    keyspace_args(g)
+    g.add_argument('--chains', type=int, default=4000)
+    g.add_argument('--chain-len', type=int, default=200)
+    g.add_argument('--out-dir', default='data/rt')
+    g.set_defaults(func=cmd_generate)
+
+    lk = sub.add_parser('lookup')
+    lk.add_argument('tables', nargs='+', help='Table files written by `generate`')
+    target = lk.add_mutually_exclusive_group(required=True)
+    target.add_argument('--password', help='Hash this password and look it up')
+    target.add_argument('--hash', help='Unsalted SHA-256 hex digest to look up')
+    lk.add_argument('--coverage', type=int, default=0, help='Also measure coverage over N random samples')
+    lk.set_defaults(func=cmd_lookup)
+
+    b = sub.add_parser('bench')
+    keyspace_args(b)
+    b.add_argument('--chains', type=int, nargs='+', default=[1000, 4000])
+    b.add_argument('--chain-len', type=int, nargs='+', default=[50, 200])
+    b.add_argument('--samples', type=int, default=100, help='Random passwords per coverage measurement')
+    b.add_argument('--json', action='store_true', help='Output JSON')
+    b.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,139 +3,518 @@
 
 Usage:
   python scripts/simulate.py --input data/sample_passwords.txt --users 100 --out data/sim_report.json
+  python scripts/simulate.py --input big_list.txt --users 1000 --workers 0   # one process per CPU
+  python scripts/simulate.py --input leak.txt.xz --rainbow data/common_passwords.txt
+  python scripts/simulate.py --input leak.txt.xz --rainbow data/common_passwords.idx   # see build_rainbow_index.py
+  zcat list.gz | python scripts/simulate.py --input -
+  python scripts/simulate.py --input big_list.txt --out data/sim_report.ndjson   # compact, one record per line
+  python scripts/simulate.py --input leak.txt --strength data/common_passwords.trie   # see build_strength_trie.py
 
 This script performs the following:
-- Loads a password list (sample or provided)
+- Streams a password list (sample or provided; plain, gzip, xz, bzip2 or stdin) in bounded batches
 - Computes unsalted SHA-256 for each password
 - Simulates `users` users sharing the same password to compute salted hashes (CSPRNG salts)
 - Builds a small 'rainbow table' of known passwords (from the input) and checks if unsalted hashes would be found instantly
 - Estimates brute-force crack time from estimated entropy bits and chosen attacker speed
-- Writes a JSON report with summary stats
+- Streams the report to disk as it goes (JSON, NDJSON or CSV) with the summary written last
 """
 
 import argparse
+import bz2
+import csv
+import gzip
 import hashlib
+import io
 import json
+import lzma
+import math
 import os
-import secrets
+import sys
 import time
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from operator import contains
 
+# Make the top-level modules (e.g. `rainbow_index`) importable when run as a script
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-def sha256_hex(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()
+from hashing_core import random_salts, salted_sha256_many, sha256_hex, sha256_many  # noqa: E402,F401
+from rainbow_index import RainbowIndex  # noqa: E402
+from strength import StrengthIndex  # noqa: E402
+
+
+# ASCII characters mapped to a class marker: lower 'a', upper 'A', digit '0', other '!'
+_ASCII_CLASSES = str.maketrans({
+    chr(i): 'a' if chr(i).islower() else 'A' if chr(i).isupper() else '0' if chr(i).isdigit() else '!'
+    for i in range(128)
+})
+_CLASS_MARKERS = frozenset('aA0!')
+# The same classes as a bytes table for the batch estimator; '\n' (the batch
+# separator) and non-ASCII UTF-8 bytes are left as they are.
+_BYTE_CLASSES = bytes(10 if i == 10 else ord(_ASCII_CLASSES[i]) if i < 128 else i for i in range(256))
+
+
+def _char_classes(password: str) -> set:
+    """Class markers present in `password`, in one pass over its characters."""
+    classes = set(password.translate(_ASCII_CLASSES))
+    if not password.isascii():
+        # non-ASCII characters survive the translation; classify them with the str predicates
+        for c in classes - _CLASS_MARKERS:
+            if c.islower():
+                classes.add('a')
+            if c.isupper():
+                classes.add('A')
+            if c.isdigit():
+                classes.add('0')
+            if not c.isalnum():
+                classes.add('!')
+    return classes
+
+
+class _EntropyTable(dict):
+    """(lower, upper, digit, symbol, length) -> entropy bits, filled on first use."""
+
+    def __missing__(self, key):
+        lower, upper, digit, symbol, length = key
+        charset = (26 if lower else 0) + (26 if upper else 0) + (10 if digit else 0) + (32 if symbol else 0)
+        bits = self[key] = int(round(math.log2(charset or 26) * length)) if length else 0
+        return bits
+
+
+_ENTROPY = _EntropyTable()
 
 
 def estimate_entropy_bits(password: str) -> int:
     if not password:
         return 0
-    charset = 0
-    if any(c.islower() for c in password):
-        charset += 26
-    if any(c.isupper() for c in password):
-        charset += 26
-    if any(c.isdigit() for c in password):
-        charset += 10
-    if any(not c.isalnum() for c in password):
-        charset += 32
-    if charset == 0:
-        charset = 26
-    import math
-    bits = math.log2(charset) * len(password)
-    return int(round(bits))
+    classes = _char_classes(password)
+    return _ENTROPY['a' in classes, 'A' in classes, '0' in classes, '!' in classes, len(password)]
+
+
+def estimate_entropy_bits_batch(passwords) -> list:
+    """`estimate_entropy_bits` for a list of passwords, without a Python-level loop per password.
+
+    The batch is joined, encoded and translated to class markers in one
+    pass, split back into lines, and each class is tested with C-level
+    `map`s; the (classes, length) combinations are looked up in a small memo
+    table. Non-ASCII passwords are then re-checked one by one.
+    """
+    if not isinstance(passwords, list):
+        passwords = list(passwords)
+    joined = '\n'.join(passwords)
+    if joined.count('\n') != max(0, len(passwords) - 1):
+        # a password contains the separator: classify one by one
+        return [estimate_entropy_bits(pw) for pw in passwords]
+    lines = joined.encode('utf-8', 'surrogatepass').translate(_BYTE_CLASSES).split(b'\n')
+    has = [map(contains, lines, repeat(marker)) for marker in b'aA0!']
+    out = list(map(_ENTROPY.__getitem__, zip(*has, map(len, passwords))))
+    if not joined.isascii():
+        for i, pw in enumerate(passwords):
+            if not pw.isascii():
+                out[i] = estimate_entropy_bits(pw)
+    return out
+
+
+def crack_time(entropy: int, speed: float) -> float:
+    """Brute-force seconds, ``2 ** entropy / speed``, computed in log space.
+
+    An entropy beyond the float range gives ``inf`` instead of raising
+    `OverflowError`; below that the result is identical to the plain division.
+    """
+    exponent = entropy if entropy > 0 else 0
+    speed = float(speed)
+    if exponent - math.log2(speed) >= 1024:
+        return math.inf
+    if exponent < 1024:
+        return math.ldexp(1.0, exponent) / speed
+    # 2 ** entropy alone overflows although the quotient does not
+    return math.ldexp(1.0 / speed, exponent)
+
+
+def crack_times(entropy: int, attacker_speeds) -> dict:
+    """Crack time per attacker speed, keyed like the report (``str(int(speed))``)."""
+    return {str(int(speed)): crack_time(entropy, speed) for speed in attacker_speeds}
+
+
+class _CrackTimes(dict):
+    def __init__(self, speed):
+        super().__init__()
+        self.speed = speed
+
+    def __missing__(self, entropy):
+        seconds = self[entropy] = crack_time(entropy, self.speed)
+        return seconds
+
+
+def crack_times_batch(entropies, attacker_speeds) -> dict:
+    """Crack times for many entropies and every attacker speed at once.
+
+    Returns one column per speed, ``{str(int(speed)): [seconds, ...]}``;
+    each distinct entropy is computed once per speed.
+    """
+    if not isinstance(entropies, list):
+        entropies = list(entropies)
+    return {str(int(speed)): list(map(_CrackTimes(speed).__getitem__, entropies)) for speed in attacker_speeds}
+
+
+def open_wordlist(path: str):
+    """Open a wordlist as text: plain, `.gz`, `.xz`, `.bz2`, or `-` for stdin."""
+    if path == '-':
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    opener = {'.gz': gzip.open, '.xz': lzma.open, '.bz2': bz2.open}.get(os.path.splitext(path)[1].lower(), open)
+    return opener(path, 'rt', encoding='utf-8')
+
+
+def iter_passwords(path: str):
+    """Lazily yield the stripped, non-empty lines of a wordlist."""
+    with open_wordlist(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
 
 
 def read_passwords(path: str):
-    with open(path, 'r', encoding='utf-8') as f:
-        return [line.strip() for line in f if line.strip()]
+    return list(iter_passwords(path))
 
 
-def simulate(passwords, users_per_password=100, attacker_speeds=(1e7, 1e9)):
-    report = {
-        'total_passwords': len(passwords),
-        'per_password': {},
-        'summary': {}
-    }
+def batched(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
 
-    # Precompute unsalted for rainbow table simulation (we'll use all passwords as 'known')
-    rainbow = {sha256_hex(p.encode('utf-8')): p for p in passwords}
 
-    per_pw = {}
+class Progress:
+    """Pass items through while printing a lines/sec readout to `out` every `interval` seconds."""
 
-    for pw in passwords:
-        unsalted = sha256_hex(pw.encode('utf-8'))
-        # simulate multiple users and create salted hashes
-        salts = [secrets.token_bytes(16) for _ in range(users_per_password)]
-        salted_hashes = [sha256_hex(s + pw.encode('utf-8')) for s in salts]
-        unique_salted = len(set(salted_hashes))
-        unique_unsalted = 1  # same password yields same unsalted
+    def __init__(self, iterable, interval=2.0, out=None, label='lines'):
+        self.iterable = iterable
+        self.interval = interval
+        self.out = out or sys.stderr
+        self.label = label
+        self.count = 0
+        self.start = None
 
-        # rainbow table hit (unsalted only)
-        rainbow_hit = unsalted in rainbow
+    def _report(self, final=False):
+        elapsed = time.monotonic() - self.start
+        rate = self.count / elapsed if elapsed else 0.0
+        end = '\n' if final else '\r'
+        self.out.write(f'  {self.count:,} {self.label} in {elapsed:.1f}s ({rate:,.0f} {self.label}/s){end}')
+        self.out.flush()
+
+    def __iter__(self):
+        self.start = time.monotonic()
+        last = self.start
+        for item in self.iterable:
+            self.count += 1
+            yield item
+            now = time.monotonic()
+            if now - last >= self.interval:
+                self._report()
+                last = now
+        self._report(final=True)
 
-        # entropy estimate
+
+def simulate_password(pw, users_per_password, attacker_speeds, rainbow, entropy=None, times=None):
+    """Per-password record for the report.
+
+    Uniqueness is counted over raw 32-byte digests; no per-user salt or hex
+    lists are kept, so memory per password is one small set. A `rainbow` of
+    None means the input itself is the table of known passwords, so every
+    password is a hit. `entropy` and the crack `times` may be passed in when
+    they were computed for a whole batch.
+    """
+    raw = pw.encode('utf-8')
+    digest = hashlib.sha256(raw).digest()
+    # simulate multiple users and create salted hashes (one CSPRNG call for all their salts)
+    salted = set(salted_sha256_many(raw, random_salts(users_per_password)))
+
+    if entropy is None:
         entropy = estimate_entropy_bits(pw)
 
-        # estimate crack times
-        crack_times = {}
-        for speed in attacker_speeds:
-            guesses = 2 ** entropy if entropy > 0 else 1
-            seconds = guesses / float(speed)
-            crack_times[str(int(speed))] = seconds
-
-        per_pw[pw] = {
-            'unsalted_sha256': unsalted,
-            'salted_unique_count': unique_salted,
-            'rainbow_hit_unsalted': rainbow_hit,
-            'entropy_bits': entropy,
-            'crack_times_sec': crack_times
+    return {
+        'unsalted_sha256': digest.hex(),
+        'salted_unique_count': len(salted),
+        # rainbow table hit (unsalted only)
+        'rainbow_hit_unsalted': rainbow is None or digest in rainbow,
+        'entropy_bits': entropy,
+        'crack_times_sec': crack_times(entropy, attacker_speeds) if times is None else times
+    }
+
+
+def load_rainbow(passwords):
+    """Set of raw unsalted SHA-256 digests for a collection of known passwords."""
+    return set(sha256_many(p.encode('utf-8') for p in passwords))
+
+
+# Per-process state for the parallel mode, set once by `_init_worker`
+_worker_args = None
+
+
+def _init_worker(users_per_password, attacker_speeds, rainbow, strength=None):
+    global _worker_args
+    _worker_args = (users_per_password, attacker_speeds, rainbow, strength)
+
+
+def _simulate_batch(batch, users_per_password, attacker_speeds, rainbow, strength=None):
+    entropies = estimate_entropy_bits_batch(batch)
+    # dictionary/pattern-aware estimate; crack times follow it instead of the charset model
+    scores = strength.score_batch(batch) if strength is not None else None
+    bits = [score['strength_bits'] for score in scores] if scores is not None else entropies
+    columns = crack_times_batch(bits, attacker_speeds)
+    times = [dict(zip(columns, row)) for row in zip(*columns.values())] if columns else [{} for _ in batch]
+    records = [(pw, simulate_password(pw, users_per_password, attacker_speeds, rainbow, entropy, t))
+               for pw, entropy, t in zip(batch, entropies, times)]
+    if scores is not None:
+        for (pw, record), score in zip(records, scores):
+            record['strength_bits'] = score['strength_bits']
+            record['strength_patterns'] = [p['pattern'] for p in score['patterns']]
+    return records
+
+
+def _simulate_shard(shard):
+    return _simulate_batch(shard, *_worker_args)
+
+
+def _shards(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def iter_records(passwords, users_per_password=100, attacker_speeds=(1e7, 1e9), rainbow=None,
+                 workers=1, batch_size=10000, strength=None):
+    """Lazily yield ``(password, record)`` pairs in input order.
+
+    `passwords` may be any iterable (e.g. `iter_passwords`); it is consumed
+    `batch_size` items at a time, so only one batch is held in memory. With
+    ``workers > 1`` each batch is split into contiguous shards that run on a
+    process pool and are merged back in input order. A `strength` index
+    (`strength.StrengthIndex`) adds dictionary/pattern-aware strength to each
+    record and bases the crack times on it.
+    """
+    if not workers or workers <= 1:
+        for batch in batched(passwords, batch_size):
+            yield from _simulate_batch(batch, users_per_password, attacker_speeds, rainbow, strength)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(users_per_password, attacker_speeds, rainbow, strength)) as pool:
+        for batch in batched(passwords, batch_size):
+            # a few shards per worker keeps the pool busy when shard costs differ
+            size = max(1, -(-len(batch) // (workers * 4)))
+            for records in pool.map(_simulate_shard, _shards(batch, size)):
+                yield from records
+
+
+class RunningSummary:
+    """Summary stats accumulated one record at a time.
+
+    As in the in-memory report, `total_passwords` counts every input line
+    while hits and averages count each distinct password once. The distinct
+    passwords are remembered by their raw 32-byte unsalted digest; with
+    ``dedup=False`` nothing is kept and every line counts.
+    """
+
+    def __init__(self, users_per_password, dedup=True):
+        self.users_per_password = users_per_password
+        self.lines = 0
+        self.count = 0
+        self.rainbow_hits = 0
+        self.entropy_total = 0
+        self.strength_total = None
+        self._seen = set() if dedup else None
+
+    def add(self, record):
+        self.lines += 1
+        if self._seen is not None:
+            digest = bytes.fromhex(record['unsalted_sha256'])
+            if digest in self._seen:
+                return
+            self._seen.add(digest)
+        self.count += 1
+        self.rainbow_hits += 1 if record['rainbow_hit_unsalted'] else 0
+        self.entropy_total += record['entropy_bits']
+        if 'strength_bits' in record:
+            self.strength_total = (self.strength_total or 0) + record['strength_bits']
+
+    def as_dict(self, total_passwords=None):
+        summary = {
+            'total_passwords': self.lines if total_passwords is None else total_passwords,
+            'total_rainbow_hits_unsalted': self.rainbow_hits,
+            'avg_entropy_bits': self.entropy_total / self.count if self.count else 0,
+            'users_simulated_per_password': self.users_per_password
         }
+        if self.strength_total is not None:
+            summary['avg_strength_bits'] = self.strength_total / self.count
+        return summary
+
+
+def summarize(per_pw, total_passwords, users_per_password):
+    summary = RunningSummary(users_per_password)
+    for v in per_pw.values():
+        summary.add(v)
+    return summary.as_dict(total_passwords)
+
+
+class JsonReportWriter:
+    """Stream the classic report shape: `per_password` entries first, summary last.
+
+    Entries are written as they arrive, one per line, so nothing is buffered.
+    A password that appears twice in the input is written twice; `json.load`
+    keeps the last one, just like the in-memory dict did.
+    """
 
-    report['per_password'] = per_pw
+    def __init__(self, f):
+        self.f = f
+        self.first = True
+        self.f.write('{\n  "per_password": {')
 
-    # summary stats
-    total_rainbow_hits = sum(1 for v in per_pw.values() if v['rainbow_hit_unsalted'])
-    avg_entropy = sum(v['entropy_bits'] for v in per_pw.values()) / len(per_pw) if per_pw else 0
+    def write(self, pw, record):
+        self.f.write(('\n' if self.first else ',\n') + '    ' + json.dumps(pw) + ': ' + json.dumps(record))
+        self.first = False
 
-    report['summary'] = {
+    def close(self, summary):
+        self.f.write('\n  },\n  "total_passwords": %d,\n  "summary": %s\n}\n'
+                     % (summary['total_passwords'], json.dumps(summary)))
+
+
+class NdjsonReportWriter:
+    """One `{"password": ..., <record>}` object per line, then a final `{"summary": ...}` line."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, pw, record):
+        self.f.write(json.dumps({'password': pw, **record}) + '\n')
+
+    def close(self, summary):
+        self.f.write(json.dumps({'summary': summary}) + '\n')
+
+
+class CsvReportWriter:
+    """Columnar CSV, one row per password; the summary goes to `<out>.summary.json`."""
+
+    FIELDS = ['password', 'unsalted_sha256', 'salted_unique_count', 'rainbow_hit_unsalted', 'entropy_bits']
+
+    def __init__(self, f):
+        self.f = f
+        self.writer = csv.writer(f)
+        self.fields = self.speeds = None
+
+    def write(self, pw, record):
+        if self.speeds is None:
+            self.fields = self.FIELDS + (['strength_bits'] if 'strength_bits' in record else [])
+            self.speeds = list(record['crack_times_sec'])
+            self.writer.writerow(self.fields + ['crack_time_sec_' + s for s in self.speeds])
+        self.writer.writerow([pw] + [record[k] for k in self.fields[1:]]
+                             + [record['crack_times_sec'][s] for s in self.speeds])
+
+    def close(self, summary):
+        with open(self.f.name + '.summary.json', 'w', encoding='utf-8') as sf:
+            json.dump(summary, sf, indent=2)
+
+
+REPORT_WRITERS = {'json': JsonReportWriter, 'ndjson': NdjsonReportWriter, 'csv': CsvReportWriter}
+
+
+def report_format(path, fmt=None):
+    """Explicit `fmt`, else guessed from the output extension (`.ndjson`/`.jsonl`, `.csv`), else json."""
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    return {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}.get(ext, 'json')
+
+
+def simulate(passwords, users_per_password=100, attacker_speeds=(1e7, 1e9), workers=1, strength=None):
+    """Build the simulation report.
+
+    With ``workers > 1`` the password list is split into contiguous shards that
+    run on a process pool; shards are merged back in input order, so the report
+    is identical in shape and ordering to the single-process one. See
+    `iter_records` for `strength`.
+    """
+    passwords = list(passwords)
+    # Precompute unsalted for rainbow table simulation (we'll use all passwords as 'known')
+    rainbow = load_rainbow(passwords)
+    per_pw = dict(iter_records(passwords, users_per_password, attacker_speeds, rainbow, workers=workers,
+                               strength=strength))
+    return {
         'total_passwords': len(passwords),
-        'total_rainbow_hits_unsalted': total_rainbow_hits,
-        'avg_entropy_bits': avg_entropy,
-        'users_simulated_per_password': users_per_password
+        'per_password': per_pw,
+        'summary': summarize(per_pw, len(passwords), users_per_password)
     }
 
-    return report
-
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('--input', '-i', default='data/sample_passwords.txt')
+    parser.add_argument('--input', '-i', default='data/sample_passwords.txt',
+                        help='Wordlist (plain, .gz, .xz, .bz2) or - for stdin')
     parser.add_argument('--users', '-u', type=int, default=100)
     parser.add_argument('--out', '-o', default='data/sim_report.json')
     parser.add_argument('--pretty', action='store_true')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help='Processes to shard the password list across (0 = CPU count)')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Passwords read and processed per batch')
+    parser.add_argument('--rainbow', help='Wordlist or prebuilt .idx index of known passwords for rainbow hits '
+                                          '(default: the input itself, so every password is a hit)')
+    parser.add_argument('--strength', help='Compiled strength trie (scripts/build_strength_trie.py) for '
+                                           'dictionary/pattern-aware strength and crack times')
+    parser.add_argument('--quiet', '-q', action='store_true', help='No progress readout')
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Count every line in the summary hits/averages instead of each distinct password '
+                             'once (no per-password memory)')
+    parser.add_argument('--format', '-f', choices=sorted(REPORT_WRITERS),
+                        help='Report format (default: from the --out extension, else json)')
     args = parser.parse_args()
 
-    if not os.path.exists(args.input):
-        print('Input file not found:', args.input)
-        raise SystemExit(1)
+    for path in (args.input, args.rainbow, args.strength):
+        if path and path != '-' and not os.path.exists(path):
+            print('Input file not found:', path)
+            raise SystemExit(1)
+
+    if args.rainbow and args.rainbow.endswith('.idx'):
+        rainbow = RainbowIndex(args.rainbow)
+    elif args.rainbow:
+        rainbow = load_rainbow(iter_passwords(args.rainbow))
+    else:
+        rainbow = None
+    strength = StrengthIndex(args.strength) if args.strength else None
+    lines = iter_passwords(args.input)
+    if not args.quiet:
+        lines = Progress(lines)
 
-    pws = read_passwords(args.input)
+    fmt = report_format(args.out, args.format)
+    summary = RunningSummary(args.users, dedup=not args.no_dedup)
+    first = None
     start = time.time()
-    report = simulate(pws, users_per_password=args.users)
+    with open(args.out, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None) as f:
+        writer = REPORT_WRITERS[fmt](f)
+        for pw, record in iter_records(lines, args.users, rainbow=rainbow,
+                                       workers=args.workers or os.cpu_count(), batch_size=args.batch_size,
+                                       strength=strength):
+            writer.write(pw, record)
+            summary.add(record)
+            if first is None:
+                first = (pw, record)
+        writer.close(summary.as_dict())
     elapsed = time.time() - start
 
     if args.pretty:
         print('Simulation completed in %.2fs' % elapsed)
-        print('Total passwords:', report['summary']['total_passwords'])
-        print('Rainbow hits (unsalted):', report['summary']['total_rainbow_hits_unsalted'])
-        print('Avg entropy bits:', report['summary']['avg_entropy_bits'])
-        print('Sample entry (first password):')
-        first = next(iter(report['per_password'].items()))
-        print(' ', first[0])
-        print(' ', first[1])
-
-    with open(args.out, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2)
+        print('Total passwords:', summary.lines)
+        print('Rainbow hits (unsalted):', summary.rainbow_hits)
+        print('Avg entropy bits:', summary.as_dict()['avg_entropy_bits'])
+        if strength is not None:
+            print('Avg strength bits:', summary.as_dict()['avg_strength_bits'])
+        if first:
+            print('Sample entry (first password):')
+            print(' ', first[0])
+            print(' ', first[1])
 
     print('Wrote report to', args.out)
 
@@ -36,6 +36,12 @@ function estimateEntropyBits(password) {
   return Math.round(bitsPerChar * password.length);
 }
 
+function escapeHtml(text) {
+  const div = document.createElement('div');
+  div.textContent = text;
+  return div.innerHTML;
+}
+
 function prettyTimeSeconds(sec) {
   if (sec < 1) return `${(sec * 1000).toFixed(2)} ms`;
   const units = ['s','m','h','d','y'];
@@ -133,7 +139,7 @@ const sampleRainbow = ['password','123456','qwerty','letmein','12345678','passwo
 
 // Rainbow-table simulator data (loaded from data/common_passwords.txt)
 let commonPasswords = [];
-let rainbowMap = new Map(); // unsalted sha256 -> password
+let rainbowMap = new Map(); // unsalted sha256 -> password (a Map, or a DigestTable from the server)
 let rainbowChart = null;
 
 // UI wiring
@@ -190,6 +196,7 @@ const scryptN = document.getElementById('scryptN');
 const scryptR = document.getElementById('scryptR');
 const scryptP = document.getElementById('scryptP');
 const kdfStatus = document.getElementById('kdfStatus');
+const kdfCancelBtn = document.getElementById('kdfCancelBtn');
 const argonTime = document.getElementById('argonTime');
 const argonMem = document.getElementById('argonMem');
 const argonParallel = document.getElementById('argonParallel');
@@ -282,6 +289,154 @@ async function loadScrypt() {
   });
 }
 
+// Main-thread fallback for browsers without Web Workers; same result shape as kdf_worker.js
+async function runKdfInline(kind, password, params, salt) {
+  const start = performance.now();
+  let hash, encoded = null;
+  if (kind === 'argon2') {
+    const argon = await loadArgon2();
+    const res = await argon.hash({ pass: password, salt: new Uint8Array(salt), time: params.time, mem: params.mem, parallelism: params.parallelism, hashLen: 32, type: argon.ArgonType.Argon2id });
+    hash = res.hash; encoded = res.encoded;
+  } else if (kind === 'bcrypt') {
+    const bcrypt = await loadBcrypt();
+    encoded = await new Promise((resolve, reject) => {
+      bcrypt.hash(password, params.rounds, (err, h) => { if (err) reject(err); else resolve(h); });
+    });
+    hash = new TextEncoder().encode(encoded);
+  } else if (kind === 'scrypt') {
+    const scrypt = await loadScrypt();
+    hash = await new Promise((resolve, reject) => {
+      try {
+        scrypt(password, Array.from(new Uint8Array(salt)), { N: params.N, r: params.r, p: params.p, dkLen: 32, encoding: 'binary' }, (key) => resolve(new Uint8Array(key)));
+      } catch (err) { reject(err); }
+    });
+  } else {
+    throw new Error(`Unknown KDF: ${kind}`);
+  }
+  return { kind, seconds: (performance.now() - start) / 1000, hash: new Uint8Array(hash).buffer, encoded };
+}
+
+// Pool of KDF workers (static/kdf_worker.js), one per core. Jobs queue until a
+// worker is idle; cancelling a running job terminates its worker and a fresh
+// one takes its place, so a runaway Argon2 never blocks the page.
+class KdfWorkerPool {
+  constructor(size) {
+    this.size = Math.max(1, Math.min(size || navigator.hardwareConcurrency || 2, 16));
+    this.idle = [];
+    this.workers = 0;
+    this.queue = [];
+    this.nextId = 1;
+  }
+
+  _spawn() {
+    this.workers++;
+    return new Worker('/static/kdf_worker.js');
+  }
+
+  _retire(worker) {
+    worker.terminate();
+    this.workers--;
+  }
+
+  // Run one KDF; resolves to { kind, seconds, hash: ArrayBuffer, encoded }.
+  // `salt` (Uint8Array) is transferred to the worker and unusable afterwards.
+  run(kind, password, params, { salt, onProgress, signal } = {}) {
+    return new Promise((resolve, reject) => {
+      if (signal && signal.aborted) return reject(new DOMException('KDF cancelled', 'AbortError'));
+      const job = { id: this.nextId++, kind, password, params, salt, onProgress, signal, resolve, reject };
+      if (signal) {
+        job.onAbort = () => this._cancel(job);
+        signal.addEventListener('abort', job.onAbort, { once: true });
+      }
+      this.queue.push(job);
+      this._pump();
+    });
+  }
+
+  // Run the same KDF for each password at once, spread over the pool
+  runMany(kind, passwords, params, opts = {}) {
+    return Promise.all(passwords.map(pw => this.run(kind, pw, params, { ...opts, salt: generateSalt(16) })));
+  }
+
+  _pump() {
+    while (this.queue.length && (this.idle.length || this.workers < this.size)) {
+      const job = this.queue.shift();
+      const worker = this.idle.pop() || this._spawn();
+      this._start(worker, job);
+    }
+  }
+
+  _start(worker, job) {
+    job.worker = worker;
+    worker.onmessage = (e) => {
+      const msg = e.data;
+      if (msg.id !== job.id) return;
+      if (msg.type === 'progress') {
+        if (job.onProgress) job.onProgress(msg.fraction);
+        return;
+      }
+      this._finish(job);
+      this.idle.push(worker);
+      if (msg.type === 'result') job.resolve(msg);
+      else job.reject(new Error(msg.message));
+      this._pump();
+    };
+    worker.onerror = (e) => {
+      e.preventDefault();
+      this._finish(job);
+      this._retire(worker);
+      job.reject(new Error(e.message || 'KDF worker failed'));
+      this._pump();
+    };
+    const salt = job.salt ? job.salt.buffer.slice(job.salt.byteOffset, job.salt.byteOffset + job.salt.byteLength) : new ArrayBuffer(0);
+    worker.postMessage({ id: job.id, kind: job.kind, password: job.password, params: job.params, salt }, [salt]);
+  }
+
+  _finish(job) {
+    if (job.signal && job.onAbort) job.signal.removeEventListener('abort', job.onAbort);
+    job.worker = null;
+  }
+
+  _cancel(job) {
+    const queued = this.queue.indexOf(job);
+    if (queued >= 0) {
+      this.queue.splice(queued, 1);
+    } else if (job.worker) {
+      // a worker stuck in WASM cannot be interrupted politely
+      const worker = job.worker;
+      this._finish(job);
+      this._retire(worker);
+    } else {
+      return;
+    }
+    job.reject(new DOMException('KDF cancelled', 'AbortError'));
+    this._pump();
+  }
+}
+
+const kdfPool = window.Worker ? new KdfWorkerPool(navigator.hardwareConcurrency) : null;
+let kdfAbort = null;
+
+function runKdf(kind, password, params, opts = {}) {
+  if (kdfPool) return kdfPool.run(kind, password, params, opts);
+  return runKdfInline(kind, password, params, opts.salt || generateSalt(16));
+}
+
+// A solo guess first, with the machine to itself: its time is the per-guess
+// latency shown. Then one guess per worker in parallel, whose wall time gives the
+// throughput of all cores. `maxParallel` bounds memory-heavy KDFs.
+async function timeKdf(kind, password, params, { salt, onProgress, signal, maxParallel } = {}) {
+  const n = kdfPool ? Math.max(1, Math.min(kdfPool.size, maxParallel === undefined ? kdfPool.size : maxParallel)) : 1;
+  const first = await runKdf(kind, password, params, { salt, onProgress, signal });
+  if (n === 1) return { first, parallel: 1, guessesPerSec: first.seconds > 0 ? 1 / first.seconds : 0 };
+  const start = performance.now();
+  const jobs = [];
+  for (let i = 0; i < n; i++) jobs.push(runKdf(kind, password, params, { salt: generateSalt(16), signal }));
+  await Promise.all(jobs);
+  const wall = (performance.now() - start) / 1000;
+  return { first, parallel: n, guessesPerSec: wall > 0 ? n / wall : 0 };
+}
+
 showPwd.addEventListener('change', () => {
   passwordInput.type = showPwd.checked ? 'text' : 'password';
 });
@@ -348,7 +503,7 @@ async function runDemo() {
 
     // Rainbow table simulation: precomputed unsalted table for sample passwords
     const rainbowMap = new Map();
-    for (const pw of sampleRainbow) rainbowMap.set(await sha256Hex(pw), pw);
+    for (const pw of sampleRainbow) rainbowMap.set(await cachedSha256Hex(pw), pw);
     const rainbowHit = rainbowMap.has(unsalted);
 
     // Crack time estimation (brute force based on entropy)
@@ -375,6 +530,8 @@ async function runDemo() {
     // Client-side KDFs: Argon2, bcrypt, scrypt (when Local-only is enabled and selected)
     if (localOnly.checked && ( (useArgonLocal && useArgonLocal.checked) || (useBcryptLocal && useBcryptLocal.checked) || (useScryptLocal && useScryptLocal.checked) )) {
       try {
+        kdfAbort = new AbortController();
+        kdfCancelBtn.style.display = '';
         // Argon2 branch
         if (useArgonLocal && useArgonLocal.checked) {
           const argTime = Math.max(1, parseInt(argonTime.value || '2', 10));
@@ -392,16 +549,17 @@ async function runDemo() {
               return;
             }
           }
-          argonStatus.textContent = 'Loading Argon2...';
-          const argon = await loadArgon2();
           argonStatus.textContent = 'Computing Argon2...';
-          const startA = performance.now();
-          const argRes = await argon.hash({ pass: pwd, salt: hexToBuf(saltHex), time: argTime, mem: argMem, parallelism: argParallel, hashLen: 32, type: argon.ArgonType.Argon2id });
-          const endA = performance.now();
-          const argonSec = (endA - startA) / 1000;
+          const argRes = await timeKdf('argon2', pwd, { time: argTime, mem: argMem, parallelism: argParallel }, {
+            salt: hexToBuf(saltHex), signal: kdfAbort.signal,
+            // keep the parallel timing run under the same memory ceiling as a single hash
+            maxParallel: Math.floor(warnMemKB / argMem),
+          });
+          const argonSec = argRes.first.seconds;
           argonStatus.textContent = `Argon2 computed in ${argonSec.toFixed(2)}s`;
-          out.innerHTML += `<p><strong>Local Argon2 (encoded):</strong> <pre>${argRes.encoded || ''}</pre></p>`;
-          out.innerHTML += `<p><strong>Local Argon2 (hex):</strong> <pre>${argRes.hashHex || (argRes.hash ? bufToHex(argRes.hash) : '')}</pre></p>`;
+          out.innerHTML += `<p><strong>Local Argon2 (encoded):</strong> <pre>${argRes.first.encoded || ''}</pre></p>`;
+          out.innerHTML += `<p><strong>Local Argon2 (hex):</strong> <pre>${bufToHex(argRes.first.hash)}</pre></p>`;
+          out.innerHTML += kdfThroughputLine(argRes);
           const guessesArgon = Math.pow(2, estimateEntropyBits(pwd) || 1);
           const timeSecArgon = guessesArgon * argonSec;
           out.innerHTML += `<p><strong>Estimated crack time (using Argon2 per-guess cost):</strong> ${prettyTimeSeconds(timeSecArgon)}</p>`;
@@ -411,22 +569,21 @@ async function runDemo() {
         // bcrypt branch
         if (useBcryptLocal && useBcryptLocal.checked) {
           try {
-            kdfStatus.textContent = 'Loading bcrypt...';
-            const bcrypt = await loadBcrypt();
             kdfStatus.textContent = 'Computing bcrypt...';
             const rounds = Math.max(4, Math.min(15, parseInt(bcryptRounds.value || '10', 10)));
-            const startB = performance.now();
-            const hashed = await new Promise((resolve, reject) => {
-              bcrypt.hash(pwd, rounds, (err, hash) => { if (err) reject(err); else resolve(hash); });
+            const res = await timeKdf('bcrypt', pwd, { rounds }, {
+              signal: kdfAbort.signal,
+              onProgress: (f) => { kdfStatus.textContent = `Computing bcrypt... ${Math.round(f * 100)}%`; },
             });
-            const endB = performance.now();
-            const bcryptSec = (endB - startB) / 1000;
+            const bcryptSec = res.first.seconds;
             kdfStatus.textContent = `bcrypt computed in ${bcryptSec.toFixed(2)}s (rounds=${rounds})`;
-            out.innerHTML += `<p><strong>Local bcrypt:</strong> <pre>${hashed}</pre></p>`;
+            out.innerHTML += `<p><strong>Local bcrypt:</strong> <pre>${res.first.encoded}</pre></p>`;
+            out.innerHTML += kdfThroughputLine(res);
             const guessesBcrypt = Math.pow(2, estimateEntropyBits(pwd) || 1);
             out.innerHTML += `<p><strong>Estimated crack time (bcrypt per-guess cost):</strong> ${prettyTimeSeconds(guessesBcrypt * bcryptSec)}</p>`;
             updateCharts(guessesBcrypt * bcryptSec, new Set(unsaltedList).size, new Set(saltedList.map(s=>s.salted_sha)).size);
           } catch (e) {
+            if (e.name === 'AbortError') throw e;
             kdfStatus.textContent = 'bcrypt failed: ' + e;
             out.innerHTML += `<p style="color:orange">bcrypt error: ${e}</p>`;
           }
@@ -435,39 +592,20 @@ async function runDemo() {
         // scrypt branch
         if (useScryptLocal && useScryptLocal.checked) {
           try {
-            kdfStatus.textContent = 'Loading scrypt...';
-            await loadScrypt();
             kdfStatus.textContent = 'Computing scrypt...';
             const N = Math.max(1024, parseInt(scryptN.value || '16384', 10));
             const r = Math.max(1, parseInt(scryptR.value || '8', 10));
             const p = Math.max(1, parseInt(scryptP.value || '1', 10));
-            const startS = performance.now();
-            // Use hex salt string for scrypt-async compatibility
-            const saltHexForScrypt = saltHex;
-            const dkLen = 32;
-            const scryptAsync = window.scrypt;
-            const derived = await new Promise((resolve, reject) => {
-              try {
-                // Request hex encoded output for easier parsing
-                scryptAsync(pwd, saltHexForScrypt, { N: N, r: r, p: p, dkLen: dkLen, encoding: 'hex' }, (derivedKeyHex) => {
-                  resolve(derivedKeyHex);
-                });
-              } catch (err) { reject(err); }
-            });
-            const endS = performance.now();
-            const scryptSec = (endS - startS) / 1000;
+            const res = await timeKdf('scrypt', pwd, { N, r, p }, { salt: hexToBuf(saltHex), signal: kdfAbort.signal });
+            const scryptSec = res.first.seconds;
             kdfStatus.textContent = `scrypt computed in ${scryptSec.toFixed(2)}s (N=${N}, r=${r}, p=${p})`;
-            let hex = '';
-            if (typeof derived === 'string' && /^[0-9a-fA-F]+$/.test(derived)) {
-              hex = derived;
-            } else if (derived && derived.length) {
-              hex = bufToHex(derived instanceof Uint8Array ? derived : new Uint8Array(derived));
-            }
-            out.innerHTML += `<p><strong>Local scrypt (hex):</strong> <pre>${hex}</pre></p>`;
+            out.innerHTML += `<p><strong>Local scrypt (hex):</strong> <pre>${bufToHex(res.first.hash)}</pre></p>`;
+            out.innerHTML += kdfThroughputLine(res);
             const guessesScrypt = Math.pow(2, estimateEntropyBits(pwd) || 1);
             out.innerHTML += `<p><strong>Estimated crack time (scrypt per-guess cost):</strong> ${prettyTimeSeconds(guessesScrypt * scryptSec)}</p>`;
             updateCharts(guessesScrypt * scryptSec, new Set(unsaltedList).size, new Set(saltedList.map(s=>s.salted_sha)).size);
           } catch (e) {
+            if (e.name === 'AbortError') throw e;
             kdfStatus.textContent = 'scrypt failed: ' + e;
             out.innerHTML += `<p style="color:orange">scrypt error: ${e}</p>`;
           }
@@ -476,14 +614,22 @@ async function runDemo() {
         // show result with animation
         out.classList.add('fade-in');
       } catch (e) {
-        out.innerHTML += `<p style="color:orange">KDF computation failed: ${e}</p>`;
+        if (e.name === 'AbortError') {
+          out.innerHTML += `<p style="color:orange">KDF computation cancelled.</p>`;
+          kdfStatus.textContent = 'Cancelled';
+        } else {
+          out.innerHTML += `<p style="color:orange">KDF computation failed: ${e}</p>`;
+        }
+      } finally {
+        kdfAbort = null;
+        kdfCancelBtn.style.display = 'none';
       }
     } else {
       // fallback: show server Argon2 if local-only is disabled
       if (!localOnly.checked) {
         try {
           const res = await fetch('/api/hash', {
-            method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({ passwords: [pwd] })
+            method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({ passwords: [pwd], algorithms: ['argon2'] })
           });
           const j = await res.json();
           const a = j[0].argon2_hash;
@@ -491,6 +637,19 @@ async function runDemo() {
         } catch (e) {
           out.innerHTML += `<p style="color:orange">Failed to fetch server Argon2: ${e}</p>`;
         }
+        try {
+          // dictionary/pattern-aware estimate; the charset estimate above misses words, l33t and sequences
+          const res = await fetch('/api/strength', {
+            method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({ passwords: [pwd] })
+          });
+          if (res.ok) {
+            const [s] = await res.json();
+            const found = s.patterns.filter(p => p.pattern !== 'bruteforce').map(p => `${p.pattern} “${escapeHtml(p.token)}”`);
+            out.innerHTML += `<p><strong>Dictionary-aware strength:</strong> ${s.strength_bits} bits (charset estimate ${s.charset_bits} bits)${found.length ? ' — found ' + found.join(', ') : ''}</p>`;
+          }
+        } catch (e) {
+          console.warn('Strength check failed:', e);
+        }
       } else {
         out.innerHTML += `<p><em>Local-only mode: no plaintext sent to server.</em></p>`;
       }
@@ -511,6 +670,13 @@ async function runDemo() {
   }
 }
 
+function kdfThroughputLine(res) {
+  if (res.parallel < 2) return '';
+  return `<p><strong>Parallel throughput (${res.parallel} workers):</strong> ${res.guessesPerSec.toFixed(1)} guesses/s</p>`;
+}
+
+kdfCancelBtn.addEventListener('click', (e) => { e.preventDefault(); if (kdfAbort) kdfAbort.abort(); });
+
 // Hook demo button
 demoBtn.addEventListener('click', (e) => { e.preventDefault(); runDemo(); });
 
@@ -681,18 +847,200 @@ function updateCharts(crackSec, uniqueUnsalted, uniqueSalted) {
 }
 
 // Rainbow-table simulator: load common passwords and precompute unsalted map
-async function loadCommonPasswords() {
+// Digest memoization shared by the demo and the rainbow simulator: password -> unsalted sha256 hex
+const digestCache = new Map();
+const DIGEST_CHUNK = 2048;
+
+function yieldToEventLoop() {
+  if (window.scheduler && typeof scheduler.yield === 'function') return scheduler.yield();
+  return new Promise(r => setTimeout(r, 0));
+}
+
+async function cachedSha256Hex(pw) {
+  let h = digestCache.get(pw);
+  if (h === undefined) {
+    h = await sha256Hex(pw);
+    digestCache.set(pw, h);
+  }
+  return h;
+}
+
+// Digest a list in chunks, yielding between chunks so large lists never block the page
+async function sha256HexMany(list, onProgress) {
+  const out = new Array(list.length);
+  for (let i = 0; i < list.length; i += DIGEST_CHUNK) {
+    const chunk = list.slice(i, i + DIGEST_CHUNK);
+    const hashes = await Promise.all(chunk.map(cachedSha256Hex));
+    for (let j = 0; j < hashes.length; j++) out[i + j] = hashes[j];
+    if (onProgress) onProgress(Math.min(list.length, i + DIGEST_CHUNK), list.length);
+    await yieldToEventLoop();
+  }
+  return out;
+}
+
+// IndexedDB persistence of the precomputed table, keyed by the list's content hash.
+// Only the latest list is kept; digests are stored as one packed ArrayBuffer (32 bytes each).
+const DIGEST_DB = 'saltDemo';
+const DIGEST_STORE = 'rainbowTables';
+
+function openDigestDb() {
+  return new Promise((resolve, reject) => {
+    if (!window.indexedDB) return reject(new Error('IndexedDB unavailable'));
+    const req = indexedDB.open(DIGEST_DB, 1);
+    req.onupgradeneeded = () => req.result.createObjectStore(DIGEST_STORE);
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+async function loadStoredDigests(key) {
+  try {
+    const db = await openDigestDb();
+    return await new Promise((resolve, reject) => {
+      const req = db.transaction(DIGEST_STORE, 'readonly').objectStore(DIGEST_STORE).get(key);
+      req.onsuccess = () => resolve(req.result || null);
+      req.onerror = () => reject(req.error);
+    });
+  } catch (e) {
+    console.warn('Could not read cached digest table:', e);
+    return null;
+  }
+}
+
+async function storeDigests(key, digests) {
+  try {
+    const db = await openDigestDb();
+    await new Promise((resolve, reject) => {
+      const tx = db.transaction(DIGEST_STORE, 'readwrite');
+      const store = tx.objectStore(DIGEST_STORE);
+      store.clear();
+      store.put(digests, key);
+      tx.oncomplete = () => resolve();
+      tx.onerror = () => reject(tx.error);
+    });
+  } catch (e) {
+    console.warn('Could not cache digest table:', e);
+  }
+}
+
+function packHexDigests(hexes) {
+  const packed = new Uint8Array(hexes.length * 32);
+  for (let i = 0; i < hexes.length; i++) packed.set(hexToBuf(hexes[i]), i * 32);
+  return packed.buffer;
+}
+
+// Server-built digest table (digest_table.py, rainbow_index.py layout): read in place with
+// DataViews and binary-searched, so loading it costs no hashing and no per-entry map.
+const DIGEST_TABLE_MAGIC = 'SALTRIX1';
+
+class DigestTable {
+  constructor(buffer) {
+    const view = new DataView(buffer);
+    const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 8));
+    if (magic !== DIGEST_TABLE_MAGIC) throw new Error('not a digest table');
+    this.count = Number(view.getBigUint64(8, true));
+    this.digests = new Uint8Array(buffer, 16, this.count * 32);
+    this.offsets = new DataView(buffer, 16 + this.count * 32, (this.count + 1) * 8);
+    this.blob = new Uint8Array(buffer, 16 + this.count * 32 + (this.count + 1) * 8);
+    this.decoder = new TextDecoder();
+  }
+
+  get size() { return this.count; }
+
+  passwordAt(i) {
+    const start = Number(this.offsets.getBigUint64(i * 8, true));
+    const end = Number(this.offsets.getBigUint64(i * 8 + 8, true));
+    return this.decoder.decode(this.blob.subarray(start, end));
+  }
+
+  hexAt(i) { return bufToHex(this.digests.subarray(i * 32, i * 32 + 32)); }
+
+  _find(hex) {
+    if (typeof hex !== 'string' || hex.length !== 64) return -1;
+    const target = hexToBuf(hex);
+    let lo = 0, hi = this.count;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      let cmp = 0;
+      for (let k = 0, base = mid * 32; k < 32 && cmp === 0; k++) cmp = this.digests[base + k] - target[k];
+      if (cmp < 0) lo = mid + 1;
+      else if (cmp > 0) hi = mid;
+      else return mid;
+    }
+    return -1;
+  }
+
+  has(hex) { return this._find(hex) >= 0; }
+
+  get(hex) {
+    const i = this._find(hex);
+    return i >= 0 ? this.passwordAt(i) : undefined;
+  }
+}
+
+async function loadDigestTable() {
+  const meta = document.querySelector('meta[name="digest-table"]');
+  if (!meta) return null;
+  try {
+    // the URL is versioned by content and cached as immutable; the browser undoes gzip/br
+    const res = await fetch(meta.content);
+    if (!res.ok) throw new Error('http ' + res.status);
+    return new DigestTable(await res.arrayBuffer());
+  } catch (e) {
+    console.warn('Could not load digest table, hashing the text list instead:', e);
+    return null;
+  }
+}
+
+// Startup and the simulator button may both ask for the table; share one in-flight load
+let _commonLoading = null;
+function loadCommonPasswords() {
+  if (!_commonLoading) _commonLoading = _loadCommonPasswords().finally(() => { _commonLoading = null; });
+  return _commonLoading;
+}
+
+async function _loadCommonPasswords() {
   const statusEl = document.getElementById('rainbowStatus');
   try {
     if (statusEl) statusEl.textContent = 'Loading precomputed table...';
+    const table = await loadDigestTable();
+    if (table) {
+      rainbowMap = table;
+      commonPasswords = [];
+      for (let i = 0; i < table.size; i++) {
+        commonPasswords.push(table.passwordAt(i));
+        if (i % DIGEST_CHUNK === DIGEST_CHUNK - 1) await yieldToEventLoop();
+      }
+      if (statusEl) statusEl.textContent = `Precomputed table loaded (${commonPasswords.length} entries)`;
+      return true;
+    }
     const res = await fetch('/data/common_passwords.txt');
     if (!res.ok) throw new Error('Failed to load common passwords (http ' + res.status + ')');
     const txt = await res.text();
     commonPasswords = txt.split(/\r?\n/).map(s => s.trim()).filter(Boolean);
-    // Precompute unsalted sha256 map
-    rainbowMap.clear();
-    const promises = commonPasswords.map(pw => sha256Hex(pw).then(h => rainbowMap.set(h, pw)).catch(e => console.error('sha err', e)));
-    await Promise.all(promises);
+    const contentKey = await sha256Hex(txt);
+    rainbowMap = new Map();
+
+    const stored = await loadStoredDigests(contentKey);
+    if (stored && stored.byteLength === commonPasswords.length * 32) {
+      // Later visits: reuse the digests computed last time instead of re-hashing
+      const bytes = new Uint8Array(stored);
+      for (let i = 0; i < commonPasswords.length; i += DIGEST_CHUNK) {
+        const stop = Math.min(commonPasswords.length, i + DIGEST_CHUNK);
+        for (let j = i; j < stop; j++) {
+          const h = bufToHex(bytes.subarray(j * 32, j * 32 + 32));
+          rainbowMap.set(h, commonPasswords[j]);
+          digestCache.set(commonPasswords[j], h);
+        }
+        await yieldToEventLoop();
+      }
+    } else {
+      const hashes = await sha256HexMany(commonPasswords, (done, total) => {
+        if (statusEl) statusEl.textContent = `Precomputing table... ${done}/${total}`;
+      });
+      hashes.forEach((h, i) => rainbowMap.set(h, commonPasswords[i]));
+      storeDigests(contentKey, packHexDigests(hashes));
+    }
     console.info('Loaded common passwords:', commonPasswords.length);
     if (statusEl) statusEl.textContent = `Precomputed table loaded (${commonPasswords.length} entries)`;
     return true;
@@ -748,26 +1096,22 @@ async function runRainbowSimulator() {
     // Build a lookup map: prefer the precomputed rainbowMap when available, otherwise
     // build a temporary map from the current password list so the simulator still shows
     // meaningful 'instant crack' numbers even when the server-side precomputed file is unavailable.
+    // Every password is digested once per run (and memoized across runs)
+    // With the server table, entry i of commonPasswords is digest i: nothing to hash
+    const fromTable = usePre && loaded && pwList === commonPasswords && rainbowMap instanceof DigestTable;
+    const hashes = fromTable ? pwList.map((_, i) => rainbowMap.hexAt(i)) : await sha256HexMany(pwList);
     let tableMap = new Map();
     if (usePre && loaded) {
       tableMap = rainbowMap;
     } else {
-      // compute sha256 for the fallback list into a temp map
-      const tempMap = new Map();
-      const tmpPromises = pwList.map(async (pw) => {
-        const h = await sha256Hex(pw);
-        tempMap.set(h, pw);
-      });
-      await Promise.all(tmpPromises);
-      tableMap = tempMap;
+      hashes.forEach((h, i) => tableMap.set(h, pwList[i]));
     }
 
-    for (const pw of pwList) {
-      const h = await sha256Hex(pw);
-      if (tableMap.has(h)) {
-        crackedUnsaltedUsers += users;
-      }
+    const crackedPwList = [];
+    for (let i = 0; i < pwList.length; i++) {
+      if (tableMap.has(hashes[i])) crackedPwList.push(pwList[i]);
     }
+    crackedUnsaltedUsers = crackedPwList.length * users;
 
     out.innerHTML = `<p>Total simulated users: <strong>${totalUsers}</strong></p>
       <p><strong style="color:red">Unsalted (instant cracks):</strong> ${crackedUnsaltedUsers}</p>
@@ -798,12 +1142,6 @@ async function runRainbowSimulator() {
     const detailsList = document.getElementById('rainbowDetailsList');
     if (detailsList) {
       detailsList.innerHTML = '';
-      const crackedPwList = [];
-      // find which passwords in pwList were cracked
-      for (const pw of pwList) {
-        const h = await sha256Hex(pw);
-        if (tableMap.has(h)) crackedPwList.push(pw);
-      }
       // Add list items (limit to first 100 to avoid huge lists)
       const maxShow = 200;
       for (let i=0;i<Math.min(crackedPwList.length, maxShow); i++){
@@ -0,0 +1,81 @@
+// KDF worker: runs one Argon2 / bcrypt / scrypt job at a time off the main thread.
+//
+// Request:  { id, kind: 'argon2'|'bcrypt'|'scrypt', password, params, salt: ArrayBuffer }
+// Replies:  { id, type: 'progress', fraction }
+//           { id, type: 'result', kind, seconds, hash: ArrayBuffer, encoded }
+//           { id, type: 'error', message }
+// Salts and derived keys travel as transferable ArrayBuffers. Libraries are
+// loaded on first use with importScripts, so each worker only pays for the
+// KDFs it actually runs.
+
+const LIBS = {
+  // the bundled build inlines the WASM, which workers cannot fetch relative to the page
+  argon2: 'https://cdn.jsdelivr.net/npm/argon2-browser/dist/argon2-bundled.min.js',
+  bcrypt: 'https://cdn.jsdelivr.net/npm/bcryptjs@2.4.3/dist/bcrypt.min.js',
+  scrypt: 'https://cdn.jsdelivr.net/npm/scrypt-async@1.3.0/scrypt-async.min.js',
+};
+const loaded = {};
+
+function load(kind) {
+  if (!loaded[kind]) {
+    importScripts(LIBS[kind]);
+    loaded[kind] = true;
+  }
+}
+
+async function runArgon2(id, password, params, salt) {
+  load('argon2');
+  const res = await self.argon2.hash({
+    pass: password, salt: new Uint8Array(salt),
+    time: params.time, mem: params.mem, parallelism: params.parallelism,
+    hashLen: params.hashLen || 32, type: self.argon2.ArgonType.Argon2id,
+  });
+  return { hash: res.hash, encoded: res.encoded };
+}
+
+function runBcrypt(id, password, params) {
+  load('bcrypt');
+  const bcrypt = self.dcodeIO.bcrypt;
+  let last = 0;
+  return new Promise((resolve, reject) => {
+    bcrypt.hash(password, params.rounds, (err, encoded) => {
+      if (err) reject(err);
+      else resolve({ hash: new TextEncoder().encode(encoded), encoded });
+    }, (fraction) => {
+      // bcryptjs reports very often; forward at most every 5%
+      if (fraction - last >= 0.05) {
+        last = fraction;
+        self.postMessage({ id, type: 'progress', fraction });
+      }
+    });
+  });
+}
+
+function runScrypt(id, password, params, salt) {
+  load('scrypt');
+  return new Promise((resolve, reject) => {
+    try {
+      // interruptStep 0: no need to yield inside a worker, run flat out
+      self.scrypt(password, Array.from(new Uint8Array(salt)),
+        { N: params.N, r: params.r, p: params.p, dkLen: params.dkLen || 32, interruptStep: 0, encoding: 'binary' },
+        (key) => resolve({ hash: new Uint8Array(key), encoded: null }));
+    } catch (err) { reject(err); }
+  });
+}
+
+const RUNNERS = { argon2: runArgon2, bcrypt: runBcrypt, scrypt: runScrypt };
+
+self.onmessage = async (e) => {
+  const { id, kind, password, params, salt } = e.data;
+  try {
+    if (!RUNNERS[kind]) throw new Error(`Unknown KDF: ${kind}`);
+    const start = performance.now();
+    const res = await RUNNERS[kind](id, password, params || {}, salt || new ArrayBuffer(0));
+    const seconds = (performance.now() - start) / 1000;
+    const hash = res.hash.buffer.byteLength === res.hash.byteLength
+      ? res.hash.buffer : res.hash.slice().buffer;
+    self.postMessage({ id, type: 'result', kind, seconds, hash, encoded: res.encoded }, [hash]);
+  } catch (err) {
+    self.postMessage({ id, type: 'error', message: err && err.message ? err.message : String(err) });
+  }
+};
@@ -0,0 +1,347 @@
+"""Dictionary- and pattern-aware password strength, backed by a precompiled trie.
+
+The charset model (`scripts/simulate.estimate_entropy_bits`) rates
+"Password123!" as strong; an attacker tries it in the first few guesses. This
+module finds the cheap parts of a password the way a guessing attack would:
+
+- dictionary words from a ranked wordlist (case-insensitive, with l33t
+  substitutions such as ``@ -> a`` or ``0 -> o``), costing about their rank;
+- sequences (``abc``, ``4321``) and repeats (``aaa``, ``abcabc``);
+- everything else is brute-forced at the password's charset size.
+
+The cheapest segmentation is found with a left-to-right dynamic programme in
+log2 space, so the result is never above the charset estimate.
+
+The wordlist is compiled once into a trie file and opened with mmap, so
+loading is O(1) and the pages are shared between processes. Layout
+(little-endian)::
+
+    header   '<8sII'  magic b'SALTTRI1', node count, edge count
+    nodes    node count * '<IIi' (first edge, edge count, rank or -1), root first
+    labels   edge count bytes, the UTF-8 byte on each edge, sorted per node
+    targets  edge count * uint32 child node
+"""
+import math
+import mmap
+import os
+import struct
+from collections import deque
+
+MAGIC = b'SALTTRI1'
+HEADER = struct.Struct('<8sII')
+NODE = struct.Struct('<IIi')
+_TARGET = struct.Struct('<I')
+_BYTE = [bytes((i,)) for i in range(256)]
+
+# Characters that commonly stand in for letters
+LEET = {
+    '4': 'a', '@': 'a', '8': 'b', '(': 'c', '3': 'e', '6': 'g', '9': 'g', '1': 'il', '!': 'i',
+    '|': 'il', '0': 'o', '$': 's', '5': 's', '7': 't', '+': 't', '2': 'z',
+}
+# Characters that can form sequences, by alphabet
+_SEQUENCE_KIND = {**{c: 'a' for c in 'abcdefghijklmnopqrstuvwxyz'}, **{c: '0' for c in '0123456789'}}
+# Longest base looked for anywhere in a password; longer ones only when they repeat across all of it
+_MAX_REPEAT_BASE = 8
+_MAX_CACHED_STEPS = 1_000_000
+_CANDIDATES = {}
+
+
+def _candidates(c: str) -> tuple:
+    """Trie characters a password character may stand for: itself lower-cased, plus l33t readings."""
+    cands = _CANDIDATES.get(c)
+    if cands is None:
+        cands = _CANDIDATES[c] = tuple(dict.fromkeys(c.lower() + LEET.get(c, '')))
+    return cands
+
+
+def _charset_size(password: str) -> int:
+    charset = 0
+    if any(c.islower() for c in password):
+        charset += 26
+    if any(c.isupper() for c in password):
+        charset += 26
+    if any(c.isdigit() for c in password):
+        charset += 10
+    if any(not c.isalnum() for c in password):
+        charset += 32
+    return charset or 26
+
+
+def compile_trie(words, out_path: str, min_length: int = 3) -> int:
+    """Compile ranked `words` (most common first) into a trie file; returns the word count.
+
+    Words are stored lower-cased; a word seen twice keeps its better rank.
+    """
+    root = {}
+    count = 0
+    for rank, word in enumerate(words, start=1):
+        word = word.strip().lower()
+        if len(word) < min_length:
+            continue
+        node = root
+        for b in word.encode('utf-8'):
+            node = node.setdefault(b, {})
+        if None not in node:
+            node[None] = rank
+            count += 1
+
+    # breadth-first numbering; each node's edges are contiguous and sorted by label
+    nodes, labels, targets = [], bytearray(), []
+    order, queue = [root], deque([root])
+    index = {id(root): 0}
+    while queue:
+        node = queue.popleft()
+        children = sorted(k for k in node if k is not None)
+        nodes.append((len(labels), len(children), node.get(None, -1)))
+        for label in children:
+            child = node[label]
+            index[id(child)] = len(order)
+            order.append(child)
+            queue.append(child)
+            labels.append(label)
+            targets.append(index[id(child)])
+
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(nodes), len(labels)))
+        for node in nodes:
+            f.write(NODE.pack(*node))
+        f.write(labels)
+        for t in targets:
+            f.write(_TARGET.pack(t))
+    os.replace(tmp, out_path)
+    return count
+
+
+def _binom(n: int, k: int) -> int:
+    return math.comb(n, k) if 0 <= k <= n else 0
+
+
+def _uppercase_variations(token: str) -> int:
+    upper = sum(1 for c in token if c.isupper())
+    lower = sum(1 for c in token if c.islower())
+    if upper == 0 or token.lower() == token:
+        return 1
+    # Password / PASSWORD / passworD are what people actually do
+    if lower == 0 or (token[0].isupper() and upper == 1) or (token[-1].isupper() and upper == 1):
+        return 2
+    return sum(_binom(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def _leet_variations(token: str, word: str) -> int:
+    variations = 1
+    for sub in {t for t, w in zip(token, word) if t.lower() != w}:
+        orig = word[token.index(sub)]
+        subbed = token.count(sub)
+        unsubbed = sum(1 for c in token.lower() if c == orig)
+        if unsubbed == 0:
+            variations *= 2
+        else:
+            variations *= sum(_binom(subbed + unsubbed, i) for i in range(1, min(subbed, unsubbed) + 1))
+    return variations
+
+
+def _sequence_matches(password: str):
+    """(start, end, guesses) for runs of 3+ steps through a known sequence, either direction."""
+    lower = password.lower()
+    kind = [_SEQUENCE_KIND.get(c) for c in lower]
+    n, i = len(lower), 0
+    while i < n - 2:
+        step = ord(lower[i + 1]) - ord(lower[i])
+        if kind[i] is not None and kind[i] == kind[i + 1] and step in (1, -1):
+            j = i + 1
+            while j + 1 < n and kind[j + 1] == kind[i] and ord(lower[j + 1]) - ord(lower[j]) == step:
+                j += 1
+            if j - i >= 2:
+                first = lower[i]
+                base = 4 if first in 'az019' else (10 if first.isdigit() else 26)
+                yield i, j + 1, base * (j - i + 1) * (2 if step < 0 else 1)
+                i = j
+                continue
+        i += 1
+
+
+def _smallest_period(text: str) -> int:
+    """Smallest p such that text[k] == text[k + p] for every k (KMP prefix function, O(n))."""
+    n = len(text)
+    prefix = [0] * n
+    k = 0
+    for i in range(1, n):
+        while k and text[i] != text[k]:
+            k = prefix[k - 1]
+        if text[i] == text[k]:
+            k += 1
+        prefix[i] = k
+    return n - prefix[-1] if n else 0
+
+
+def _repeat_matches(password: str):
+    """(start, end, base) for a base repeated back to back, at least twice and 3+ characters in all.
+
+    Each period up to `_MAX_REPEAT_BASE` is one linear scan for maximal runs
+    where ``password[k] == password[k + p]``; a longer base is only found
+    when it repeats across the whole password. Bases that are themselves
+    repeats (``abab`` in ``abababab``) are left to their own smaller period.
+    """
+    n = len(password)
+    for p in range(1, min(_MAX_REPEAT_BASE, n // 2) + 1):
+        k = 0
+        while k + p < n:
+            if password[k] != password[k + p]:
+                k += 1
+                continue
+            start = k
+            while k + p < n and password[k] == password[k + p]:
+                k += 1
+            length = k + p - start
+            if length >= 2 * p and length >= 3:
+                base = password[start:start + p]
+                if _smallest_period(base) == p:
+                    yield start, start + length // p * p, base
+    period = _smallest_period(password)
+    if _MAX_REPEAT_BASE < period <= n // 2:
+        yield 0, n // period * period, password[:period]
+
+
+class StrengthIndex:
+    """Read-only, mmap-ed trie plus the matchers that use it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.node_count, self.edge_count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f'{path} is not a strength trie')
+        self._labels = HEADER.size + self.node_count * NODE.size
+        self._targets = self._labels + self.edge_count
+        # (node, character) -> (child, rank) for the edges walked so far
+        self._steps = {}
+
+    # Pickle by path, like RainbowIndex: worker processes re-map the file
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _child(self, node: int, text: str) -> int:
+        """Node reached from `node` by the UTF-8 bytes of `text`, or -1."""
+        mm = self._mm
+        for b in text.encode('utf-8'):
+            first, count, _ = NODE.unpack_from(mm, HEADER.size + node * NODE.size)
+            pos = mm.find(_BYTE[b], self._labels + first, self._labels + first + count)
+            if pos < 0:
+                return -1
+            node = _TARGET.unpack_from(mm, self._targets + (pos - self._labels) * _TARGET.size)[0]
+        return node
+
+    def _step(self, node: int, char: str):
+        """(child, rank) after following `char` from `node`; child is -1 when there is no edge."""
+        key = (node, char)
+        hit = self._steps.get(key)
+        if hit is None:
+            if len(self._steps) >= _MAX_CACHED_STEPS:
+                self._steps.clear()
+            child = self._child(node, char)
+            rank = NODE.unpack_from(self._mm, HEADER.size + child * NODE.size)[2] if child >= 0 else -1
+            hit = self._steps[key] = (child, rank)
+        return hit
+
+    def dictionary_matches(self, password: str):
+        """(start, end, rank, word) for every wordlist entry inside `password`.
+
+        Each start position walks the trie once, branching only on l33t
+        characters, so the work is linear in the password length times the
+        longest word.
+        """
+        n = len(password)
+        step = self._step
+        candidates = [_candidates(c) for c in password]
+        for i in range(n):
+            stack = [(0, i, '')]
+            while stack:
+                node, j, word = stack.pop()
+                if j == n:
+                    continue
+                for cand in candidates[j]:
+                    child, rank = step(node, cand)
+                    if child < 0:
+                        continue
+                    if rank >= 0:
+                        yield i, j + 1, rank, word + cand
+                    stack.append((child, j + 1, word + cand))
+
+    def _matches(self, password: str):
+        """(start, end, log2 guesses, pattern dict) candidates for the segmentation."""
+        for i, j, rank, word in self.dictionary_matches(password):
+            token = password[i:j]
+            guesses = rank * _uppercase_variations(token) * _leet_variations(token, word)
+            pattern = {'pattern': 'dictionary', 'token': token, 'word': word, 'rank': rank}
+            if word != token.lower():
+                pattern['l33t'] = True
+            yield i, j, math.log2(max(guesses, 1)), pattern
+        for i, j, guesses in _sequence_matches(password):
+            yield i, j, math.log2(guesses), {'pattern': 'sequence', 'token': password[i:j]}
+        base_bits = {}
+        for i, j, base in _repeat_matches(password):
+            if base not in base_bits:
+                if len(base) > 1:
+                    base_bits[base] = self.score(base)['strength_bits']
+                else:
+                    base_bits[base] = math.log2(_charset_size(base))
+            repeats = (j - i) // len(base)
+            yield i, j, base_bits[base] + math.log2(repeats), {
+                'pattern': 'repeat', 'token': password[i:j], 'base': base, 'repeats': repeats}
+
+    def score(self, password: str) -> dict:
+        """Estimated guesses (as log2 bits) for the cheapest way to build `password`.
+
+        Returns ``strength_bits``, the charset-only ``charset_bits`` for
+        comparison, and the matched ``patterns`` in password order.
+        """
+        n = len(password)
+        if not n:
+            return {'strength_bits': 0, 'charset_bits': 0, 'patterns': []}
+        per_char = math.log2(_charset_size(password))
+        ending = [[] for _ in range(n + 1)]
+        for i, j, bits, pattern in self._matches(password):
+            ending[j].append((i, bits, pattern))
+        cost = [0.0] + [math.inf] * n
+        back = [None] * (n + 1)
+        for j in range(1, n + 1):
+            cost[j], back[j] = cost[j - 1] + per_char, (j - 1, None)
+            for i, bits, pattern in ending[j]:
+                if cost[i] + bits < cost[j]:
+                    cost[j], back[j] = cost[i] + bits, (i, pattern)
+
+        patterns, j = [], n
+        while j > 0:
+            i, pattern = back[j]
+            if pattern is None:
+                # merge adjacent brute-forced characters into one segment
+                if patterns and patterns[-1]['pattern'] == 'bruteforce' and patterns[-1]['_start'] == j:
+                    patterns[-1]['_start'] = i
+                else:
+                    patterns.append({'pattern': 'bruteforce', '_start': i, '_end': j})
+            else:
+                patterns.append(pattern)
+            j = i
+        patterns.reverse()
+        for p in patterns:
+            if p['pattern'] == 'bruteforce':
+                p['token'] = password[p.pop('_start'):p.pop('_end')]
+        return {'strength_bits': int(round(cost[n])), 'charset_bits': int(round(per_char * n)), 'patterns': patterns}
+
+    def score_batch(self, passwords) -> list:
+        return [self.score(pw) for pw in passwords]
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
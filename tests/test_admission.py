@@ -0,0 +1,61 @@
+import json
+import threading
+
+import pytest
+
+import app as app_module
+from admission import AdmissionRejected, MemoryBudget
+
+
+def test_reservations_queue_until_memory_is_released():
+    budget = MemoryBudget(budget_kib=100, max_queue=1, max_wait=5)
+    first = budget.acquire(80)
+    admitted = threading.Event()
+
+    def waiter():
+        with budget.reserve(50):
+            admitted.set()
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    assert not admitted.wait(0.1)
+    assert budget.stats()['queue_depth'] == 1
+    budget.release(first)
+    t.join(timeout=5)
+    assert admitted.is_set()
+    stats = budget.stats()
+    assert stats['in_use_kib'] == 0 and stats['admitted'] == 2 and stats['wait_seconds_max'] > 0
+
+
+def test_full_queue_and_timeout_reject_with_retry_after():
+    budget = MemoryBudget(budget_kib=100, max_queue=0, max_wait=0.05)
+    budget.acquire(100)
+    with pytest.raises(AdmissionRejected) as exc:
+        budget.acquire(1)
+    assert exc.value.retry_after >= 1
+    budget = MemoryBudget(budget_kib=100, max_queue=4, max_wait=0.05)
+    budget.acquire(100)
+    with pytest.raises(AdmissionRejected):
+        budget.acquire(1)
+    assert budget.stats()['rejected'] == 1
+
+
+def test_oversized_reservation_is_clamped_to_budget():
+    budget = MemoryBudget(budget_kib=10)
+    with budget.reserve(10 ** 6) as reserved:
+        assert reserved == 10
+
+
+def test_api_hash_returns_429_when_budget_exhausted(monkeypatch):
+    budget = MemoryBudget(budget_kib=64, max_queue=0)
+    monkeypatch.setattr(app_module, 'admission', budget)
+    budget.acquire(64)
+    client = app_module.app.test_client()
+    rv = client.post('/api/hash', data=json.dumps({'passwords': ['x']}), content_type='application/json')
+    assert rv.status_code == 429
+    assert int(rv.headers['Retry-After']) >= 1
+    # cheap algorithms hold no KDF memory and are still served
+    rv = client.post('/api/hash', data=json.dumps({'passwords': ['x'], 'algorithms': ['sha256']}),
+                     content_type='application/json')
+    assert rv.status_code == 200
+    assert client.get('/api/admission').get_json()['rejected'] == 1
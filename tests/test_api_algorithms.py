@@ -0,0 +1,44 @@
+import json
+import hashlib
+
+from app import app
+
+
+def _post(payload):
+    client = app.test_client()
+    return client.post('/api/hash', data=json.dumps(payload), content_type='application/json')
+
+
+def test_sha_only_request_skips_kdfs():
+    rv = _post({'passwords': ['abc'], 'algorithms': ['sha256']})
+    assert rv.status_code == 200
+    row = rv.get_json()[0]
+    assert row == {'password': 'abc', 'unsalted_sha256': hashlib.sha256(b'abc').hexdigest()}
+
+
+def test_scrypt_with_params():
+    rv = _post({'passwords': ['abc'], 'algorithms': ['scrypt'], 'params': {'scrypt': {'n': 1024, 'r': 1, 'p': 1}}})
+    assert rv.status_code == 200
+    row = rv.get_json()[0]
+    s = row['scrypt']
+    expected = hashlib.scrypt(b'abc', salt=bytes.fromhex(s['salt_hex']), n=1024, r=1, p=1, dklen=32).hex()
+    assert s['scrypt_hex'] == expected
+    assert 'argon2_hash' not in row
+
+
+def test_argon2_params_are_applied():
+    rv = _post({'passwords': ['abc'], 'algorithms': ['argon2'], 'params': {'argon2': {'time_cost': 1, 'memory_cost': 8, 'parallelism': 1}}})
+    assert rv.status_code == 200
+    assert 'm=8,t=1,p=1' in rv.get_json()[0]['argon2_hash']
+
+
+def test_unknown_algorithm_and_bad_params_rejected():
+    rv = _post({'passwords': ['abc'], 'algorithms': ['md5']})
+    assert rv.status_code == 400
+    assert 'md5' in rv.get_json()['error']
+    rv = _post({'passwords': ['abc'], 'algorithms': ['scrypt'], 'params': {'scrypt': {'n': 1000}}})
+    assert rv.status_code == 400
+    rv = _post({'passwords': ['abc'], 'algorithms': ['argon2'], 'params': {'argon2': {'memory_cost': 10 ** 9}}})
+    assert rv.status_code == 400
+    rv = _post({'passwords': ['abc'], 'algorithms': ['argon2'], 'params': {'argon2': {'memory_cost': 8}}})
+    assert rv.status_code == 400
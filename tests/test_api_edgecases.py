@@ -1,6 +1,6 @@
 import json
 import hashlib
-from app import app
+from app import app, upload_limits
 
 
 def test_empty_password():
@@ -23,12 +23,16 @@ def test_non_string_password_converted():
 
 def test_long_password():
     client = app.test_client()
-    long_pw = 'p' * 10000
+    long_pw = 'p' * upload_limits.max_password_length
     rv = client.post('/api/hash', data=json.dumps({'passwords': [long_pw]}), content_type='application/json')
     assert rv.status_code == 200
     j = rv.get_json()
     assert j[0]['unsalted_sha256'] == hashlib.sha256(long_pw.encode()).hexdigest()
 
+    rv = client.post('/api/hash', data=json.dumps({'passwords': ['ok', long_pw + 'p']}), content_type='application/json')
+    assert rv.status_code == 413
+    assert 'passwords[1]' in rv.get_json()['error']
+
 
 def test_unicode_password():
     client = app.test_client()
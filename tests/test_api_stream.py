@@ -0,0 +1,26 @@
+import json
+import hashlib
+
+from app import app
+
+
+def test_hash_endpoint_streams_ndjson():
+    client = app.test_client()
+    pws = ['one', 'two', 'three']
+    rv = client.post('/api/hash', data=json.dumps({'passwords': pws}), content_type='application/json',
+                     headers={'Accept': 'application/x-ndjson'})
+    assert rv.status_code == 200
+    assert rv.mimetype == 'application/x-ndjson'
+    assert rv.is_streamed
+    lines = [json.loads(l) for l in rv.get_data(as_text=True).splitlines()]
+    assert [r['password'] for r in lines] == pws
+    assert lines[0]['unsalted_sha256'] == hashlib.sha256(b'one').hexdigest()
+    assert lines[0]['argon2_hash'].startswith('$argon2')
+
+
+def test_hash_endpoint_defaults_to_json():
+    client = app.test_client()
+    rv = client.post('/api/hash', data=json.dumps({'passwords': ['x']}), content_type='application/json',
+                     headers={'Accept': '*/*'})
+    assert rv.mimetype == 'application/json'
+    assert isinstance(rv.get_json(), list)
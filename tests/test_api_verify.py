@@ -0,0 +1,100 @@
+import json
+
+from argon2 import PasswordHasher
+
+from app import app
+from hash_engine import HashEngine
+
+
+def _post(items):
+    client = app.test_client()
+    return client.post('/api/verify', data=json.dumps({'items': items}), content_type='application/json')
+
+
+def test_verify_round_trips_api_hash_output():
+    client = app.test_client()
+    rows = client.post('/api/hash', data=json.dumps({'passwords': ['s3cret']}),
+                       content_type='application/json').get_json()
+    row = rows[0]
+    items = [
+        {'password': 's3cret', 'hash': row['argon2_hash']},
+        {'password': 'wrong', 'hash': row['argon2_hash']},
+        {'password': 's3cret', 'salted': row['salted']},
+        {'password': 'wrong', 'salted': row['salted']},
+        {'password': 's3cret', 'unsalted_sha256': row['unsalted_sha256']},
+    ]
+    rv = _post(items)
+    assert rv.status_code == 200
+    res = rv.get_json()
+    assert [r['valid'] for r in res] == [True, False, True, False, True]
+    assert [r['format'] for r in res] == ['argon2', 'argon2', 'salted_sha256', 'salted_sha256', 'sha256']
+    assert res[0]['needs_rehash'] is False
+    assert res[2]['needs_rehash'] is True
+
+
+def test_verify_reports_needs_rehash_for_weaker_params():
+    weak = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1).hash('pw')
+    res = _post([{'password': 'pw', 'hash': weak}]).get_json()
+    assert res[0] == {'format': 'argon2', 'valid': True, 'needs_rehash': True}
+
+
+def test_verify_flags_malformed_items():
+    res = _post([{'password': 'pw', 'hash': '$argon2id$nonsense'},
+                 {'password': 'pw', 'salted': {'salt_hex': 'zz', 'salted_sha256': '00'}},
+                 {'password': 'pw'}]).get_json()
+    assert all(r['valid'] is False and 'error' in r for r in res)
+    assert _post('not-a-list').status_code == 400
+
+
+def test_verify_batch_keeps_order_across_pool():
+    ph = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
+    engine = HashEngine(ph, workers=3)
+    try:
+        pws = [f'v{i}' for i in range(8)]
+        items = [{'password': p, 'hash': ph.hash(p)} for p in pws]
+        items.insert(3, {'password': 'x', 'unsalted_sha256': '00'})
+        res = engine.verify_batch(items)
+    finally:
+        engine.shutdown()
+    assert [r['valid'] for r in res] == [True] * 3 + [False] + [True] * 5
+
+
+def test_verify_refuses_argon2_params_beyond_server_limits(monkeypatch):
+    import app as app_module
+    from hash_engine import verify_memory_kib
+
+    ok = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1).hash('pw')
+    huge = ok.replace('m=8,', 'm=2097152,')
+    slow = ok.replace('t=1,', 't=100000,')
+    items = [{'password': 'pw', 'hash': h} for h in (huge, slow, ok)]
+    assert verify_memory_kib(items) == 8
+    res = _post(items).get_json()
+    assert 'memory_cost' in res[0]['error'] and res[0]['valid'] is False
+    assert 'time_cost' in res[1]['error'] and res[1]['valid'] is False
+    assert res[2]['valid'] is True and 'error' not in res[2]
+
+    monkeypatch.setattr(app_module, 'MAX_VERIFY_ITEMS', 2)
+    assert _post(items).status_code == 413
+
+
+def test_verify_rejects_a_body_that_is_not_an_object():
+    client = app.test_client()
+    for body in ('[1, 2]', '"x"', 'not json'):
+        rv = client.post('/api/verify', data=body, content_type='application/json')
+        assert rv.status_code == 400 and 'JSON object' in rv.get_json()['error']
+
+
+def test_verify_refuses_bcrypt_cost_beyond_server_limits():
+    slow = '$2b$31$' + 'a' * 53
+    res = _post([{'password': 'pw', 'hash': slow}, {'password': 'pw', 'hash': '$2b$xx'}]).get_json()
+    assert res[0]['format'] == 'bcrypt' and res[0]['valid'] is False
+    assert 'rounds 31' in res[0]['error']
+    assert 'cost' in res[1]['error']
+
+
+def test_verify_caps_password_length():
+    import app as app_module
+
+    pwd = 'x' * (app_module.upload_limits.max_password_length + 1)
+    rv = _post([{'password': 'pw', 'unsalted_sha256': '00'}, {'password': pwd, 'unsalted_sha256': '00'}])
+    assert rv.status_code == 413 and 'items[1].password' in rv.get_json()['error']
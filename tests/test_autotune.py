@@ -0,0 +1,62 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import kdf_config
+from scripts import autotune_kdfs
+
+
+def test_climb_stops_at_first_miss_and_keeps_weakest_if_none_fit():
+    latency = {1: 0.01, 2: 0.02, 3: 0.05, 4: 0.01}
+    probe = lambda c: {'p99': latency[c['x']]}  # noqa: E731
+    best, stats, trials = autotune_kdfs.climb([{'x': x} for x in (1, 2, 3, 4)], probe, 0.03)
+    assert best == {'x': 2} and stats['meets_target']
+    assert len(trials) == 3
+
+    best, stats, _ = autotune_kdfs.climb([{'x': 3}, {'x': 4}], probe, 0.03)
+    assert best == {'x': 3} and not stats['meets_target']
+
+
+def test_autotune_respects_memory_ceiling_and_config_loads(tmp_path):
+    root = os.path.dirname(os.path.dirname(__file__))
+    out = tmp_path / 'kdf.json'
+    cmd = [sys.executable, os.path.join(root, 'scripts', 'autotune_kdfs.py'), '--algorithms', 'argon2', 'scrypt',
+           '--target-p99-ms', '1000', '--concurrency', '2', '--memory-ceiling-mib', '8', '--repeats', '1',
+           '--out', str(out)]
+    proc = subprocess.run(cmd, cwd=root, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    config = json.loads(out.read_text())
+    assert config['argon2']['memory_cost'] * 2 <= 8 * 1024
+    assert 128 * config['scrypt']['n'] * config['scrypt']['r'] * 2 <= 8 * 1024 * 1024
+
+    ph = kdf_config.password_hasher(kdf_config.load(str(out)))
+    assert (ph.time_cost, ph.memory_cost) == (config['argon2']['time_cost'], config['argon2']['memory_cost'])
+
+
+def test_config_defaults_and_bad_file(tmp_path):
+    assert kdf_config.load(str(tmp_path / 'missing.json')) == {}
+    assert kdf_config.password_hasher({}).memory_cost == kdf_config.PasswordHasher().memory_cost
+    bad = tmp_path / 'bad.json'
+    bad.write_text('{oops')
+    with pytest.raises(ValueError):
+        kdf_config.load(str(bad))
+
+
+def test_tuned_scrypt_and_bcrypt_become_plan_defaults():
+    from hash_engine import HashEngine
+
+    config = {'argon2': {'time_cost': 1}, 'bcrypt': {'rounds': 12}, 'scrypt': {'n': 1024, 'r': 4, 'p': 1}}
+    defaults = kdf_config.plan_defaults(config)
+    assert defaults == {'bcrypt_rounds': 12, 'scrypt_n': 1024, 'scrypt_r': 4, 'scrypt_p': 1}
+    assert kdf_config.plan_defaults({}) == {}
+    engine = HashEngine(workers=1, plan_defaults=defaults)
+    try:
+        plan = engine.plan(['scrypt'], {'scrypt': {'r': 2}})
+        assert (plan.scrypt_n, plan.scrypt_r) == (1024, 2)
+        assert engine.default_plan.scrypt_n == 1024
+        assert engine.hash_batch(['pw'], plan)[0]['scrypt']['n'] == 1024
+    finally:
+        engine.shutdown()
@@ -0,0 +1,80 @@
+import time
+
+from scripts.bench_cache import BenchCache, host_fingerprint, sweep
+
+
+def _counting_bench(calls):
+    def bench(password, repeats=3, **params):
+        calls.append(params)
+        return {'avg': params['n'] * 1e-6, 'repeats': repeats}
+    return bench
+
+
+def test_sweep_reuses_cache_across_runs(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    calls = []
+    grid = [{'n': n} for n in (1, 2, 3, 4)]
+    cache = BenchCache(path, fingerprint='host-a')
+    first = sweep('scrypt', grid, cache=cache, jobs=2, bench=_counting_bench(calls))
+    cache.save()
+    assert [r['avg'] for r in first] == [1e-6, 2e-6, 3e-6, 4e-6] and len(calls) == 4
+
+    cache = BenchCache(path, fingerprint='host-a')
+    assert sweep('scrypt', grid, cache=cache, bench=_counting_bench(calls)) == first
+    assert len(calls) == 4 and cache.hits == 4
+
+    # another host, other repeats or another algorithm do not share entries
+    assert BenchCache(path, fingerprint='host-b').get('scrypt', {'n': 1}, 3) is None
+    assert cache.get('scrypt', {'n': 1}, 5) is None
+    assert cache.get('argon2', {'n': 1}, 3) is None
+
+
+def test_eviction_and_expiry(tmp_path):
+    cache = BenchCache(str(tmp_path / 'c.json'), max_entries=2, max_age=60, fingerprint='h')
+    cache.put('scrypt', {'n': 1}, 3, {'avg': 1})
+    cache.put('scrypt', {'n': 2}, 3, {'avg': 2})
+    time.sleep(0.01)
+    assert cache.get('scrypt', {'n': 1}, 3)  # now the most recently used
+    cache.put('scrypt', {'n': 3}, 3, {'avg': 3})
+    assert cache.get('scrypt', {'n': 2}, 3) is None
+    assert cache.get('scrypt', {'n': 1}, 3) and cache.get('scrypt', {'n': 3}, 3)
+
+    for entry in cache.entries.values():
+        entry['created'] -= 120
+    assert cache.get('scrypt', {'n': 1}, 3) is None and len(cache.entries) == 1
+
+
+def test_fingerprint_ignores_hostname_but_not_library_versions():
+    base = {'machine': 'x86_64', 'cpu_count': 8, 'python': '3.11', 'argon2-cffi': '23.1.0'}
+    assert host_fingerprint(dict(base, hostname='a')) == host_fingerprint(dict(base, hostname='b'))
+    assert host_fingerprint(base) != host_fingerprint(dict(base, **{'argon2-cffi': '21.3.0'}))
+
+
+def test_isolated_sweep_records_resources(tmp_path):
+    cache = BenchCache(str(tmp_path / 'c.json'), fingerprint='h')
+    cache.put('scrypt', {'n': 1024, 'r': 1, 'p': 1}, 1, {'avg': 1.0})  # measured in-process earlier
+    [res] = sweep('scrypt', [{'n': 1024, 'r': 1, 'p': 1}], cache=cache, repeats=1, isolate=True)
+    assert res['avg'] < 1.0
+    assert res['resources']['cpu_user_s'] >= 0 and res['resources']['memory_bandwidth_mb_s'] > 0
+    assert cache.get('scrypt', {'n': 1024, 'r': 1, 'p': 1}, 1)['resources'] == res['resources']
+
+
+def test_memory_hard_points_are_measured_one_at_a_time():
+    import threading
+
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def bench(password, repeats=3, **params):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return {'avg': 1e-3}
+
+    grid = [{'n': n} for n in range(4)]
+    sweep('scrypt', grid, jobs=4, bench=bench)
+    assert peak[0] == 1
+    sweep('bcrypt', grid, jobs=4, bench=bench)
+    assert peak[0] > 1
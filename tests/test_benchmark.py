@@ -1,13 +1,48 @@
+import json
 import subprocess
 import sys
 import os
 
 
-def test_benchmark_script_runs_quickly():
+def test_benchmark_script_runs_quickly(tmp_path):
     """Run the benchmark script with small params to ensure it executes without error."""
     root = os.path.dirname(os.path.dirname(__file__))
     script = os.path.join(root, 'scripts', 'benchmark_kdfs.py')
-    cmd = [sys.executable, script, '--password', 'test', '--argon-time', '1', '--argon-mem', '8', '--bcrypt-rounds', '4', '--scrypt-n', '1024', '--scrypt-r', '1', '--scrypt-p', '1']
+    cmd = [sys.executable, script, '--password', 'test', '--argon-time', '1', '--argon-mem', '8', '--bcrypt-rounds', '4', '--scrypt-n', '1024', '--scrypt-r', '1', '--scrypt-p', '1',
+           '--out', str(tmp_path / 'results.json')]
     proc = subprocess.run(cmd, cwd=root, capture_output=True, text=True, timeout=30)
     assert proc.returncode == 0, f"Benchmark script failed: {proc.stderr}\n{proc.stdout}"
     assert 'Benchmarking' in proc.stdout
+
+
+def test_results_file_and_compare_flags_regressions(tmp_path):
+    from scripts import benchmark_kdfs
+
+    stats = benchmark_kdfs.summarize([0.010, 0.012, 0.011, 0.013, 0.030])
+    assert stats['median'] == 0.012 and stats['min'] <= stats['p95'] <= stats['p99'] <= stats['max']
+    assert stats['ci95'][0] < stats['avg'] < stats['ci95'][1]
+
+    root = os.path.dirname(os.path.dirname(__file__))
+    script = os.path.join(root, 'scripts', 'benchmark_kdfs.py')
+    old = tmp_path / 'old.json'
+    cmd = [sys.executable, script, '--algorithms', 'scrypt', 'sha256', '--scrypt-n', '1024', '--scrypt-r', '1',
+           '--sha256-number', '100', '--max-workers', '2', '--out', str(old)]
+    proc = subprocess.run(cmd, cwd=root, capture_output=True, text=True, timeout=30)
+    assert proc.returncode == 0, proc.stderr
+    doc = json.loads(old.read_text())
+    assert doc['host']['cpu_count'] == os.cpu_count()
+    assert [r['workers'] for r in doc['results']['scrypt']['throughput']] == [1, 2]
+    resources = doc['results']['scrypt']['resources']
+    assert resources['peak_rss_kib'] > 0 and resources['cpu_per_hash_s'] > 0
+
+    slower = json.loads(old.read_text())
+    for run in slower['results']['sha256']['throughput']:
+        run['hashes_per_sec'] *= 0.5
+    rows = benchmark_kdfs.compare(doc, slower, threshold=0.1)
+    assert {r['algorithm'] for r in rows if r['regression']} == {'sha256'}
+
+    new = tmp_path / 'new.json'
+    new.write_text(json.dumps(slower))
+    compare = [sys.executable, script, '--compare', str(old), str(new)]
+    proc = subprocess.run(compare, cwd=root, capture_output=True, text=True, timeout=30)
+    assert proc.returncode == 1 and 'REGRESSION' in proc.stdout
@@ -0,0 +1,64 @@
+import gzip
+import hashlib
+import os
+
+import app as app_module
+from digest_table import DigestTable
+from rainbow_index import RainbowIndex
+
+
+def _table(tmp_path, words=('letmein', 'dragon', 'monkey')):
+    src = tmp_path / 'common.txt'
+    src.write_text('\n'.join(words) + '\n\n', encoding='utf-8')
+    return DigestTable(str(src), str(tmp_path / 'common.idx'))
+
+
+def test_build_variants_and_rebuild_on_change(tmp_path):
+    table = _table(tmp_path).ensure()
+    raw = (tmp_path / 'common.idx').read_bytes()
+    assert table.etag == hashlib.sha256(raw).hexdigest()
+    assert gzip.decompress((tmp_path / 'common.idx.gz').read_bytes()) == raw
+    with RainbowIndex(table.path) as index:
+        assert index.lookup(hashlib.sha256(b'dragon').digest()) == 'dragon'
+
+    old = table.etag
+    src = tmp_path / 'common.txt'
+    src.write_text('letmein\nshadow\n', encoding='utf-8')
+    future = os.path.getmtime(table.path) + 10
+    os.utime(src, (future, future))
+    assert table.ensure().etag != old
+
+
+def test_table_endpoint_caching_and_encoding(tmp_path, monkeypatch):
+    table = _table(tmp_path)
+    monkeypatch.setattr(app_module, 'digest_table', table)
+    client = app_module.app.test_client()
+
+    page = client.get('/').get_data(as_text=True)
+    url = f'/data/common_passwords.digests?v={table.version}'
+    assert f'name="digest-table" content="{url}"' in page
+
+    rv = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert rv.status_code == 200
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in rv.headers['Cache-Control']
+    assert 'Accept-Encoding' in rv.headers['Vary']
+    assert gzip.decompress(rv.data) == (tmp_path / 'common.idx').read_bytes()
+    etag = rv.headers['ETag']
+    assert not etag.startswith('W/')
+
+    rv = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert rv.status_code == 304 and rv.data == b''
+
+    rv = client.get('/data/common_passwords.digests')
+    assert rv.status_code == 200
+    assert 'Content-Encoding' not in rv.headers
+    assert rv.headers['Cache-Control'] == 'no-cache'
+    assert rv.headers['ETag'] != etag
+
+
+def test_missing_source_list(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'digest_table', DigestTable(str(tmp_path / 'none.txt'), str(tmp_path / 'x.idx')))
+    client = app_module.app.test_client()
+    assert client.get('/data/common_passwords.digests').status_code == 404
+    assert 'digest-table' not in client.get('/').get_data(as_text=True)
@@ -0,0 +1,31 @@
+import math
+
+from scripts import simulate
+from scripts.benchmark_entropy import legacy_entropy_bits, synthetic
+
+
+def test_batch_entropy_matches_per_password_and_legacy():
+    pws = synthetic(500) + ['', 'a', 'ABC', '1234', '!!!', 'pässwörd', 'ⓐbc', '中文密码', 'x²', 'MiXeD 9 $',
+                            '\udc80lone', 'tab\there']
+    batch = simulate.estimate_entropy_bits_batch(pws)
+    assert batch == [simulate.estimate_entropy_bits(pw) for pw in pws]
+    assert batch == [legacy_entropy_bits(pw) for pw in pws]
+    # a separator inside a password falls back to the per-password path
+    assert simulate.estimate_entropy_bits_batch(['two\nlines', 'x']) == [legacy_entropy_bits('two\nlines'), 5]
+    assert simulate.estimate_entropy_bits_batch([]) == []
+
+
+def test_crack_times_match_integer_division_and_do_not_overflow():
+    speeds = (1e7, 1e9)
+    for entropy in (0, 1, 40, 128, 1023):
+        expected = {str(int(s)): (2 ** entropy if entropy > 0 else 1) / float(s) for s in speeds}
+        assert simulate.crack_times(entropy, speeds) == expected
+    # 2 ** 1030 does not fit a float, but the quotient does
+    assert simulate.crack_time(1030, 1e9) == math.ldexp(1 / 1e9, 1030)
+    assert simulate.crack_time(5000, 1e9) == math.inf
+    rec = simulate.simulate_password('a' * 2000, 1, speeds, None)
+    assert rec['crack_times_sec']['1000000000'] == math.inf
+
+    cols = simulate.crack_times_batch([10, 20, 10], speeds)
+    assert cols == {'10000000': [2 ** 10 / 1e7, 2 ** 20 / 1e7, 2 ** 10 / 1e7],
+                    '1000000000': [2 ** 10 / 1e9, 2 ** 20 / 1e9, 2 ** 10 / 1e9]}
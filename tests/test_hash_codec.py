@@ -0,0 +1,58 @@
+import gzip
+import hashlib
+import json
+
+import pytest
+
+import app as app_module
+import hash_codec
+from hash_engine import HashEngine
+
+PARAMS = {'argon2': {'time_cost': 1, 'memory_cost': 8, 'parallelism': 1}, 'scrypt': {'n': 16, 'r': 1, 'p': 1}}
+
+
+def _post(client, payload, **headers):
+    return client.post('/api/hash', data=json.dumps(payload), content_type='application/json', headers=headers)
+
+
+def test_frames_round_trip_every_algorithm():
+    engine = HashEngine(workers=1)
+    algorithms = ['sha256', 'salted_sha256', 'argon2', 'scrypt']
+    plan = engine.plan(algorithms, PARAMS)
+    rows = engine.hash_batch(['pässword', '', 'x' * 300], plan, binary=True)
+    data = hash_codec.encode_frames(rows, plan.algorithms)
+    assert hash_codec.decode_frames(data) == rows
+    assert rows[0]['unsalted_sha256'] == hashlib.sha256('pässword'.encode()).digest()
+    salted = rows[0]['salted']
+    assert salted['salted_sha256'] == hashlib.sha256(salted['salt'] + 'pässword'.encode()).digest()
+    with pytest.raises(ValueError):
+        hash_codec.decode_frames(data[:-1])
+    with pytest.raises(ValueError):
+        hash_codec.decode_frames(b'NOTFRAME' + data[8:])
+
+
+def test_endpoint_negotiates_frames_and_gzip():
+    client = app_module.app.test_client()
+    payload = {'passwords': [f'pw{i}' for i in range(50)], 'algorithms': ['sha256', 'salted_sha256']}
+
+    plain = _post(client, payload, Accept='*/*')
+    assert plain.mimetype == 'application/json' and 'Content-Encoding' not in plain.headers
+
+    rv = _post(client, payload, Accept=hash_codec.FRAMES)
+    assert rv.mimetype == hash_codec.FRAMES and 'Accept' in rv.headers['Vary']
+    rows = hash_codec.decode_frames(rv.data)
+    assert [r['password'] for r in rows] == payload['passwords']
+    assert rows[3]['unsalted_sha256'].hex() == plain.get_json()[3]['unsalted_sha256']
+    assert len(rv.data) < len(plain.data) / 2
+
+    rv = _post(client, payload, **{'Accept-Encoding': 'gzip'})
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    body = json.loads(gzip.decompress(rv.data))
+    assert [r['unsalted_sha256'] for r in body] == [r['unsalted_sha256'] for r in plain.get_json()]
+
+
+@pytest.mark.skipif(hash_codec.msgpack is None, reason='msgpack not installed')
+def test_endpoint_msgpack():
+    client = app_module.app.test_client()
+    rv = _post(client, {'passwords': ['a'], 'algorithms': ['sha256']}, Accept=hash_codec.MSGPACK)
+    assert hash_codec.decode_msgpack(rv.data)[0]['unsalted_sha256'] == hashlib.sha256(b'a').digest()
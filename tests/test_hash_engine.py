@@ -0,0 +1,52 @@
+import hashlib
+import os
+import subprocess
+import sys
+
+from argon2 import PasswordHasher
+
+from hash_engine import HashEngine
+
+
+def _cheap_ph():
+    return PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
+
+
+def test_hash_batch_preserves_input_order():
+    engine = HashEngine(_cheap_ph(), workers=4)
+    try:
+        pws = [f'pw{i}' for i in range(25)]
+        rows = engine.hash_batch(pws)
+    finally:
+        engine.shutdown()
+    assert [r['password'] for r in rows] == pws
+    for pw, row in zip(pws, rows):
+        assert row['unsalted_sha256'] == hashlib.sha256(pw.encode()).hexdigest()
+        salt = bytes.fromhex(row['salted']['salt_hex'])
+        assert row['salted']['salted_sha256'] == hashlib.sha256(salt + pw.encode()).hexdigest()
+        assert row['argon2_hash'].startswith('$argon2')
+
+
+def test_hash_batch_empty_and_single_worker():
+    engine = HashEngine(_cheap_ph(), workers=1)
+    assert engine.hash_batch([]) == []
+    rows = engine.hash_batch(['a', 'b'])
+    assert [r['password'] for r in rows] == ['a', 'b']
+
+
+def test_engine_benchmark_script_runs_quickly():
+    root = os.path.dirname(os.path.dirname(__file__))
+    script = os.path.join(root, 'scripts', 'benchmark_hash_engine.py')
+    cmd = [sys.executable, script, '--passwords', '4', '--max-workers', '2', '--argon-mem', '8']
+    proc = subprocess.run(cmd, cwd=root, capture_output=True, text=True, timeout=30)
+    assert proc.returncode == 0, f"Benchmark script failed: {proc.stderr}\n{proc.stdout}"
+    assert 'workers=2' in proc.stdout
+
+
+def test_iter_hash_yields_in_order_with_bounded_window():
+    engine = HashEngine(_cheap_ph(), workers=3)
+    try:
+        pws = [f'stream{i}' for i in range(20)]
+        assert [r['password'] for r in engine.iter_hash(iter(pws))] == pws
+    finally:
+        engine.shutdown()
@@ -0,0 +1,33 @@
+import hashlib
+
+from hash_engine import HashEngine, verify_password
+from hashing_core import iter_salts, random_salts, salted_sha256, salted_sha256_many, sha256_many
+
+
+def test_salts_are_distinct_slices_of_one_draw():
+    salts = list(random_salts(100))
+    assert len(salts) == 100 and all(len(s) == 16 for s in salts)
+    assert len({bytes(s) for s in salts}) == 100
+    stream = iter_salts(chunk=3)
+    assert len({bytes(next(stream)) for _ in range(10)}) == 10
+
+
+def test_batch_digests_match_plain_hashlib():
+    raw = b'hunter2'
+    salts = [bytes(s) for s in random_salts(5)]
+    assert salted_sha256(memoryview(salts[0]), raw) == hashlib.sha256(salts[0] + raw).digest()
+    assert list(salted_sha256_many(raw, salts)) == [hashlib.sha256(s + raw).digest() for s in salts]
+    assert sha256_many([b'a', b'b']) == [hashlib.sha256(b'a').digest(), hashlib.sha256(b'b').digest()]
+
+
+def test_engine_rows_use_batch_salts_and_verify():
+    engine = HashEngine(workers=2)
+    plan = engine.plan(['salted_sha256'])
+    try:
+        rows = engine.hash_batch(['a', 'b', 'c'], plan)
+        streamed = list(engine.iter_hash(['a', 'b'], plan))
+    finally:
+        engine.shutdown()
+    assert len({r['salted']['salt_hex'] for r in rows + streamed}) == 5
+    for row in rows + streamed:
+        assert verify_password({'password': row['password'], 'salted': row['salted']}, engine.ph)['valid']
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import time
+
+from app import app
+from hash_engine import HashEngine
+from jobs import Job, JobRunner, JobStore
+
+
+def _wait_done(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        j = client.get(f'/api/jobs/{job_id}').get_json()
+        if j['status'] in ('done', 'failed'):
+            return j
+        time.sleep(0.02)
+    raise AssertionError('job did not finish')
+
+
+def test_job_api_runs_batch_and_pages_results():
+    client = app.test_client()
+    pws = [f'job{i}' for i in range(250)]
+    rv = client.post('/api/jobs', data=json.dumps({'passwords': pws, 'algorithms': ['sha256']}),
+                     content_type='application/json')
+    assert rv.status_code == 202
+    job_id = rv.get_json()['job_id']
+    assert rv.headers['Location'] == f'/api/jobs/{job_id}'
+
+    j = _wait_done(client, job_id)
+    assert j['status'] == 'done' and j['completed'] == 250 and j['progress'] == 1.0
+    assert j['next_offset'] == 100
+    page = client.get(f'/api/jobs/{job_id}?offset=200&limit=100').get_json()
+    assert [r['password'] for r in page['results']] == pws[200:]
+    assert page['results'][0]['unsalted_sha256'] == hashlib.sha256(b'job200').hexdigest()
+    assert page['next_offset'] is None
+
+
+def test_job_api_rejects_bad_input_and_unknown_ids():
+    client = app.test_client()
+    rv = client.post('/api/jobs', data=json.dumps({'passwords': ['a'], 'algorithms': ['md5']}),
+                     content_type='application/json')
+    assert rv.status_code == 400
+    assert client.get('/api/jobs/does-not-exist').status_code == 404
+
+
+def test_store_evicts_by_ttl_and_size_cap():
+    store = JobStore(ttl=0, max_jobs=2)
+    job = Job(['a'], None)
+    job.finished, job.status = time.time(), 'done'
+    store.add(job)
+    assert store.get(job.id) is None
+
+    store = JobStore(ttl=3600, max_jobs=2)
+    old, new = Job(['a'], None), Job(['b'], None)
+    old.finished, old.status = time.time(), 'done'
+    store.add(old)
+    store.add(new)
+    store.add(Job(['c'], None))
+    assert store.get(old.id) is None and store.get(new.id) is not None
+
+
+def test_runner_chunks_without_admission():
+    engine = HashEngine(workers=2)
+    runner = JobRunner(engine, JobStore(), chunk_size=3)
+    try:
+        job = runner.submit(['a', 'b', 'c', 'd'], engine.plan(['sha256']))
+        runner.shutdown(wait=True)
+        assert job.status == 'done' and [r['password'] for r in job.results] == ['a', 'b', 'c', 'd']
+        assert job.passwords is None
+    finally:
+        engine.shutdown()
+
+
+def test_create_job_rejects_a_body_that_is_not_an_object():
+    rv = app.test_client().post('/api/jobs', data='[1, 2]', content_type='application/json')
+    assert rv.status_code == 400 and 'JSON object' in rv.get_json()['error']
+
+
+def test_create_job_applies_the_upload_limits():
+    import app as app_module
+
+    client = app.test_client()
+    pwd = 'x' * (app_module.upload_limits.max_password_length + 1)
+    rv = client.post('/api/jobs', data=json.dumps({'passwords': ['ok', pwd]}), content_type='application/json')
+    assert rv.status_code == 413 and 'passwords[1]' in rv.get_json()['error']
+    rv = client.post('/api/jobs', data='{"passwords": [', content_type='application/json')
+    assert rv.status_code == 400
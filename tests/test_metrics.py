@@ -0,0 +1,90 @@
+import re
+import threading
+
+import app as app_module
+from hash_engine import HashEngine, HashPlan
+from metrics import Histogram, Registry, ServerMetrics
+
+
+def sample(text, name, **labels):
+    """Value of one exposition sample (labels must match exactly, in any order)."""
+    for line in text.splitlines():
+        m = re.fullmatch(r'(\w+)(?:\{(.*)\})? (\S+)', line)
+        if m and m.group(1) == name and dict(re.findall(r'(\w+)="([^"]*)"', m.group(2) or '')) == labels:
+            return float(m.group(3))
+    return None
+
+
+def test_histogram_buckets_are_cumulative_and_merge_threads():
+    h = Histogram('t', 'test', ('algorithm',), buckets=(0.1, 1.0))
+    threads = [threading.Thread(target=lambda: [h.observe(v, 'a') for v in (0.05, 0.1, 0.5, 3.0)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    snap = h.snapshot('a')
+    assert list(snap['buckets'].values()) == [8, 12, 16]  # le is inclusive: 0.1 lands in the 0.1 bucket
+    assert snap['count'] == 16 and abs(snap['sum'] - 4 * 3.65) < 1e-9
+
+
+def test_exposition_format():
+    r = Registry()
+    c = r.counter('c_total', 'A counter', ('path',))
+    c.inc(2, 'a"b\\c')
+    r.gauge('g', 'A gauge').dec(1)
+    r.histogram('h_seconds', 'A histogram', buckets=(1,)).observe(0.5)
+    text = r.exposition()
+    assert '# TYPE c_total counter\nc_total{path="a\\"b\\\\c"} 2\n' in text
+    assert '# TYPE g gauge\ng -1\n' in text
+    assert 'h_seconds_bucket{le="1"} 1\nh_seconds_bucket{le="+Inf"} 1\nh_seconds_sum 0.5\nh_seconds_count 1\n' in text
+
+
+def test_engine_samples_sha_only_plans_but_times_every_kdf_password():
+    m = ServerMetrics()
+    engine = HashEngine(workers=1, observe=m.hash_seconds.observe, sample_every=4)
+    engine.hash_batch([f'p{i}' for i in range(8)], HashPlan(('sha256', 'salted_sha256')))
+    argon = {'argon2': {'memory_cost': 8, 'time_cost': 1, 'parallelism': 1}}
+    list(engine.iter_hash(['a', 'b', 'c'], engine.plan(['sha256', 'argon2'], argon)))
+    assert m.hash_seconds.snapshot('salted_sha256')['count'] == 2
+    assert m.hash_seconds.snapshot('sha256')['count'] == 2 + 3
+    assert m.hash_seconds.snapshot('argon2')['count'] == 3
+
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(app_module, 'server_metrics', ServerMetrics())
+    monkeypatch.setattr(app_module.engine, 'observe', app_module.server_metrics.hash_seconds.observe)
+    client = app_module.app.test_client()
+    client.post('/api/hash', json={'passwords': ['a', 'b', 'c'], 'algorithms': ['sha256', 'argon2']}).close()
+    with client.post('/api/hash?algorithms=sha256', data='"a"\n"b"\n', content_type='application/x-ndjson',
+                     headers={'Accept': 'application/x-ndjson'}) as rv:
+        assert len(rv.get_data().splitlines()) == 2
+    client.post('/api/hash', json={'passwords': 'nope'}).close()
+
+    rv = client.get('/metrics')
+    assert rv.content_type.startswith('text/plain; version=0.0.4')
+    text = rv.get_data(as_text=True)
+    assert sample(text, 'salt_hash_seconds_count', algorithm='argon2') == 3
+    assert sample(text, 'salt_batch_passwords_count', endpoint='api_hash') == 2
+    assert sample(text, 'salt_batch_passwords_sum', endpoint='api_hash') == 5
+    assert sample(text, 'salt_requests_total', endpoint='api_hash', status='200') == 2
+    assert sample(text, 'salt_request_errors_total', endpoint='api_hash', status='400') == 1
+    assert sample(text, 'salt_request_duration_seconds_count', endpoint='api_hash') == 3
+    assert sample(text, 'salt_requests_in_flight', endpoint='api_hash') == 0
+    assert sample(text, 'salt_requests_in_flight', endpoint='metrics_endpoint') == 1
+
+
+def test_shards_of_finished_threads_are_folded_into_the_totals():
+    m = ServerMetrics()
+
+    def request():
+        m.request_finished('api_hash', 200, m.request_started('api_hash'))
+        m.hash_seconds.observe(0.5, 'argon2')
+
+    for _ in range(200):
+        t = threading.Thread(target=request)
+        t.start()
+        t.join()
+    assert len(m.request_seconds._shards) == 0 and len(m.in_flight._shards) == 0
+    assert m.requests.value('api_hash', '200') == 200 and m.in_flight.value('api_hash') == 0
+    snap = m.hash_seconds.snapshot('argon2')
+    assert snap['count'] == 200 and snap['sum'] == 100.0
@@ -0,0 +1,69 @@
+import re
+
+import app as app_module
+from profiling import RequestTimer, SlowRequestProfiler
+
+
+def timings(resp) -> dict:
+    return {m.group(1): float(m.group(2)) for m in re.finditer(r'([\w-]+);dur=([\d.]+)', resp.headers['Server-Timing'])}
+
+
+def test_server_timing_breaks_down_api_hash():
+    client = app_module.app.test_client()
+    rv = client.post('/api/hash', json={'passwords': ['a', 'b'], 'algorithms': ['sha256', 'argon2'],
+                                        'params': {'argon2': {'time_cost': 1, 'memory_cost': 8, 'parallelism': 1}}})
+    t = timings(rv)
+    assert list(t) == ['parse', 'plan', 'admission', 'hash', 'serialize', 'gzip',
+                       'hash-sha256', 'hash-argon2', 'total']
+    assert t['hash'] <= t['total'] and t['hash-argon2'] > 0
+    assert 'desc="summed over rows"' in rv.headers['Server-Timing']
+
+    rv = client.post('/api/hash', json={'passwords': [str(i) for i in range(64)], 'algorithms': ['sha256']})
+    assert 'hash-sha256;dur=' in rv.headers['Server-Timing']
+    assert 'estimated from sampled rows' in rv.headers['Server-Timing']
+
+    rv = client.post('/api/hash', json={'passwords': ['a'], 'algorithms': ['nope']})
+    assert rv.status_code == 400 and list(timings(rv)) == ['parse', 'plan', 'total']
+
+
+def test_timer_scales_sampled_rows():
+    timer = RequestTimer()
+    timer.observe(0.001, 'sha256')
+    timer.observe(0.003, 'sha256')
+    timer.rows = 10
+    assert timer.hash_seconds() == {'sha256': (0.02, True)}
+
+
+def test_profiler_mode_rate_limit_and_capacity():
+    assert SlowRequestProfiler('off').start({'X-Profile': '1'}) is None
+    assert SlowRequestProfiler('header', per_minute=0).start({}) is None
+
+    profiler = SlowRequestProfiler('all', capacity=2, per_minute=1)
+    prof = profiler.start({})
+    assert prof is not None
+    assert profiler.start({}) is None and profiler.skipped == 1  # busy, and within the minute anyway
+    profiler.finish(prof, 0.5, {'path': '/a'})
+    assert profiler.start({}) is None and profiler.skipped == 2
+
+    profiler = SlowRequestProfiler('all', capacity=2, per_minute=0)
+    for seconds in (0.3, 0.1, 0.5, 0.2):
+        profiler.finish(profiler.start({}), seconds, {'path': f'/{seconds}'})
+    snap = profiler.snapshot()
+    assert [p['seconds'] for p in snap['profiles']] == [0.5, 0.3]
+    assert 'function calls' in snap['profiles'][0]['stats']
+
+
+def test_debug_profiles_endpoint(monkeypatch):
+    client = app_module.app.test_client()
+    assert client.get('/debug/profiles').status_code == 404
+
+    monkeypatch.setattr(app_module, 'profiler', SlowRequestProfiler('header', per_minute=0))
+    client.post('/api/hash', json={'passwords': ['a'], 'algorithms': ['sha256']})
+    client.post('/api/hash', json={'passwords': ['b'], 'algorithms': ['sha256']}, headers={'X-Profile': '1'})
+    profiles = client.get('/debug/profiles').get_json()['profiles']
+    assert len(profiles) == 1
+    assert profiles[0]['path'] == '/api/hash' and profiles[0]['status'] == 200
+    assert profiles[0]['server_timing'].startswith('parse;dur=')
+    assert 'api_hash' in profiles[0]['stats']
+    assert client.delete('/debug/profiles').status_code == 204
+    assert client.get('/debug/profiles').get_json()['profiles'] == []
@@ -0,0 +1,71 @@
+import hashlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+from rainbow_chains import PAIR, Keyspace, RainbowTable, RainbowTableSet, chain_end, generate_table
+
+
+def test_keyspace_round_trip():
+    space = Keyspace('abc', 3)
+    assert space.size == 27
+    assert [space.index(space.password(i)) for i in range(space.size)] == list(range(27))
+
+
+def test_keyspace_larger_than_uint64_is_rejected():
+    assert Keyspace('ab', 64).size == 2 ** 64
+    with pytest.raises(ValueError, match='2\\^64'):
+        Keyspace('abc', 64)
+
+
+def test_lookup_finds_passwords_on_chains(tmp_path):
+    space = Keyspace('abcdefghij', 3)
+    path = str(tmp_path / 't.rt')
+    stats = generate_table(path, space, chains=50, chain_len=10, workers=1)
+    assert 0 < stats['chains_stored'] <= 50
+    table = RainbowTable(path)
+    try:
+        # walk one stored chain and check every column of it is recoverable
+        end, start = PAIR.unpack_from(table._mm, table._pairs)
+        index = start
+        for pos in range(10):
+            pw = space.password(index)
+            assert table.lookup(hashlib.sha256(pw.encode()).digest()) == pw
+            index = space.reduce(hashlib.sha256(pw.encode()).digest(), pos, 0)
+        assert index == end == chain_end(space, start, 10, 0)
+    finally:
+        table.close()
+
+
+def test_parallel_generation_matches_serial(tmp_path):
+    space = Keyspace('abcdefghij', 3)
+    a, b = str(tmp_path / 'a.rt'), str(tmp_path / 'b.rt')
+    generate_table(a, space, chains=40, chain_len=8, table_id=1, workers=1)
+    generate_table(b, space, chains=40, chain_len=8, table_id=1, workers=2)
+    assert open(a, 'rb').read() == open(b, 'rb').read()
+
+
+def test_more_tables_raise_coverage(tmp_path):
+    space = Keyspace('abcdefghij', 3)
+    paths = []
+    for tid in range(3):
+        paths.append(str(tmp_path / f't{tid}.rt'))
+        generate_table(paths[-1], space, chains=30, chain_len=10, table_id=tid, workers=1)
+    one, three = RainbowTableSet(paths[:1]), RainbowTableSet(paths)
+    try:
+        c1, c3 = one.measure_coverage(200)['coverage'], three.measure_coverage(200)['coverage']
+    finally:
+        one.close()
+        three.close()
+    assert 0 < c1 < c3 <= 1
+
+
+def test_rainbow_tables_bench_runs_quickly():
+    root = os.path.dirname(os.path.dirname(__file__))
+    cmd = [sys.executable, 'scripts/rainbow_tables.py', 'bench', '--length', '2', '--chains', '20',
+           '--chain-len', '5', '--samples', '10', '--workers', '1']
+    proc = subprocess.run(cmd, cwd=root, capture_output=True, text=True, timeout=30)
+    assert proc.returncode == 0, proc.stderr
+    assert 'coverage=' in proc.stdout
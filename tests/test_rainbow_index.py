@@ -0,0 +1,66 @@
+import hashlib
+import json
+import pickle
+
+import pytest
+
+import app as app_module
+from rainbow_index import RainbowIndex, build_index
+
+
+def _digest(pw):
+    return hashlib.sha256(pw.encode('utf-8')).digest()
+
+
+def test_build_and_lookup_across_spilled_runs(tmp_path):
+    pws = [f'pw{i}' for i in range(50)] + ['pässwörd🔒', 'pw3', '']
+    path = tmp_path / 'list.idx'
+    # tiny runs force the external merge path
+    assert build_index(iter(pws), str(path), run_size=7) == 52
+    with RainbowIndex(str(path)) as index:
+        assert len(index) == 52
+        for pw in pws:
+            assert index.lookup(_digest(pw)) == pw
+            assert _digest(pw) in index
+        assert index.lookup(_digest('missing')) is None
+        assert index.lookup_hex('zz') is None
+        assert index.lookup_hex(_digest('pw7').hex()) == 'pw7'
+
+
+def test_empty_index_and_bad_file(tmp_path):
+    path = tmp_path / 'empty.idx'
+    assert build_index([], str(path)) == 0
+    with RainbowIndex(str(path)) as index:
+        assert index.lookup(_digest('a')) is None
+    bad = tmp_path / 'bad.idx'
+    bad.write_bytes(b'not an index at all')
+    with pytest.raises(ValueError):
+        RainbowIndex(str(bad))
+
+
+def test_index_pickles_by_path(tmp_path):
+    path = tmp_path / 'list.idx'
+    build_index(['alpha'], str(path))
+    clone = pickle.loads(pickle.dumps(RainbowIndex(str(path))))
+    assert clone.lookup(_digest('alpha')) == 'alpha'
+
+
+def test_rainbow_lookup_endpoint(tmp_path, monkeypatch):
+    client = app_module.app.test_client()
+    monkeypatch.setattr(app_module, '_rainbow_index', None)
+    monkeypatch.setattr(app_module, 'RAINBOW_INDEX', str(tmp_path / 'missing.idx'))
+    rv = client.post('/api/rainbow/lookup', data=json.dumps({'hashes': []}), content_type='application/json')
+    assert rv.status_code == 503
+
+    path = tmp_path / 'list.idx'
+    build_index(['letmein', 'dragon'], str(path))
+    monkeypatch.setattr(app_module, 'RAINBOW_INDEX', str(path))
+    hashes = [_digest('dragon').hex(), _digest('nope').hex()]
+    rv = client.post('/api/rainbow/lookup', data=json.dumps({'hashes': hashes}), content_type='application/json')
+    assert rv.status_code == 200
+    assert [r['password'] for r in rv.get_json()] == ['dragon', None]
+
+
+def test_lookup_rejects_a_body_that_is_not_an_object():
+    rv = app_module.app.test_client().post('/api/rainbow/lookup', data='[1, 2]', content_type='application/json')
+    assert rv.status_code == 400 and 'JSON object' in rv.get_json()['error']
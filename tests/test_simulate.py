@@ -11,3 +11,12 @@ def test_simulate_report():
         assert val['rainbow_hit_unsalted'] is True
         assert val['salted_unique_count'] == 3
         assert val['entropy_bits'] >= 0
+
+
+def test_simulate_parallel_matches_serial():
+    pws = [f'pw{i}' for i in range(40)] + ['', 'dup', 'dup']
+    serial = simulate.simulate(pws, users_per_password=5, attacker_speeds=(1e6,))
+    parallel = simulate.simulate(pws, users_per_password=5, attacker_speeds=(1e6,), workers=2)
+    assert list(parallel['per_password']) == list(serial['per_password'])
+    assert parallel['per_password'] == serial['per_password']
+    assert parallel['summary'] == serial['summary']
@@ -28,3 +28,38 @@ def test_entropy_zero_for_empty_password():
     report = simulate.simulate(pws, users_per_password=3)
     v = report['per_password']['']
     assert v['entropy_bits'] == 0
+
+
+@pytest.mark.parametrize('suffix,opener', [('.gz', 'gzip'), ('.xz', 'lzma'), ('.bz2', 'bz2'), ('.txt', None)])
+def test_iter_passwords_reads_compressed_lists(tmp_path, suffix, opener):
+    import importlib
+    path = tmp_path / f'list{suffix}'
+    data = 'alpha\n\n  beta \ngamma\n'.encode('utf-8')
+    if opener:
+        data = importlib.import_module(opener).compress(data)
+    path.write_bytes(data)
+    assert list(simulate.iter_passwords(str(path))) == ['alpha', 'beta', 'gamma']
+
+
+def test_iter_records_streams_in_batches():
+    lines = (f'p{i}' for i in range(25))
+    pws = [pw for pw, _ in simulate.iter_records(lines, users_per_password=2, workers=2, batch_size=7)]
+    assert pws == [f'p{i}' for i in range(25)]
+    assert [len(b) for b in simulate.batched(range(10), 4)] == [4, 4, 2]
+
+
+def test_cli_reads_stdin_with_external_rainbow(tmp_path):
+    import json
+    import os
+    import subprocess
+    import sys
+    root = os.path.dirname(os.path.dirname(__file__))
+    out = tmp_path / 'report.json'
+    proc = subprocess.run([sys.executable, 'scripts/simulate.py', '--input', '-', '--users', '2', '--out', str(out),
+                           '--rainbow', 'data/common_passwords.txt'],
+                          cwd=root, input='password\nnot-in-the-list-42\n', capture_output=True, text=True, timeout=30)
+    assert proc.returncode == 0, proc.stderr
+    assert 'lines/s' in proc.stderr
+    report = json.loads(out.read_text())
+    hits = {pw: v['rainbow_hit_unsalted'] for pw, v in report['per_password'].items()}
+    assert hits == {'password': True, 'not-in-the-list-42': False}
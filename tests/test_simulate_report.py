@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+
+from scripts import simulate
+
+
+def _write(fmt, pws, path=None):
+    buf = open(path, 'w', encoding='utf-8', newline='') if path else io.StringIO()
+    writer = simulate.REPORT_WRITERS[fmt](buf)
+    summary = simulate.RunningSummary(2)
+    for pw, rec in simulate.iter_records(pws, users_per_password=2, attacker_speeds=(1e6,)):
+        writer.write(pw, rec)
+        summary.add(rec)
+    writer.close(summary.as_dict())
+    if path:
+        buf.close()
+        return None
+    return buf.getvalue()
+
+
+def test_json_writer_streams_classic_shape():
+    report = json.loads(_write('json', ['a', 'B2']))
+    assert set(report) == {'total_passwords', 'per_password', 'summary'}
+    assert list(report['per_password']) == ['a', 'B2']
+    assert report['summary']['total_passwords'] == 2
+    assert report['per_password']['a']['salted_unique_count'] == 2
+    # empty input still yields valid JSON
+    assert json.loads(_write('json', []))['per_password'] == {}
+
+
+def test_ndjson_writer_puts_summary_last():
+    lines = [json.loads(l) for l in _write('ndjson', ['a', 'b']).splitlines()]
+    assert [l['password'] for l in lines[:2]] == ['a', 'b']
+    assert lines[-1]['summary']['total_rainbow_hits_unsalted'] == 2
+
+
+def test_csv_writer_with_summary_sidecar(tmp_path):
+    out = tmp_path / 'report.csv'
+    _write('csv', ['a', 'b'], path=str(out))
+    rows = list(csv.DictReader(out.open()))
+    assert [r['password'] for r in rows] == ['a', 'b']
+    assert 'crack_time_sec_1000000' in rows[0]
+    assert json.loads((tmp_path / 'report.csv.summary.json').read_text())['total_passwords'] == 2
+
+
+def test_report_format_from_extension():
+    assert simulate.report_format('x.ndjson') == 'ndjson'
+    assert simulate.report_format('x.jsonl') == 'ndjson'
+    assert simulate.report_format('x.csv') == 'csv'
+    assert simulate.report_format('x.json') == 'json'
+    assert simulate.report_format('x.csv', 'json') == 'json'
+
+
+def test_summary_counts_repeated_passwords_once():
+    records = list(simulate.iter_records(['a', 'B2', 'a'], users_per_password=2, attacker_speeds=(1e6,)))
+    summary = simulate.RunningSummary(2)
+    lines = simulate.RunningSummary(2, dedup=False)
+    for _, rec in records:
+        summary.add(rec)
+        lines.add(rec)
+    expected = simulate.simulate(['a', 'B2', 'a'], users_per_password=2)['summary']
+    assert summary.as_dict() == expected
+    assert expected['total_passwords'] == 3 and expected['total_rainbow_hits_unsalted'] == 2
+    assert lines.as_dict()['total_rainbow_hits_unsalted'] == 3
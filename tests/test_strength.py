@@ -0,0 +1,100 @@
+import json
+import pickle
+
+import pytest
+
+import app as app_module
+from scripts import simulate
+from strength import StrengthIndex, compile_trie
+
+WORDS = ['123456', 'password', 'qwerty', 'dragon', 'monkey', 'letmein']
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / 'words.trie'
+    assert compile_trie(WORDS + ['password', 'ab'], str(path)) == len(WORDS)
+    with StrengthIndex(str(path)) as idx:
+        yield idx
+
+
+def _patterns(result):
+    return [(p['pattern'], p['token']) for p in result['patterns']]
+
+
+def test_dictionary_leet_sequence_and_repeat(index):
+    res = index.score('Password123!')
+    assert _patterns(res) == [('dictionary', 'Password'), ('sequence', '123'), ('bruteforce', '!')]
+    assert res['strength_bits'] < 20 < res['charset_bits'] == simulate.estimate_entropy_bits('Password123!')
+
+    leet = index.score('p@ssw0rd')
+    assert leet['patterns'][0]['l33t'] and leet['patterns'][0]['word'] == 'password'
+    assert _patterns(index.score('zyx987')) == [('sequence', 'zyx'), ('sequence', '987')]
+    assert _patterns(index.score('xyzxyzxyz'))[0][0] == 'repeat'
+    # the word list records its rank (duplicates keep the best one)
+    assert [m[2] for m in index.dictionary_matches('dragon')] == [4]
+
+
+def test_never_above_charset_estimate(index):
+    for pw in ['', 'Tr0ub4dor&3', 'xK9$mQ2#vL', 'pässwörd', 'monkey' * 5, 'a']:
+        res = index.score(pw)
+        assert res['strength_bits'] <= res['charset_bits']
+    assert index.score('xK9$mQ2#vL')['patterns'] == [{'pattern': 'bruteforce', 'token': 'xK9$mQ2#vL'}]
+
+
+def test_pickles_by_path_and_rejects_other_files(index, tmp_path):
+    clone = pickle.loads(pickle.dumps(index))
+    assert clone.score('dragon') == index.score('dragon')
+    bad = tmp_path / 'bad.trie'
+    bad.write_bytes(b'nope' * 10)
+    with pytest.raises(ValueError):
+        StrengthIndex(str(bad))
+
+
+def test_simulate_with_strength(index):
+    report = simulate.simulate(['Password1', 'xK9$mQ2#vL'], users_per_password=2, strength=index)
+    weak = report['per_password']['Password1']
+    assert weak['strength_bits'] < weak['entropy_bits']
+    assert weak['strength_patterns'][0] == 'dictionary'
+    assert weak['crack_times_sec'] == simulate.crack_times(weak['strength_bits'], (1e7, 1e9))
+    assert 'avg_strength_bits' in report['summary']
+
+
+def test_strength_endpoint(tmp_path, monkeypatch):
+    path = tmp_path / 'words.trie'
+    compile_trie(WORDS, str(path))
+    monkeypatch.setattr(app_module, '_strength_index', None)
+    monkeypatch.setattr(app_module, 'STRENGTH_TRIE', str(path))
+    client = app_module.app.test_client()
+    rv = client.post('/api/strength', data=json.dumps({'passwords': ['monkey1', 'xK9$mQ2#vL']}),
+                     content_type='application/json')
+    assert rv.status_code == 200
+    weak, strong = rv.get_json()
+    assert weak['strength_bits'] < strong['strength_bits']
+    rv = client.post('/api/strength', data=json.dumps({'passwords': 'monkey'}), content_type='application/json')
+    assert rv.status_code == 400
+    monkeypatch.setattr(app_module, 'MAX_STRENGTH_PASSWORDS', 1)
+    rv = client.post('/api/strength', data=json.dumps({'passwords': ['a', 'b']}), content_type='application/json')
+    assert rv.status_code == 413
+
+
+def test_repeats_are_found_without_backtracking(index):
+    from strength import _repeat_matches
+
+    assert list(_repeat_matches('abab12abab')) == [(0, 4, 'ab'), (6, 10, 'ab')]
+    assert list(_repeat_matches('aab')) == []
+    # a long base is found when it repeats across the whole password
+    assert list(_repeat_matches('correcthorse' * 3 + 'co')) == [(0, 36, 'correcthorse')]
+    assert _patterns(index.score('q' * 20000)) == [('repeat', 'q' * 20000)]
+
+
+def test_api_strength_caps_password_length():
+    client = app_module.app.test_client()
+    limit = app_module.upload_limits.max_password_length
+    rv = client.post('/api/strength', json={'passwords': ['ok', 'x' * (limit + 1)]})
+    assert rv.status_code == 413 and 'passwords[1]' in rv.get_json()['error']
+
+
+def test_api_strength_rejects_a_body_that_is_not_an_object():
+    rv = app_module.app.test_client().post('/api/strength', data='[1, 2]', content_type='application/json')
+    assert rv.status_code == 400 and 'JSON object' in rv.get_json()['error']
@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+
+import app as app_module
+from upload import UploadLimits, UploadRejected, iter_passwords
+
+
+class TrickleStream(io.RawIOBase):
+    """Body that arrives a few bytes at a time and records how much has been read."""
+
+    def __init__(self, data, step=7):
+        self.data, self.pos, self.step = data, 0, step
+
+    def read(self, n=-1):
+        chunk = self.data[self.pos:self.pos + min(n, self.step)]
+        self.pos += len(chunk)
+        return chunk
+
+
+LIMITS = UploadLimits(max_body_bytes=1000, max_items=3, max_password_length=10)
+
+
+def test_passwords_are_yielded_before_the_body_is_read():
+    stream = TrickleStream(b'"alpha"\n{"password": "beta"}\r\n\n42\n')
+    it = iter_passwords(stream, 'application/x-ndjson', LIMITS)
+    assert next(it) == 'alpha'
+    assert stream.pos < len(stream.data)
+    assert list(it) == ['beta', '42']
+    assert list(iter_passwords(TrickleStream('pässword\n\nb'.encode()), 'text/plain', LIMITS)) == ['pässword', 'b']
+
+
+@pytest.mark.parametrize('body, mimetype, status', [
+    (b'a\nb\nc\nd\n', 'text/plain', 413),               # too many items
+    (b'x' * 200, 'text/plain', 413),                    # one endless line: rejected before the body ends
+    (b'"0123456789A"\n', 'application/x-ndjson', 413),  # too long
+    (b'{"pw": 1}\n', 'application/x-ndjson', 400),
+    (b'not json\n', 'application/x-ndjson', 400),
+    (b'\xff\xfe\n', 'text/plain', 400),
+])
+def test_limits_and_malformed_lines(body, mimetype, status):
+    stream = TrickleStream(body)
+    with pytest.raises(UploadRejected) as e:
+        list(iter_passwords(stream, mimetype, LIMITS))
+    assert e.value.status == status
+    assert stream.pos <= LIMITS.max_body_bytes
+
+
+def test_endpoint_streamed_uploads(monkeypatch):
+    client = app_module.app.test_client()
+    rv = client.post('/api/hash?algorithms=sha256,salted_sha256', data='one\ntwo\n', content_type='text/plain')
+    assert rv.status_code == 200
+    assert [r['password'] for r in rv.get_json()] == ['one', 'two']
+    assert 'argon2_hash' not in rv.get_json()[0]
+
+    rv = client.post('/api/hash?algorithms=sha256', data='"a"\n"b"\n', content_type='application/x-ndjson',
+                     headers={'Accept': 'application/x-ndjson'})
+    assert [json.loads(line)['password'] for line in rv.data.splitlines()] == ['a', 'b']
+
+    monkeypatch.setattr(app_module, 'upload_limits', UploadLimits(100, 2, 10))
+    rv = client.post('/api/hash?algorithms=sha256', data='a\nb\nc\n', content_type='text/plain')
+    assert rv.status_code == 413 and 'at most 2' in rv.get_json()['error']
+    rv = client.post('/api/hash?algorithms=sha256', data='"a"\n"b"\n"c"\n', content_type='application/x-ndjson',
+                     headers={'Accept': 'application/x-ndjson'})
+    lines = [json.loads(line) for line in rv.data.splitlines()]
+    assert [r.get('password') for r in lines[:2]] == ['a', 'b'] and lines[2]['status'] == 413
+    rv = client.post('/api/hash', data=json.dumps({'passwords': ['x' * 200]}), content_type='application/json')
+    assert rv.status_code == 413 and 'larger than 100 bytes' in rv.get_json()['error']
+    rv = client.post('/api/hash?params=nope', data='a\n', content_type='text/plain')
+    assert rv.status_code == 400
@@ -0,0 +1,134 @@
+"""Incremental parsing and size limits for bulk `/api/hash` uploads.
+
+Besides a JSON body, `/api/hash` accepts
+
+- ``application/x-ndjson``: one JSON value per line, either a string or an
+  object with a ``password`` field;
+- ``text/plain``: one password per line (UTF-8; blank lines are skipped).
+
+These are read from the request stream in chunks and parsed a line at a time,
+so hashing starts while the rest of the body is still arriving. Every path
+enforces the same `UploadLimits` and stops at the first violation with
+`UploadRejected` (413 for a limit, 400 for malformed input), without reading
+the remainder of the body.
+"""
+import json
+
+NDJSON = 'application/x-ndjson'
+TEXT = 'text/plain'
+CHUNK_BYTES = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """Raised when an upload breaks a limit or cannot be parsed; carries the HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class UploadLimits:
+    def __init__(self, max_body_bytes: int, max_items: int, max_password_length: int):
+        self.max_body_bytes = max(1, int(max_body_bytes))
+        self.max_items = max(1, int(max_items))
+        self.max_password_length = max(1, int(max_password_length))
+
+    @property
+    def max_line_bytes(self) -> int:
+        # worst case for one NDJSON line: every character escaped as \uXXXX, plus the object around it
+        return self.max_password_length * 6 + 64
+
+    def check_content_length(self, length):
+        if length is not None and length > self.max_body_bytes:
+            raise UploadRejected(413, f'request body is larger than {self.max_body_bytes} bytes')
+
+    def check_count(self, count: int):
+        if count > self.max_items:
+            raise UploadRejected(413, f'a request may contain at most {self.max_items} passwords')
+
+    def check_password(self, pwd: str, where: str):
+        if len(pwd) > self.max_password_length:
+            raise UploadRejected(413, f'{where}: password is longer than {self.max_password_length} characters')
+
+    def check_batch(self, passwords: list):
+        """Limits for an already parsed JSON ``passwords`` list."""
+        if not isinstance(passwords, list):
+            raise UploadRejected(400, 'passwords must be a list')
+        self.check_count(len(passwords))
+        for i, pwd in enumerate(passwords):
+            self.check_password(pwd if isinstance(pwd, str) else str(pwd), f'passwords[{i}]')
+
+
+def read_limited(stream, limits: UploadLimits) -> bytes:
+    """The whole body, refusing to read past `limits.max_body_bytes`."""
+    body = stream.read(limits.max_body_bytes + 1)
+    if len(body) > limits.max_body_bytes:
+        raise UploadRejected(413, f'request body is larger than {limits.max_body_bytes} bytes')
+    return body
+
+
+def read_json(stream, limits: UploadLimits):
+    try:
+        return json.loads(read_limited(stream, limits))
+    except ValueError:
+        raise UploadRejected(400, 'request body is not valid JSON')
+
+
+def iter_lines(stream, limits: UploadLimits, chunk_bytes: int = CHUNK_BYTES):
+    """Lines of the body (bytes, without the newline) as soon as each is complete."""
+    total = 0
+    pending = b''
+    lineno = 0
+    while True:
+        chunk = stream.read(chunk_bytes)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > limits.max_body_bytes:
+            raise UploadRejected(413, f'request body is larger than {limits.max_body_bytes} bytes')
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            lineno += 1
+            yield lineno, line
+        if len(pending) > limits.max_line_bytes:
+            raise UploadRejected(
+                413, f'line {lineno + 1}: password is longer than {limits.max_password_length} characters')
+    if pending:
+        yield lineno + 1, pending
+
+
+def _parse_ndjson(lineno: int, line: bytes) -> str:
+    try:
+        item = json.loads(line)
+    except ValueError:
+        raise UploadRejected(400, f'line {lineno}: invalid JSON')
+    if isinstance(item, dict):
+        item = item.get('password')
+    if item is None or isinstance(item, (list, dict)):
+        raise UploadRejected(400, f'line {lineno}: expected a string or an object with a "password" field')
+    return item if isinstance(item, str) else str(item)
+
+
+def iter_passwords(stream, mimetype: str, limits: UploadLimits):
+    """Passwords from an NDJSON or text body, validated against `limits` as they are parsed."""
+    count = 0
+    for lineno, line in iter_lines(stream, limits):
+        if line.endswith(b'\r'):
+            line = line[:-1]
+        if mimetype == NDJSON:
+            if not line.strip():
+                continue
+            pwd = _parse_ndjson(lineno, line)
+        else:
+            if not line:
+                continue
+            try:
+                pwd = line.decode('utf-8')
+            except UnicodeDecodeError:
+                raise UploadRejected(400, f'line {lineno}: not valid UTF-8')
+        count += 1
+        limits.check_count(count)
+        limits.check_password(pwd, f'line {lineno}')
+        yield pwd